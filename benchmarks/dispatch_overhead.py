@@ -0,0 +1,76 @@
+"""
+Microbenchmark: per-dispatch overhead of running an action before and after compiled execution plans.
+
+The "legacy" path reproduces what every /order and Discord message used to do (`inspect.signature`,
+`inspect.iscoroutinefunction` and `importlib.import_module` to read the output message mode). The "plan" path
+dispatches from an `ActionPlan` compiled once per configuration snapshot.
+
+    PYTHONPATH=src python benchmarks/dispatch_overhead.py [iterations]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import inspect
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from mob.app_utils import execute_callable
+from mob.models import ConfigRepository, FunctionRegistry
+
+DEFAULT_ITERATIONS = 20_000
+
+
+async def _legacy_dispatch(func, environment: dict, payload: dict) -> object:
+    sig = inspect.signature(func)
+    kwargs = {}
+    if "environment" in sig.parameters:
+        kwargs["environment"] = environment
+    if "payload" in sig.parameters:
+        kwargs["payload"] = payload
+    module = importlib.import_module(func.__module__)
+    getattr(module, "DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE", None)
+    if inspect.iscoroutinefunction(func):
+        return await func(**kwargs)
+    raise AssertionError("The benchmark target is async.")
+
+
+async def _bench(label: str, dispatch, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await dispatch()
+    elapsed = time.perf_counter() - started
+    per_call_us = elapsed / iterations * 1_000_000
+    print(f"{label:<8} {per_call_us:8.2f} us/dispatch ({iterations} iterations)")
+    return per_call_us
+
+
+async def main(iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_path = Path(tmp_dir) / "api_config.json"
+        config_path.write_text(json.dumps({"echo": {"function": "testing.slow_echo"}}), encoding="utf-8")
+        snapshot = ConfigRepository(config_path).get_snapshot()
+
+        environment, payload = {}, {"delay": 0}
+        handler = FunctionRegistry.resolve("testing.slow_echo")
+        plan = FunctionRegistry.get_plan("echo", snapshot, default_timeout=10.0)
+
+        legacy = await _bench("legacy", lambda: _legacy_dispatch(handler, environment, payload), iterations)
+        compiled = await _bench(
+            "plan",
+            lambda: execute_callable(
+                FunctionRegistry.get_plan("echo", snapshot, default_timeout=10.0).function,
+                environment=plan.config.environment,
+                payload=payload,
+            ),
+            iterations,
+        )
+        print(f"speedup  {legacy / compiled:8.2f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS))
@@ -0,0 +1,72 @@
+"""
+Microbenchmark: Docker round trips of the minecraft functions through the docker CLI and the Engine API client.
+
+The "cli" path reproduces what every minecraft function used to do (`docker inspect` + `docker exec`, one process
+spawn each). The "client" path does the same through `DockerClient` over /var/run/docker.sock with pooled
+keep-alive connections. Needs a running container with `sh` (e.g. the minecraft server).
+
+    PYTHONPATH=src python benchmarks/docker_client.py <container> [iterations] [socket]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from mob.utils.docker import DEFAULT_DOCKER_SOCKET, DockerClient
+
+DEFAULT_ITERATIONS = 50
+COMMAND = "echo ok"
+
+
+async def _docker_cli(*args: str) -> str:
+    process = await asyncio.create_subprocess_exec(
+        "docker", *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL
+    )
+    stdout, _ = await process.communicate()
+    return stdout.decode().strip()
+
+
+async def _cli_round_trip(container: str) -> str:
+    running = await _docker_cli("inspect", "-f", "{{.State.Running}}", container)
+    assert running == "true", f"container '{container}' is not running"
+    return await _docker_cli("exec", container, "sh", "-c", COMMAND)
+
+
+async def _client_round_trip(client: DockerClient, container: str) -> str:
+    assert await client.is_container_running(container), f"container '{container}' is not running"
+    return (await client.exec(container, ["sh", "-c", COMMAND])).stdout
+
+
+async def _bench(label: str, round_trip, iterations: int) -> float:
+    await round_trip()  # warm up (CLI page cache, client connection)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        await round_trip()
+    elapsed = time.perf_counter() - started
+    per_call_ms = elapsed / iterations * 1000
+    print(f"{label:<8} {per_call_ms:8.2f} ms/round trip ({iterations} iterations)")
+    return per_call_ms
+
+
+async def main(container: str, iterations: int, socket_path: str) -> None:
+    client = DockerClient(socket_path)
+    try:
+        cli = await _bench("cli", lambda: _cli_round_trip(container), iterations)
+        native = await _bench("client", lambda: _client_round_trip(client, container), iterations)
+    finally:
+        await client.aclose()
+    print(f"speedup  {cli / native:8.2f}x")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit(__doc__)
+    asyncio.run(
+        main(
+            sys.argv[1],
+            int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_ITERATIONS,
+            sys.argv[3] if len(sys.argv) > 3 else DEFAULT_DOCKER_SOCKET,
+        )
+    )
@@ -0,0 +1,109 @@
+"""
+Microbenchmark: availability analysis of the padel schedule screenshots (tests/fixtures/padel).
+
+The "analyzer" path is what the padel checker used to do for every date: build the 360-cell schema, load it into
+autoweb's AvailabilityWindowAnalyzer and sample each cell on its own (skipped when autoweb is not installed). The
+"per-cell" path is a plain loop over the cells with the same sampling rules, as a reference that runs anywhere. The
+"vectorized" paths use the precomputed AvailabilityGrid, one screenshot after another and all of them in parallel.
+
+    PYTHONPATH=src python benchmarks/padel_grid_analysis.py [iterations] [threads]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+
+import numpy as np
+
+from mob.functions.webscraping.padel.vigo_twelve_schema import SPATIALLY_SCHEMA, get_availability_grid
+from mob.utils.availability_grid import AvailabilityGrid, _load_rgb
+
+DEFAULT_ITERATIONS = 20
+DEFAULT_THREADS = 4
+FIXTURES = Path(__file__).resolve().parent.parent / "tests" / "fixtures" / "padel"
+
+
+def _per_cell_windows(grid: AvailabilityGrid, screenshot: Path) -> set[str]:
+    """Samples every cell separately (majority of the pixels within tolerance) and scans each row for windows."""
+    pixels = _load_rgb(screenshot).astype(np.int16)
+    height, width = pixels.shape[:2]
+    radius = grid.sample_radius
+    values = []
+    for x, y in grid.coords:
+        patch = pixels[
+            max(0, min(height - 1, y - radius)) : max(0, min(height - 1, y + radius)) + 1,
+            max(0, min(width - 1, x - radius)) : max(0, min(width - 1, x + radius)) + 1,
+        ].reshape(-1, 3)
+        votes = [0] * len(grid.colors)
+        for pixel in patch:
+            distances = [int(np.abs(pixel - color).max()) for color in grid.colors]
+            nearest = distances.index(min(distances))
+            if distances[nearest] <= grid.tolerance:
+                votes[nearest] += 1
+        values.append(grid.color_values[votes.index(max(votes))] if any(votes) else None)
+    span = grid.window_span
+    return {
+        grid.labels[start]
+        for start in range(len(values) - span + 1)
+        if all(values[start : start + span]) and grid.rows[start] == grid.rows[start + span - 1]
+    }
+
+
+def _analyzer_windows(screenshot: Path) -> set[str]:
+    from autoweb.spatially.analyzers.availability_window_analyzer import AvailabilityWindowAnalyzer
+
+    schema = {**SPATIALLY_SCHEMA, "data": [dict(cell) for cell in SPATIALLY_SCHEMA["data"]]}
+    result = AvailabilityWindowAnalyzer.from_payload(schema).analyze(str(screenshot)).to_dict(include_cells=True)
+    return {window["start_label"] for window in result["available_windows"]}
+
+
+def _vectorized_windows(screenshot: Path) -> set[str]:
+    return {window["start_label"] for window in get_availability_grid().analyze(screenshot).available_windows}
+
+
+def _bench(label: str, analyze_all, iterations: int) -> tuple[float, list[set[str]]]:
+    windows = analyze_all()  # warm up (page cache, sampling index)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        analyze_all()
+    per_batch_ms = (time.perf_counter() - started) / iterations * 1000
+    print(f"{label:<20} {per_batch_ms:9.2f} ms/batch of screenshots ({iterations} iterations)")
+    return per_batch_ms, windows
+
+
+def main(iterations: int, threads: int) -> None:
+    screenshots = sorted(FIXTURES.glob("*.png"))
+    grid = get_availability_grid()
+    print(f"{len(screenshots)} screenshots, {len(grid.labels)} cells each")
+    results: dict[str, tuple[float, list[set[str]]]] = {}
+
+    if find_spec("autoweb") is None:
+        print("analyzer             skipped (autoweb is not installed)")
+    else:
+        results["analyzer"] = _bench("analyzer", lambda: [_analyzer_windows(s) for s in screenshots], iterations)
+    results["per-cell"] = _bench(
+        "per-cell", lambda: [_per_cell_windows(grid, s) for s in screenshots], max(1, iterations // 10)
+    )
+    results["vectorized"] = _bench("vectorized", lambda: [_vectorized_windows(s) for s in screenshots], iterations)
+    with ThreadPoolExecutor(threads) as executor:
+        results["vectorized parallel"] = _bench(
+            "vectorized parallel", lambda: list(executor.map(_vectorized_windows, screenshots)), iterations
+        )
+
+    reference, (vectorized_ms, vectorized_windows) = next(iter(results)), results["vectorized parallel"]
+    reference_ms, reference_windows = results[reference]
+    for label, (_, windows) in results.items():
+        if windows != vectorized_windows:
+            print(f"warning: {label} found different windows than the vectorized analysis")
+    print(f"speedup vs {reference:<9} {reference_ms / vectorized_ms:8.2f}x")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ITERATIONS,
+        int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_THREADS,
+    )
@@ -0,0 +1,74 @@
+"""
+Startup benchmark: cold import time of the `api` and `discord` modes, measured with `python -X importtime`.
+
+Every run spawns a fresh interpreter, so the numbers include the whole import graph of each mode. The script prints
+the median wall time, the total import time reported by the interpreter and the heaviest top-level packages.
+
+    PYTHONPATH=src python benchmarks/startup_importtime.py [runs]
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+DEFAULT_RUNS = 5
+TOP_PACKAGES = 8
+
+MODES = {
+    "api": "import mob.app",
+    "discord": "import mob.app; mob.app.build_discord_client()",
+}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)")
+
+
+def _run_once(code: str) -> tuple[float, str]:
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=os.environ.copy(),
+        check=True,
+    )
+    return (time.perf_counter() - started) * 1000, completed.stderr
+
+
+def _parse_importtime(stderr: str) -> tuple[float, dict[str, float]]:
+    """Returns the total import time and the self import time aggregated by root package (ms)."""
+    total_us = 0
+    per_package_us: dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, module = int(match[1]), match[3]
+        total_us += self_us
+        per_package_us[module.split(".")[0]] += self_us
+    return total_us / 1000, {name: value / 1000 for name, value in per_package_us.items()}
+
+
+def main(runs: int) -> None:
+    for mode, code in MODES.items():
+        wall_times, import_totals = [], []
+        packages: dict[str, float] = {}
+        for _ in range(runs):
+            wall_ms, stderr = _run_once(code)
+            import_ms, packages = _parse_importtime(stderr)
+            wall_times.append(wall_ms)
+            import_totals.append(import_ms)
+
+        wall_ms, import_ms = statistics.median(wall_times), statistics.median(import_totals)
+        print(f"[{mode}] wall {wall_ms:8.1f} ms | imports {import_ms:8.1f} ms")
+        for name, value in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES]:
+            print(f"    {name:<24} {value:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS)
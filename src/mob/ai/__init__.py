@@ -1,19 +1,72 @@
-from mob.ai.g4f_client import select_action as select_action_with_g4f
-from mob.ai.g4f_client import talk as talk_to_g4f
-from mob.ai.gemini_client import select_action as select_action_with_gemini
-from mob.ai.gemini_client import talk as talk_to_gemini
-from mob.ai.open_router_client import select_action as select_action_with_open_router
-from mob.ai.open_router_client import talk as talk_to_open_router
-from mob.ai.openai_client import select_action as select_action_with_openai
-from mob.ai.openai_client import talk as talk_to_openai
+"""
+AI provider registry.
+
+Provider modules (and their SDKs: `openai`, `google.genai`, ...) are only imported the first time a provider is
+used, so processes that never talk to an LLM do not pay for them at startup.
+"""
+
+import importlib
+import threading
+from types import ModuleType
+from typing import Any
+
+PROVIDERS: dict[str, str] = {
+    "g4f": "mob.ai.g4f_client",
+    "gemini": "mob.ai.gemini_client",
+    "open_router": "mob.ai.open_router_client",
+    "openai": "mob.ai.openai_client",
+}
+
+# Backwards compatible names: `from mob.ai import talk_to_gemini` keeps working, resolved on first access
+_LAZY_ATTRIBUTES: dict[str, tuple[str, str]] = {
+    "select_action_with_open_router": ("open_router", "select_action"),
+    "select_action_with_gemini": ("gemini", "select_action"),
+    "select_action_with_openai": ("openai", "select_action"),
+    "select_action_with_g4f": ("g4f", "select_action"),
+    "talk_to_open_router": ("open_router", "talk"),
+    "talk_to_gemini": ("gemini", "talk"),
+    "talk_to_openai": ("openai", "talk"),
+    "talk_to_g4f": ("g4f", "talk"),
+}
+
+_loaded_providers: dict[str, ModuleType] = {}
+_lock = threading.Lock()
+
+
+def get_provider(name: str) -> ModuleType:
+    """Returns the client module of a provider, importing it on first use."""
+    provider = _loaded_providers.get(name)
+    if provider is not None:
+        return provider
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown AI provider '{name}'. Available providers: {', '.join(PROVIDERS)}.")
+    with _lock:
+        if name not in _loaded_providers:
+            _loaded_providers[name] = importlib.import_module(PROVIDERS[name])
+        return _loaded_providers[name]
+
+
+def select_action(provider: str, request: Any, **kwargs: Any) -> Any:
+    """Asks the given provider to choose an action (see each client `select_action`)."""
+    return get_provider(provider).select_action(request, **kwargs)
+
+
+def talk(provider: str, request: Any, **kwargs: Any) -> Any:
+    """Has a conversation with the given provider (see each client `talk`)."""
+    return get_provider(provider).talk(request, **kwargs)
+
+
+def __getattr__(name: str) -> Any:
+    if name in _LAZY_ATTRIBUTES:
+        provider, attr_name = _LAZY_ATTRIBUTES[name]
+        return getattr(get_provider(provider), attr_name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
-    "select_action_with_open_router",
-    "select_action_with_gemini",
-    "select_action_with_openai",
-    "select_action_with_g4f",
-    "talk_to_open_router",
-    "talk_to_gemini",
-    "talk_to_openai",
-    "talk_to_g4f",
+    "PROVIDERS",
+    "get_provider",
+    "select_action",
+    "talk",
+    *_LAZY_ATTRIBUTES,
 ]
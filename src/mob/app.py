@@ -1,20 +1,32 @@
 from __future__ import annotations
 
-from contextlib import asynccontextmanager
-import logging.config
 import argparse
+import asyncio
+import logging.config
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-import discord
 
-from mob.endpoints.rest.order_endpoint import router as order_router
+from mob.app_utils import (
+    close_arsys_clients,
+    close_browser_session_pool,
+    close_docker_client,
+    close_public_ip_service,
+    close_rcon_pools,
+    get_settings,
+    prewarm_functions,
+    shutdown_job_manager,
+    stop_container_state_registry,
+)
 from mob.endpoints.rest.base_endpoint import router as base_router
-from mob.endpoints.discord.order_event import OrderDiscordClient
-from mob.logger.logging_config import build_logging_config
+from mob.endpoints.rest.files_endpoint import router as files_router
+from mob.endpoints.rest.order_endpoint import router as order_router
+from mob.endpoints.scheduler.scheduler import GeneralScheduler
 from mob.logger.logger import get_logger
+from mob.logger.logging_config import build_logging_config
 from mob.models import ConfigRepository
-from mob.app_utils import get_settings
-from mob.endpoints.scheduler.scheduler import GeneralScheduler
+from mob.runtime.executors import ExecutorRegistry
+from mob.runtime.process_pool import shutdown_process_pool
 
 logging.config.dictConfig(build_logging_config(get_settings().log_level))
 logger = get_logger("app")
@@ -32,8 +44,22 @@ def _get_config_repo() -> ConfigRepository:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if get_settings().prewarm_functions:
+        try:
+            await asyncio.to_thread(prewarm_functions)
+        except (FileNotFoundError, ValueError):
+            logger.exception("Configuration error while prewarming functions.")
     logger.info("MOB API ready (log level: %s)", get_settings().log_level)
     yield
+    stop_container_state_registry()
+    await close_docker_client()
+    await close_rcon_pools()
+    await close_arsys_clients()
+    await close_public_ip_service()
+    await asyncio.to_thread(close_browser_session_pool)
+    shutdown_job_manager()
+    ExecutorRegistry.shutdown()
+    shutdown_process_pool()
 
 
 # Init FastAPI app
@@ -46,11 +72,20 @@ app = FastAPI(
 # Include routers for FastAPI app
 app.include_router(base_router, prefix="")
 app.include_router(order_router, prefix="/order")
+app.include_router(files_router, prefix="/files")
+
+
+def build_discord_client():
+    """
+    Builds the Discord client. The discord stack is imported here so the REST API never loads it.
+    """
+    import discord
+
+    from mob.endpoints.discord.order_event import OrderDiscordClient
 
-# Init Discord client
-intents = discord.Intents.default()
-intents.message_content = True
-app_discord = OrderDiscordClient(intents=intents)
+    intents = discord.Intents.default()
+    intents.message_content = True
+    return OrderDiscordClient(intents=intents)
 
 
 def main_scheduler():
@@ -81,6 +116,7 @@ def main_discord(with_scheduler: bool = False):
     logger.info("Starting MOB as Discord Bot")
     if with_scheduler:
         main_scheduler()
+    app_discord = build_discord_client()
     app_discord.run(get_settings().discord_bot_token)
 
 
@@ -1,15 +1,60 @@
 import asyncio
-import inspect
-import json
 import os
-from functools import lru_cache, partial
+import sys
+import threading
+import time
+from contextlib import aclosing, nullcontext
+from dataclasses import replace
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 
-from mob.models import ConfigRepository, FunctionRegistry
+from mob.logger.logger import get_logger
+from mob.models import (
+    ActionPlan,
+    CompiledCallable,
+    ConfigRepository,
+    ConfigSnapshot,
+    ExecutionResult,
+    FunctionRegistry,
+    PrewarmReport,
+)
+from mob.runtime.admission import AdmissionController
+from mob.runtime.browser_sessions import BrowserSessionPool
+from mob.runtime.cancellation import CancellationToken
+from mob.runtime.coalescing import RequestCoalescer, coalescing_key
+from mob.runtime.container_state import ContainerStateRegistry
+from mob.runtime.executors import DEFAULT_EXECUTOR, ExecutorPool, ExecutorRegistry, parse_pool_sizes
+from mob.runtime.file_store import DEFAULT_RESULT_FILES_PATH, ResultFileStore
+from mob.runtime.idempotency import IdempotencyStore
+from mob.runtime.jobs import JobManager, JobStore
+from mob.runtime.process_pool import PROCESS_EXECUTOR, ProcessPool, get_process_pool, shutdown_process_pool
+from mob.runtime.public_ip import PublicIpService
+from mob.runtime.result_cache import ResultCacheRegistry, cache_key
+from mob.runtime.streaming import StreamCollector, collect_stream
 from mob.settings import Settings
+from mob.utils.aio import LoopLocal
+from mob.utils.docker import DockerClient
+from mob.utils.rcon import RconPool, RconPools
+
+logger = get_logger("app_utils")
+
+# Function module with per-loop HTTP clients to close on shutdown
+ARSYS_DNS_MODULE = "mob.functions.network.sam_gal.autopdate_arsys_domain_public_ip"
 
 _config_repo: ConfigRepository | None = None
+_prewarm_report: PrewarmReport | None = None
+_job_manager: JobManager | None = None
+_singletons_lock = threading.Lock()
+_result_file_store: ResultFileStore | None = None
+_idempotency_store: IdempotencyStore | None = None
+_container_states: ContainerStateRegistry | None = None
+_public_ip_service: PublicIpService | None = None
+_browser_sessions: BrowserSessionPool | None = None
+_docker_clients: LoopLocal[DockerClient] = LoopLocal(lambda: DockerClient(get_settings().docker_socket_path))
+_rcon_pools: LoopLocal[RconPools] = LoopLocal(
+    lambda: RconPools(size=get_settings().rcon_pool_size, timeout=get_settings().rcon_timeout)
+)
 
 
 @lru_cache(maxsize=1)
@@ -17,7 +62,11 @@ def _get_config_repo() -> ConfigRepository:
     global _config_repo
     settings = get_settings()
     if _config_repo is None or _config_repo.source_path != settings.api_config_path:
+        if _config_repo is not None:
+            _config_repo.stop_watching()
         _config_repo = ConfigRepository(settings.api_config_path)
+        if settings.config_watch_mode != "off":
+            _config_repo.start_watching(mode=settings.config_watch_mode, poll_interval=settings.config_poll_interval)
     return _config_repo
 
 
@@ -25,26 +74,13 @@ def get_config_repo() -> ConfigRepository:
     return _get_config_repo()
 
 
-def get_total_config_file() -> str:
-    """ """
-    config_repo = get_config_repo()
-    if not config_repo.source_path or not config_repo.source_path.exists():
-        raise FileNotFoundError("Configuration file not found.")
-    # Read the json file
-    with open(config_repo.source_path, "r", encoding="utf-8") as f:
-        json_data = json.load(f)
-
-    # Remove 'sensitive' fields: those starting with '__'
-    def remove_sensitive_fields(obj: Any) -> Any:
-        if isinstance(obj, dict):
-            return {key: remove_sensitive_fields(value) for key, value in obj.items() if not key.startswith("_")}
-        elif isinstance(obj, list):
-            return [remove_sensitive_fields(item) for item in obj]
-        else:
-            return obj
-
-    cleaned_data = remove_sensitive_fields(json_data)
-    return json.dumps(cleaned_data, indent=2)
+def get_total_config_file(compact: bool = False) -> str:
+    """
+    Returns api_config.json without its sensitive ('_' prefixed) fields, rendered as JSON. The rendering is cached in
+    the configuration snapshot, so it is only recomputed when the file changes.
+    """
+    snapshot = get_config_repo().get_snapshot()
+    return snapshot.sanitized_json_compact if compact else snapshot.sanitized_json
 
 
 @lru_cache(maxsize=1)
@@ -59,6 +95,34 @@ def _get_settings() -> Settings:
     api_config_path = Path(os.getenv("API_CONFIG_PATH", "")) or None
     default_timeout = float(os.getenv("DEFAULT_TIMEOUT", None))
     log_level = os.getenv("LOG_LEVEL", None)
+    config_watch_mode = os.getenv("CONFIG_WATCH_MODE", "off").lower()
+    config_poll_interval = float(os.getenv("CONFIG_POLL_INTERVAL", 1.0))
+    prewarm_functions = os.getenv("PREWARM_FUNCTIONS", "false").lower() == "true"
+    prewarm_workers = int(os.getenv("PREWARM_WORKERS", 1))
+    executor_pools = parse_pool_sizes(os.getenv("EXECUTOR_POOLS", None))
+    process_pool_size = int(os.getenv("PROCESS_POOL_SIZE", 2))
+    process_pool_max_tasks = int(os.getenv("PROCESS_POOL_MAX_TASKS", 50))
+    batch_max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", 8))
+    job_workers = int(os.getenv("JOB_WORKERS", 4))
+    job_queue_size = int(os.getenv("JOB_QUEUE_SIZE", 100))
+    job_retention = float(os.getenv("JOB_RETENTION", 3600.0))
+    job_max_stored = int(os.getenv("JOB_MAX_STORED", 1000))
+    job_store_path = Path(os.getenv("JOB_STORE_PATH", "")) if os.getenv("JOB_STORE_PATH") else None
+    result_files_path = Path(os.getenv("RESULT_FILES_PATH", "")) if os.getenv("RESULT_FILES_PATH") else None
+    result_files_ttl = float(os.getenv("RESULT_FILES_TTL", 3600.0))
+    result_files_inline_max_bytes = int(os.getenv("RESULT_FILES_INLINE_MAX_BYTES", 256 * 1024))
+    idempotency_ttl = float(os.getenv("IDEMPOTENCY_TTL", 3600.0))
+    idempotency_max_keys = int(os.getenv("IDEMPOTENCY_MAX_KEYS", 1000))
+    docker_socket_path = os.getenv("DOCKER_SOCKET_PATH", "/var/run/docker.sock")
+    container_state_ttl = float(os.getenv("CONTAINER_STATE_TTL", 30.0))
+    container_events = os.getenv("CONTAINER_EVENTS", "true").lower() == "true"
+    rcon_pool_size = int(os.getenv("RCON_POOL_SIZE", 2))
+    rcon_timeout = float(os.getenv("RCON_TIMEOUT", 10.0))
+    public_ip_providers = [url.strip() for url in os.getenv("PUBLIC_IP_PROVIDERS", "").split(",") if url.strip()]
+    public_ip_ttl = float(os.getenv("PUBLIC_IP_TTL", 60.0))
+    public_ip_timeout = float(os.getenv("PUBLIC_IP_TIMEOUT", 3.0))
+    browser_session_max = int(os.getenv("BROWSER_SESSION_MAX", 2))
+    browser_session_idle_ttl = float(os.getenv("BROWSER_SESSION_IDLE_TTL", 600.0))
     discord_bot_token = os.getenv("DISCORD_BOT_TOKEN", None)
     gemini_api_key = os.getenv("GEMINI_API_KEY", None)
     openai_api_key = os.getenv("OPENAI_API_KEY", None)
@@ -70,6 +134,34 @@ def _get_settings() -> Settings:
         api_config_path=api_config_path,
         default_timeout=default_timeout,
         log_level=log_level,
+        config_watch_mode=config_watch_mode,
+        config_poll_interval=config_poll_interval,
+        prewarm_functions=prewarm_functions,
+        prewarm_workers=prewarm_workers,
+        executor_pools=executor_pools,
+        process_pool_size=process_pool_size,
+        process_pool_max_tasks=process_pool_max_tasks,
+        batch_max_concurrency=batch_max_concurrency,
+        job_workers=job_workers,
+        job_queue_size=job_queue_size,
+        job_retention=job_retention,
+        job_max_stored=job_max_stored,
+        job_store_path=job_store_path,
+        result_files_path=result_files_path,
+        result_files_ttl=result_files_ttl,
+        result_files_inline_max_bytes=result_files_inline_max_bytes,
+        idempotency_ttl=idempotency_ttl,
+        idempotency_max_keys=idempotency_max_keys,
+        docker_socket_path=docker_socket_path,
+        container_state_ttl=container_state_ttl,
+        container_events=container_events,
+        rcon_pool_size=rcon_pool_size,
+        rcon_timeout=rcon_timeout,
+        public_ip_providers=public_ip_providers,
+        public_ip_ttl=public_ip_ttl,
+        public_ip_timeout=public_ip_timeout,
+        browser_session_max=browser_session_max,
+        browser_session_idle_ttl=browser_session_idle_ttl,
         discord_bot_token=discord_bot_token,
         gemini_api_key=gemini_api_key,
         openai_api_key=openai_api_key,
@@ -83,35 +175,468 @@ def get_settings() -> Settings:
     return _get_settings()
 
 
-def _build_function_kwargs(func: Callable[..., Any], payload: dict[str, Any]) -> dict[str, Any]:
-    """Map the allowed keyword arguments for the target function."""
-    sig = inspect.signature(func)
-    kwargs: dict[str, Any] = {}
-    if "environment" in sig.parameters:
-        kwargs["environment"] = payload["environment"]
-    if "payload" in sig.parameters:
-        kwargs["payload"] = payload["payload"]
-    if not kwargs:
-        # When the function does not declare expected keywords, send them anyway.
-        kwargs = payload
-    return kwargs
+def get_action_plan(action_name: str, snapshot: ConfigSnapshot | None = None) -> ActionPlan | None:
+    """
+    Returns the compiled plan of a configured action, or None when the action is not configured. Raises
+    FileNotFoundError/ValueError on configuration errors and RuntimeError when the function cannot be resolved.
+    """
+    snapshot = snapshot or get_config_repo().get_snapshot()
+    if action_name not in snapshot.actions:
+        return None
+    return FunctionRegistry.get_plan(action_name, snapshot, default_timeout=get_settings().default_timeout)
+
+
+def prewarm_functions() -> PrewarmReport:
+    """
+    Resolves every configured action and checker ahead of the first request, logging the import time of each module
+    and reporting the entries that cannot be resolved. Blocking: run it in a worker thread from async code.
+    """
+    global _prewarm_report
+    settings = get_settings()
+    snapshot = get_config_repo().get_snapshot()
+    report = FunctionRegistry.prewarm(
+        snapshot, default_timeout=settings.default_timeout, max_workers=settings.prewarm_workers
+    )
+    if any(action.executor == PROCESS_EXECUTOR for action in snapshot.actions.values()):
+        get_action_process_pool().start()
+    for entry in report.entries:
+        if entry.ok:
+            logger.info("Prewarmed action '%s' (%s) in %.1f ms", entry.action, entry.module, entry.import_ms)
+        else:
+            logger.error("Action '%s' cannot be resolved (%s): %s", entry.action, entry.target, entry.error)
+    logger.info(
+        "Prewarm of config version %s finished in %.1f ms: %s actions, %s failures",
+        report.config_version,
+        report.duration_ms,
+        len(report.entries),
+        len(report.failures),
+    )
+    _prewarm_report = report
+    return report
+
+
+def get_prewarm_report() -> PrewarmReport | None:
+    return _prewarm_report
+
+
+def get_executor_pool(name: str = DEFAULT_EXECUTOR) -> ExecutorPool:
+    """Returns the thread pool of an executor class (io, cpu, browser, llm, ...), sized from the settings."""
+    return ExecutorRegistry.get(name, get_settings().executor_pools)
+
+
+def get_action_process_pool() -> ProcessPool:
+    """Returns the pool of warm worker processes used by actions configured with the 'process' executor."""
+    settings = get_settings()
+    return get_process_pool(settings.process_pool_size, settings.process_pool_max_tasks)
+
+
+def get_job_manager() -> JobManager:
+    """Returns the manager of background orders, creating it (and loading its SQLite store) on first use."""
+    global _job_manager
+    if _job_manager is None:
+        with _singletons_lock:
+            if _job_manager is None:
+                settings = get_settings()
+                store = JobStore(
+                    retention=settings.job_retention, max_jobs=settings.job_max_stored, path=settings.job_store_path
+                )
+                _job_manager = JobManager(store, workers=settings.job_workers, queue_size=settings.job_queue_size)
+    return _job_manager
+
+
+def get_job_manager_stats() -> dict[str, Any] | None:
+    return _job_manager.stats() if _job_manager is not None else None
+
+
+def shutdown_job_manager() -> None:
+    """Stops the job workers and flushes pending job store writes. Jobs still running are reloaded as failed."""
+    global _job_manager
+    with _singletons_lock:
+        manager, _job_manager = _job_manager, None
+    if manager is not None:
+        manager.stop()
+        manager.store.close()
 
 
-async def execute_callable(func: Callable[..., Any], *, environment: dict[str, Any], payload: dict[str, Any]) -> Any:
-    """Executes the resolved callable honoring sync + async implementations."""
-    invocation_payload = {"environment": environment, "payload": payload}
-    kwargs = _build_function_kwargs(func, invocation_payload)
+def get_result_file_store() -> ResultFileStore:
+    """Returns the content-addressed store where the files produced by actions are kept for download."""
+    global _result_file_store
+    if _result_file_store is None:
+        with _singletons_lock:
+            if _result_file_store is None:
+                settings = get_settings()
+                _result_file_store = ResultFileStore(
+                    settings.result_files_path or DEFAULT_RESULT_FILES_PATH, ttl=settings.result_files_ttl
+                )
+    return _result_file_store
 
-    if inspect.iscoroutinefunction(func):
-        return await func(**kwargs)
 
+def get_result_file_store_stats() -> dict[str, Any] | None:
+    return _result_file_store.stats() if _result_file_store is not None else None
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """
+    Returns the store of orders sent with an Idempotency-Key, sized from the settings. Replayed responses point to jobs
+    and result files, so they are never remembered longer than those are kept.
+    """
+    global _idempotency_store
+    if _idempotency_store is None:
+        with _singletons_lock:
+            if _idempotency_store is None:
+                settings = get_settings()
+                ttl = min(settings.idempotency_ttl, settings.job_retention, settings.result_files_ttl)
+                if ttl < settings.idempotency_ttl:
+                    logger.info(
+                        "IDEMPOTENCY_TTL lowered from %s to %s seconds (job/result file retention)",
+                        settings.idempotency_ttl,
+                        ttl,
+                    )
+                _idempotency_store = IdempotencyStore(ttl=ttl, max_keys=settings.idempotency_max_keys)
+    return _idempotency_store
+
+
+def get_idempotency_stats() -> dict[str, Any] | None:
+    return _idempotency_store.stats() if _idempotency_store is not None else None
+
+
+def get_docker_client() -> DockerClient:
+    """Returns the Docker Engine API client of the running event loop (its connections are bound to the loop)."""
+    return _docker_clients.get()
+
+
+def get_container_state_registry() -> ContainerStateRegistry:
+    """Returns the process-wide view of running containers, kept current by the Docker events stream."""
+    global _container_states
+    if _container_states is None:
+        with _singletons_lock:
+            if _container_states is None:
+                settings = get_settings()
+                _container_states = ContainerStateRegistry(
+                    get_docker_client, ttl=settings.container_state_ttl, watch_events=settings.container_events
+                )
+    return _container_states
+
+
+def get_container_state_stats() -> dict[str, Any] | None:
+    return _container_states.stats() if _container_states is not None else None
+
+
+def stop_container_state_registry() -> None:
+    """Stops the Docker events watcher of the container state registry."""
+    global _container_states
+    with _singletons_lock:
+        registry, _container_states = _container_states, None
+    if registry is not None:
+        registry.stop()
+
+
+async def close_docker_client() -> None:
+    """Closes the pooled connections of the Docker client of the running event loop, if it was used."""
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, partial(func, **kwargs))
+    client = _docker_clients.pop(loop)
+    if client is not None:
+        await client.aclose()
+
+
+async def close_arsys_clients() -> None:
+    """
+    Closes the Arsys SOAP client of the running event loop. The DNS updater is only consulted if it was imported, so
+    shutting down never loads it.
+    """
+    module = sys.modules.get(ARSYS_DNS_MODULE)
+    if module is not None:
+        await module.close_http_client()
+
+
+def get_public_ip_service() -> PublicIpService:
+    """Returns the process-wide public IP resolver (TTL cache over racing providers)."""
+    global _public_ip_service
+    if _public_ip_service is None:
+        with _singletons_lock:
+            if _public_ip_service is None:
+                settings = get_settings()
+                _public_ip_service = PublicIpService(
+                    settings.public_ip_providers, ttl=settings.public_ip_ttl, timeout=settings.public_ip_timeout
+                )
+    return _public_ip_service
+
+
+def get_public_ip_stats() -> dict[str, Any] | None:
+    return _public_ip_service.stats() if _public_ip_service is not None else None
+
+
+async def close_public_ip_service() -> None:
+    """Closes the HTTP client the public IP service opened for the running event loop."""
+    if _public_ip_service is not None:
+        await _public_ip_service.aclose()
+
+
+def get_browser_session_pool() -> BrowserSessionPool:
+    """Returns the process-wide pool of warm (logged-in) browser sessions of browser-driven functions."""
+    global _browser_sessions
+    if _browser_sessions is None:
+        with _singletons_lock:
+            if _browser_sessions is None:
+                settings = get_settings()
+                _browser_sessions = BrowserSessionPool(
+                    max_sessions=settings.browser_session_max, idle_ttl=settings.browser_session_idle_ttl
+                )
+    return _browser_sessions
+
+
+def get_browser_session_stats() -> dict[str, Any] | None:
+    return _browser_sessions.stats() if _browser_sessions is not None else None
+
+
+def close_browser_session_pool() -> None:
+    """Closes the idle browser sessions (and the leased ones once released)."""
+    global _browser_sessions
+    with _singletons_lock:
+        pool, _browser_sessions = _browser_sessions, None
+    if pool is not None:
+        pool.close()
+
+
+def get_rcon_pool(host: str, port: int, password: str) -> RconPool:
+    """Returns the RCON connection pool of a Minecraft server for the running event loop."""
+    return _rcon_pools.get().get(host, port, password)
+
+
+def get_rcon_stats() -> dict[str, dict[str, Any]]:
+    """RCON pool counters per server, added up over the event loops that used them."""
+    merged: dict[str, dict[str, Any]] = {}
+    for pools in _rcon_pools.values():
+        for server, stats in pools.stats().items():
+            totals = merged.setdefault(server, {})
+            for name, value in stats.items():
+                totals[name] = totals.get(name, 0) + value
+    return merged
+
+
+async def close_rcon_pools() -> None:
+    """Closes the RCON connections opened from the running event loop."""
+    pools = _rcon_pools.pop(asyncio.get_running_loop())
+    if pools is not None:
+        await pools.aclose()
+
+
+async def run_in_executor_pool(name: str, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+    """Runs a blocking callable in the thread pool of the given executor class."""
+    return await get_executor_pool(name).run(func, *args, **kwargs)
+
+
+async def execute_callable(
+    func: Callable[..., Any] | CompiledCallable,
+    *,
+    environment: dict[str, Any],
+    payload: dict[str, Any],
+    executor: str = DEFAULT_EXECUTOR,
+    cancellation: CancellationToken | None = None,
+) -> Any:
+    """
+    Executes the resolved callable honoring sync + async implementations.
+
+    Functions declaring a `cancellation` keyword receive a CancellationToken that is cancelled together with this
+    call, so work running outside the event loop (threads, browsers) can stop instead of leaking.
+    """
+    compiled = func if isinstance(func, CompiledCallable) else CompiledCallable.from_callable(func)
+
+    if executor == PROCESS_EXECUTOR:
+        # CPU-bound work: runs (sync or async) in a worker process that is killed if the call is cancelled
+        return await get_action_process_pool().run(compiled.target, environment, payload)
+
+    cancellation = cancellation or CancellationToken()
+    kwargs = compiled.build_kwargs(environment, payload, cancellation)
+    try:
+        if compiled.is_stream:
+            # Callers that are not streaming only get the final result of the stream
+            return await collect_stream(compiled.func(**kwargs))
+        if compiled.is_async:
+            return await compiled.func(**kwargs)
+        return await get_executor_pool(executor).run(compiled.func, **kwargs)
+    except asyncio.CancelledError:
+        cancellation.cancel(f"{compiled.target} was cancelled")
+        raise
+
+
+async def execute_plan(
+    plan: ActionPlan, *, payload: dict[str, Any], environment: dict[str, Any] | None = None
+) -> ExecutionResult:
+    """
+    Shared execution path of REST, Discord and the scheduler: serves the result from the action cache when possible,
+    joins an identical in-flight execution when the action opts into coalescing, applies the admission control of the
+    action and runs its function within the plan timeout (which also covers the wait for a slot).
+
+    Raises ActionOverloadedError when the action is at capacity (or waited longer than its timeout for a slot) and
+    asyncio.TimeoutError when the execution itself times out.
+    """
+    environment = plan.config.environment if environment is None else environment
+    policy = plan.config.cache
+    key = _cache_key(plan, payload)
+    if key is None:
+        return await _execute_coalesced(plan, payload=payload, environment=environment)
+
+    cache = ResultCacheRegistry.get(plan.name, policy)
+    hit = cache.get(key)
+    if hit is not None:
+        value, age_ms = hit
+        return ExecutionResult(value=value, queue_ms=0.0, execution_ms=0.0, cached=True, cache_age_ms=round(age_ms, 3))
+    execution = await _execute_coalesced(plan, payload=payload, environment=environment)
+    if not execution.coalesced:
+        cache.put(key, execution.value)
+    return execution
+
+
+async def execute_plan_stream(
+    plan: ActionPlan, *, payload: dict[str, Any], environment: dict[str, Any] | None = None
+) -> AsyncIterator[dict[str, Any] | ExecutionResult]:
+    """
+    Streaming counterpart of execute_plan: yields the progress/partial events of streaming functions (async
+    generators) as they are produced and finishes with the ExecutionResult of the order.
+
+    The admission slot is held for the whole stream and the plan timeout bounds the whole stream. Cache hits,
+    coalescing actions, the process executor and non-streaming functions yield the ExecutionResult only. Errors are
+    raised as in execute_plan.
+    """
+    environment = plan.config.environment if environment is None else environment
+    compiled = plan.function
+    if not compiled.is_stream or plan.config.coalesce or plan.config.executor == PROCESS_EXECUTOR:
+        yield await execute_plan(plan, payload=payload, environment=environment)
+        return
+
+    policy = plan.config.cache
+    key = _cache_key(plan, payload)
+    cache = ResultCacheRegistry.get(plan.name, policy) if key is not None else None
+    hit = cache.get(key) if cache is not None else None
+    if hit is not None:
+        value, age_ms = hit
+        yield ExecutionResult(value=value, queue_ms=0.0, execution_ms=0.0, cached=True, cache_age_ms=round(age_ms, 3))
+        return
+
+    # A single deadline bounds the wait for a slot and the stream
+    deadline = time.perf_counter() + plan.timeout
+    admission = nullcontext(0.0)
+    if plan.config.max_concurrency:
+        limiter = AdmissionController.get_limiter(plan.name, plan.config.max_concurrency, plan.config.max_queue)
+        admission = limiter.admit(max_wait=plan.timeout)
+
+    async with admission as queue_ms:
+        started = time.perf_counter()
+        cancellation = CancellationToken()
+        events = compiled.func(**compiled.build_kwargs(environment, payload, cancellation))
+        collector = StreamCollector()
+        try:
+            async with aclosing(events):
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise asyncio.TimeoutError()
+                    try:
+                        event = await asyncio.wait_for(anext(events), timeout=remaining)
+                    except StopAsyncIteration:
+                        break
+                    if collector.add(event):
+                        break
+                    yield event
+        except BaseException:
+            # Timeout, failure or the consumer went away (client disconnected)
+            cancellation.cancel(f"stream of {compiled.target} was interrupted")
+            raise
+        execution_ms = _elapsed_ms(started)
+
+    value = collector.value()
+    if cache is not None:
+        cache.put(key, value)
+    yield ExecutionResult(value=value, queue_ms=round(queue_ms, 3), execution_ms=execution_ms)
+
+
+def invalidate_cached_results(plan: ActionPlan, payload: dict[str, Any] | None = None) -> int:
+    """Drops the cached result of `payload`, or every cached result of the action. Returns how many were dropped."""
+    if plan.config.cache is None:
+        return 0
+    if payload is None:
+        return ResultCacheRegistry.invalidate(plan.name)
+    key = _cache_key(plan, payload)
+    return ResultCacheRegistry.invalidate(plan.name, key) if key is not None else 0
+
+
+def _cache_key(plan: ActionPlan, payload: dict[str, Any]) -> str | None:
+    """Key of the cached result of `payload`, or None when the action has no cache or the payload cannot be keyed."""
+    if plan.config.cache is None:
+        return None
+    return cache_key(plan.config.cache, payload, plan.config.environment, ignored_fields=plan.config.context_fields)
+
+
+async def _execute_coalesced(
+    plan: ActionPlan, *, payload: dict[str, Any], environment: dict[str, Any]
+) -> ExecutionResult:
+    if plan.config.coalesce:
+        key = coalescing_key(payload, plan.config.environment, ignored_fields=plan.config.context_fields)
+        if key is not None:
+            execution, coalesced = await RequestCoalescer.run(
+                plan.name, key, lambda: _execute_admitted(plan, payload=payload, environment=environment)
+            )
+            return replace(execution, coalesced=True) if coalesced else execution
+    return await _execute_admitted(plan, payload=payload, environment=environment)
+
+
+async def execute_checker(plan: ActionPlan, *, timeout: float) -> Any:
+    """Runs the checker of a periodic action (the scheduler runs one check of an action at a time)."""
+    return await asyncio.wait_for(
+        execute_callable(plan.checker, environment=plan.config.environment, payload={}, executor=plan.config.executor),
+        timeout=timeout,
+    )
+
+
+async def _execute_admitted(
+    plan: ActionPlan, *, payload: dict[str, Any], environment: dict[str, Any]
+) -> ExecutionResult:
+    execution = execute_callable(plan.function, environment=environment, payload=payload, executor=plan.config.executor)
+
+    if not plan.config.max_concurrency:
+        started = time.perf_counter()
+        value = await asyncio.wait_for(execution, timeout=plan.timeout)
+        return ExecutionResult(value=value, queue_ms=0.0, execution_ms=_elapsed_ms(started))
+
+    limiter = AdmissionController.get_limiter(plan.name, plan.config.max_concurrency, plan.config.max_queue)
+    # A single deadline bounds the wait for a slot and the execution: queued time is not granted twice
+    deadline = time.perf_counter() + plan.timeout
+    try:
+        async with limiter.admit(max_wait=plan.timeout) as queue_ms:
+            started = time.perf_counter()
+            value = await asyncio.wait_for(execution, timeout=deadline - started)
+    except BaseException:
+        # Never leave the coroutine un-awaited when admission fails
+        execution.close()
+        raise
+    return ExecutionResult(value=value, queue_ms=round(queue_ms, 3), execution_ms=_elapsed_ms(started))
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
 
 
 def reset_runtime_state() -> None:
     """Helper for tests: clears cached settings, config repo, and imports."""
-    global _config_repo
+    global _config_repo, _prewarm_report, _result_file_store, _idempotency_store, _public_ip_service
     _get_settings.cache_clear()
+    _get_config_repo.cache_clear()
+    if _config_repo is not None:
+        _config_repo.stop_watching()
     _config_repo = None
+    _prewarm_report = None
+    _result_file_store = None
+    _idempotency_store = None
+    _public_ip_service = None
+    stop_container_state_registry()
+    close_browser_session_pool()
+    _docker_clients.clear()
+    _rcon_pools.clear()
     FunctionRegistry.clear()
+    ExecutorRegistry.shutdown()
+    shutdown_process_pool()
+    AdmissionController.clear()
+    RequestCoalescer.clear()
+    ResultCacheRegistry.clear()
+    shutdown_job_manager()
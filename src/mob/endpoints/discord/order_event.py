@@ -1,51 +1,115 @@
-from pathlib import Path
-from typing import Any
-import importlib
 import asyncio
-import discord
 import time
+from typing import Any
+
+import discord
 
-from mob.ai import select_action_with_open_router
+from mob import ai
 from mob.app_utils import (
-    execute_callable,
+    execute_plan_stream,
+    get_action_plan,
     get_config_repo,
+    get_result_file_store,
     get_settings,
     get_total_config_file,
+    prewarm_functions,
+    run_in_executor_pool,
 )
-from mob.utils.time import get_current_date, get_current_time
 from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
-from mob.models import FunctionRegistry, OrderResponse
+from mob.logger.logger import get_logger
+from mob.models import ExecutionResult, OrderResponse
 from mob.models.ai import ActionSelectionRequest
 from mob.prompts import AI_SYSTEM_PROMPT_SELECT_ACTION
-from mob.logger.logger import get_logger
+from mob.runtime.admission import ActionOverloadedError
+from mob.utils.time import get_current_date, get_current_time
 
 logger = get_logger("endpoints.discord.order_event")
 
 MESSAGE_METADATA_TAG_IN_CONVERSATION = "$$$"
 
+# Minimum seconds between edits of the status message of a streaming action (Discord rate-limits message edits)
+STATUS_MESSAGE_EDIT_INTERVAL = 1.0
+# Progress lines kept in the status message
+STATUS_MESSAGE_MAX_LINES = 10
+
 
 def _prepare_discord_files(files: list[str]) -> tuple[list[discord.File], list[Any]]:
+    """
+    Stores the result files like the REST endpoint does (a REST caller sharing the result may have already moved the
+    raw paths into the store) and opens the stored copies. Blocks on disk: runs in the io pool.
+    """
     attachments: list[discord.File] = []
     handles: list[Any] = []
 
+    store = get_result_file_store()
     for file_path in files:
-        path = Path(file_path)
         try:
-            handle = path.open("rb")
+            stored = store.put(file_path)
+            handle = stored.path.open("rb")
         except OSError:
-            logger.warning("Could not open result file at %s", path)
+            logger.warning("Could not store result file at %s", file_path, exc_info=True)
             continue
 
         handles.append(handle)
-        attachments.append(discord.File(handle, filename=path.name))
+        attachments.append(discord.File(handle, filename=stored.filename))
 
     return attachments, handles
 
 
+class _StatusMessage:
+    """Single Discord message edited with the progress of a streaming action instead of sending one per event."""
+
+    def __init__(self, channel: Any):
+        self.channel = channel
+        self.message: discord.Message | None = None
+        self._lines: list[str] = []
+        self._last_edit = 0.0
+        self._dirty = False
+
+    async def add(self, event: dict[str, Any]) -> None:
+        text = event.get("message")
+        if not text:
+            return
+        self._lines = [*self._lines, str(text)][-STATUS_MESSAGE_MAX_LINES:]
+        self._dirty = True
+        if time.perf_counter() - self._last_edit >= STATUS_MESSAGE_EDIT_INTERVAL:
+            await self._publish("\n".join(self._lines))
+
+    async def finish(self, content: str | None) -> bool:
+        """Replaces the progress with the final message. Returns False when there is no status message to edit."""
+        if self.message is None:
+            return False
+        if content is not None:
+            await self._publish(content)
+        elif self._dirty:
+            await self._publish("\n".join(self._lines))
+        return True
+
+    async def _publish(self, content: str) -> None:
+        try:
+            if self.message is None:
+                self.message = await self.channel.send(content)
+            else:
+                await self.message.edit(content=content)
+        except discord.HTTPException:
+            logger.warning("Could not update the status message of a streaming action.", exc_info=True)
+        self._last_edit = time.perf_counter()
+        self._dirty = False
+
+
 class OrderDiscordClient(discord.Client):
 
+    _prewarmed = False
+
     async def on_ready(self):
         print(f"We have logged in as {self.user}")
+        # on_ready fires again after every reconnection: prewarm only once
+        if get_settings().prewarm_functions and not self._prewarmed:
+            self._prewarmed = True
+            try:
+                await asyncio.to_thread(prewarm_functions)
+            except (FileNotFoundError, ValueError):
+                logger.exception("Configuration error while prewarming functions.")
 
     async def on_message(self, message):
 
@@ -62,8 +126,8 @@ class OrderDiscordClient(discord.Client):
     @staticmethod
     async def execute_order(self, message: discord.Message) -> OrderResponse | None:
         try:
-            # Get action configurations from the repository
-            actions = get_config_repo().get_actions()
+            # Get the current configuration snapshot from the repository
+            snapshot = get_config_repo().get_snapshot()
         except (FileNotFoundError, ValueError):
             logger.exception("Configuration error while loading api_config.json.")
             await message.channel.send("Hay un error en la configuración que me dió Sam. Me hablas cuando lo arregle.")
@@ -73,7 +137,7 @@ class OrderDiscordClient(discord.Client):
         system_prompt = AI_SYSTEM_PROMPT_SELECT_ACTION.format(
             current_date=get_current_date(),
             current_time=get_current_time(),
-            actions_config_json=get_total_config_file()
+            actions_config_json=get_total_config_file(),
         )
 
         try:
@@ -91,7 +155,7 @@ class OrderDiscordClient(discord.Client):
             await message.channel.send("Estoy durmiendo ya... Háblame mañana o molesta a un humano si es urgente.")
             return None
 
-        action_config = actions.get(action)
+        action_config = snapshot.actions.get(action)
         if not action_config:
             await message.channel.send(
                 "No tengo ni idea de lo que me estás pidiendo. Si estás seguro de que puedo hacerlo,"
@@ -99,16 +163,13 @@ class OrderDiscordClient(discord.Client):
             )
             return None
 
-        # Fill the environment with extras from AI selection
-        for key, value in extras.items():
-            action_config.environment[key] = value
+        # Fill the environment with extras from AI selection (on a copy: the configuration snapshot is shared)
+        environment = {**action_config.environment, **extras}
 
         # Si es un canal "matthew", usamos todos los mensajes del canal como contexto para la conversación
         # Si es solo un mensaje con prefijo '!', será un mensaje-respuesta individual
-        if message.channel.name == "matthew" and action_config.environment.get("enable_conversation_context"):
-            async for channel_message in message.channel.history(
-                limit=action_config.environment.get("maximum_message_history", 5)
-            ):
+        if message.channel.name == "matthew" and environment.get("enable_conversation_context"):
+            async for channel_message in message.channel.history(limit=environment.get("maximum_message_history", 5)):
                 # Añade fecha, hora y autor al mensaje formateado
                 formatted_message = (
                     f"{MESSAGE_METADATA_TAG_IN_CONVERSATION}"
@@ -125,9 +186,7 @@ class OrderDiscordClient(discord.Client):
             conversation.reverse()
 
         try:
-            handler = FunctionRegistry.resolve(action_config.function)
-            handler_module = importlib.import_module(handler.__module__)
-            handler_message_mode = getattr(handler_module, "DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE", None)
+            plan = get_action_plan(action, snapshot)
         except RuntimeError:
             logger.exception("Failed to resolve function for action %s", action)
             await message.channel.send(
@@ -136,17 +195,23 @@ class OrderDiscordClient(discord.Client):
             return None
 
         # Si la acción devuelve como mensaje un command output, enviamos el mensaje introductorio
-        if handler_message_mode == FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION:
+        if plan.message_mode == FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION:
             await message.channel.send(extras.get("message"))
 
-        timeout = action_config.resolved_timeout(get_settings().default_timeout)
         started = time.perf_counter()
+        # Streaming actions report their progress by editing a single status message
+        status_message = _StatusMessage(message.channel)
 
         try:
-            result = await asyncio.wait_for(
-                execute_callable(handler, environment=action_config.environment, payload=payload),
-                timeout=timeout,
-            )
+            execution: ExecutionResult | None = None
+            async for item in execute_plan_stream(plan, environment=environment, payload=payload):
+                if isinstance(item, ExecutionResult):
+                    execution = item
+                else:
+                    await status_message.add(item)
+        except ActionOverloadedError:
+            await message.channel.send(f"Ahora mismo estoy a tope con '{action}'. Pídemelo otra vez en un momento.")
+            return None
         except asyncio.TimeoutError:
             await message.channel.send(
                 f"La acción '{action}' ha tardado demasiado y la he cancelado."
@@ -168,8 +233,9 @@ class OrderDiscordClient(discord.Client):
             return None
 
         duration_ms = (time.perf_counter() - started) * 1000
-        logger.info("Action '%s' executed in %.2f ms", action, duration_ms)
+        logger.info("Action '%s' executed in %.2f ms (%.2f ms queued)", action, duration_ms, execution.queue_ms)
 
+        result = execution.value
         result_message = result.get("message")
         files_value = result.get("files")
         raw_files: list[str] = []
@@ -184,12 +250,14 @@ class OrderDiscordClient(discord.Client):
         attachments: list[discord.File] = []
         file_handles: list[Any] = []
         if raw_files:
-            attachments, file_handles = _prepare_discord_files(raw_files)
+            attachments, file_handles = await run_in_executor_pool("io", _prepare_discord_files, raw_files)
 
         send_kwargs = {}
-        if result_message is not None:
+        edited = await status_message.finish(result_message)
+        if result_message is not None and not edited:
             send_kwargs["content"] = result_message
         if attachments:
+            # Files cannot be added by editing the status message: they go in a new message
             send_kwargs["files"] = attachments
 
         if send_kwargs:
@@ -228,6 +296,6 @@ class OrderDiscordClient(discord.Client):
             message=message_content,
             system_prompt=system_prompt,
         )
-        loop = asyncio.get_running_loop()
-        result = await loop.run_in_executor(None, select_action_with_open_router, request)
+        # LLM calls get their own pool so a burst of slow selections cannot starve the sync actions
+        result = await run_in_executor_pool("llm", ai.select_action, "open_router", request)
         return result.action, result.payload, result.extras
@@ -1,6 +1,24 @@
+from typing import Any
+
 from fastapi import APIRouter
 
+from mob.app_utils import (
+    get_browser_session_stats,
+    get_config_repo,
+    get_container_state_stats,
+    get_idempotency_stats,
+    get_job_manager_stats,
+    get_prewarm_report,
+    get_public_ip_stats,
+    get_rcon_stats,
+    get_result_file_store_stats,
+)
 from mob.logger.logger import get_logger
+from mob.runtime.admission import AdmissionController
+from mob.runtime.coalescing import RequestCoalescer
+from mob.runtime.executors import ExecutorRegistry
+from mob.runtime.process_pool import get_process_pool_stats
+from mob.runtime.result_cache import ResultCacheRegistry
 
 logger = get_logger("endpoints.rest.general")
 
@@ -11,3 +29,28 @@ router = APIRouter()
 async def healthz() -> dict[str, str]:
     """Simple health endpoint used by orchestration platforms."""
     return {"status": "ok"}
+
+
+@router.get("/stats", summary="Runtime statistics")
+async def stats() -> dict[str, Any]:
+    """
+    Exposes internal runtime state (configuration snapshot, startup prewarm, ...) for troubleshooting. Components that
+    were never used report None: reading the stats never creates them.
+    """
+    prewarm_report = get_prewarm_report()
+    return {
+        "config": get_config_repo().stats(),
+        "prewarm": prewarm_report.to_dict() if prewarm_report else None,
+        "executors": ExecutorRegistry.stats(),
+        "process_pool": get_process_pool_stats(),
+        "admission": AdmissionController.stats(),
+        "coalescing": RequestCoalescer.stats(),
+        "result_cache": ResultCacheRegistry.stats(),
+        "jobs": get_job_manager_stats(),
+        "result_files": get_result_file_store_stats(),
+        "idempotency": get_idempotency_stats(),
+        "containers": get_container_state_stats(),
+        "rcon": get_rcon_stats(),
+        "public_ip": get_public_ip_stats(),
+        "browser_sessions": get_browser_session_stats(),
+    }
@@ -0,0 +1,40 @@
+import time
+
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import FileResponse
+
+from mob.app_utils import get_result_file_store
+from mob.logger.logger import get_logger
+
+logger = get_logger("endpoints.rest.files_endpoint")
+
+router = APIRouter()
+
+
+@router.get(
+    "/{file_id}",
+    summary="Download a result file",
+    response_class=FileResponse,
+    responses={
+        206: {"description": "Requested byte range of the file"},
+        404: {"description": "Unknown or expired file"},
+        416: {"description": "Requested range not satisfiable"},
+    },
+)
+async def download_file(file_id: str) -> FileResponse:
+    """
+    Streams a file produced by an order from the result file store. Supports `Range` requests, so large files can
+    be resumed or fetched in parts. File ids are content addresses: the response never changes and may be cached.
+    """
+    stored = get_result_file_store().get(file_id)
+    if stored is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"File '{file_id}' does not exist or has expired.",
+        )
+    return FileResponse(
+        stored.path,
+        media_type=stored.content_type,
+        filename=stored.filename,
+        headers={"Cache-Control": f"private, max-age={max(int(stored.expires_at - time.time()), 0)}, immutable"},
+    )
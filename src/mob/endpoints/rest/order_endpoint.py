@@ -1,128 +1,434 @@
-from typing import Any, Iterable
-from pathlib import Path
-import mimetypes
 import asyncio
-import base64
+import json
 import time
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable
 
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, Header, HTTPException, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
 
-from mob.app_utils import execute_callable, get_config_repo, get_settings
+from mob.app_utils import (
+    execute_plan,
+    execute_plan_stream,
+    get_action_plan,
+    get_config_repo,
+    get_idempotency_store,
+    get_job_manager,
+    get_result_file_store,
+    get_settings,
+    invalidate_cached_results,
+    run_in_executor_pool,
+)
 from mob.logger.logger import get_logger
-from mob.models import FunctionRegistry, OrderRequest, OrderResponse
+from mob.models import (
+    ActionPlan,
+    BatchItemResponse,
+    BatchOrderRequest,
+    BatchOrderResponse,
+    CacheInvalidationRequest,
+    ExecutionResult,
+    JobAccepted,
+    JobInfo,
+    OrderError,
+    OrderRequest,
+    OrderResponse,
+    ResultFile,
+    ResultFileError,
+)
+from mob.runtime.admission import ActionOverloadedError
+from mob.runtime.idempotency import (
+    MAX_IDEMPOTENCY_KEY_LENGTH,
+    IdempotencyConflictError,
+    IdempotencyStoreFullError,
+    request_fingerprint,
+)
+from mob.runtime.jobs import JobQueueFullError
 
 logger = get_logger("endpoints.rest.order_endpoint")
 
 router = APIRouter()
 
+# Media types of the streamed responses of POST /order, selected with the Accept header
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+SSE_MEDIA_TYPE = "text/event-stream"
+
 
-def _serialize_result_files(files: Iterable[Any]) -> list[dict[str, str]]:
-    """Convert result file paths into serializable payloads."""
-    serialized_files: list[dict[str, str]] = []
+def _store_result_files(files: Iterable[Any], inline_max_bytes: int | None) -> list[dict[str, Any]]:
+    """
+    Moves the result files into the result file store and describes them by reference (download URL). Files up to
+    `inline_max_bytes` are also embedded as base64 when given. A file that cannot be stored is reported with its
+    error instead of being dropped from the response. Blocks on disk: runs in the io pool.
+    """
+    serialized_files: list[dict[str, Any]] = []
     if isinstance(files, (str, bytes)) or not isinstance(files, Iterable):
         return serialized_files
 
+    store = get_result_file_store()
     for file_path in files:
-        path = Path(file_path)
         try:
-            content = path.read_bytes()
-        except OSError:
-            logger.warning("Could not read result file at %s", path)
+            stored = store.put(file_path)
+            content = stored.read_base64() if inline_max_bytes is not None and stored.size <= inline_max_bytes else None
+        except OSError as exc:
+            logger.warning("Could not store result file at %s", file_path, exc_info=True)
+            serialized_files.append(
+                ResultFileError(filename=Path(file_path).name, error=exc.strerror or str(exc)).model_dump()
+            )
             continue
 
-        content_type, _ = mimetypes.guess_type(path.name)
         serialized_files.append(
-            {
-                "filename": path.name,
-                "content_type": content_type or "application/octet-stream",
-                "content": base64.b64encode(content).decode("utf-8"),
-            }
+            ResultFile(
+                file_id=stored.file_id,
+                filename=stored.filename,
+                content_type=stored.content_type,
+                size=stored.size,
+                url=f"/files/{stored.file_id}",
+                expires_at=stored.expires_at,
+                content=content,
+            ).model_dump(exclude_none=True)
         )
     return serialized_files
 
 
-@router.post(
-    "",
-    response_model=OrderResponse,
-    summary="Execute a configured action",
-    responses={
-        400: {"description": "Invalid payload"},
-        401: {"description": "Passkey mismatch"},
-        404: {"description": "Unknown action"},
-        504: {"description": "Action timed out"},
-    },
-)
-async def execute_order(request: OrderRequest) -> OrderResponse:
+def _resolve_plan(action: str, passkey: str | None) -> ActionPlan:
+    """Loads the plan of a configured action, checking its passkey. Raises the HTTP error of each failure."""
     try:
-        # Get action configurations from the repository
-        actions = get_config_repo().get_actions()
+        # Get the current configuration snapshot from the repository
+        snapshot = get_config_repo().get_snapshot()
     except (FileNotFoundError, ValueError) as exc:
         logger.exception("Configuration error while loading api_config.json.")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(exc),
         ) from exc
-    action_config = actions.get(request.action)
+    action_config = snapshot.actions.get(action)
     if not action_config:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Action '{request.action}' is not configured.",
+            detail=f"Action '{action}' is not configured.",
         )
 
     if action_config._passkey:
-        if request.passkey != action_config._passkey:
+        if passkey != action_config._passkey:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid passkey.",
             )
 
     try:
-        handler = FunctionRegistry.resolve(action_config.function)
+        return get_action_plan(action, snapshot)
     except RuntimeError as exc:
-        logger.exception("Failed to resolve function for action %s", request.action)
+        logger.exception("Failed to resolve function for action %s", action)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(exc),
         ) from exc
 
-    payload = request.payload or {}
-    timeout = action_config.resolved_timeout(get_settings().default_timeout)
-    started = time.perf_counter()
 
+async def _run_order(request: OrderRequest, plan: ActionPlan, *, waited_ms: float = 0.0) -> OrderResponse:
+    """
+    Executes a resolved order and builds its response. `waited_ms` is the time the order already spent queued
+    (background jobs) and is accounted as queueing time.
+    """
+    started = time.perf_counter()
     try:
-        result = await asyncio.wait_for(
-            execute_callable(handler, environment=action_config.environment, payload=payload),
-            timeout=timeout,
+        execution = await execute_plan(plan, payload=request.payload or {})
+    except HTTPException:
+        raise
+    except Exception as exc:
+        raise _order_http_error(request, plan, exc) from exc
+    return await _build_order_response(request, execution, started=started, waited_ms=waited_ms)
+
+
+def _order_http_error(request: OrderRequest, plan: ActionPlan, exc: Exception) -> HTTPException:
+    """Maps an execution failure to the HTTP error reported to the client."""
+    if isinstance(exc, HTTPException):
+        return exc
+    if isinstance(exc, ActionOverloadedError):
+        return HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
         )
-    except asyncio.TimeoutError:
-        raise HTTPException(
+    if isinstance(exc, asyncio.TimeoutError):
+        return HTTPException(
             status_code=status.HTTP_504_GATEWAY_TIMEOUT,
-            detail=f"Action '{request.action}' timed out after {timeout} seconds.",
+            detail=f"Action '{request.action}' timed out after {plan.timeout} seconds.",
         )
-    except ValueError as exc:
-        raise HTTPException(
+    if isinstance(exc, ValueError):
+        return HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(exc),
         )
-    except HTTPException:
-        raise
-    except Exception as exc:
-        logger.exception("Action '%s' failed with an unexpected error.", request.action)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Action failed to execute.",
-        ) from exc
+    logger.error("Action '%s' failed with an unexpected error.", request.action, exc_info=exc)
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Action failed to execute.",
+    )
+
 
+async def _build_order_response(
+    request: OrderRequest, execution: ExecutionResult, *, started: float, waited_ms: float = 0.0
+) -> OrderResponse:
+    serialization_started = time.perf_counter()
+    result = execution.value
     if isinstance(result, dict) and result.get("files"):
+        inline_max_bytes = get_settings().result_files_inline_max_bytes if request.inline_files else None
         result = {
             **result,
-            "files": _serialize_result_files(result.get("files", [])),
+            "files": await run_in_executor_pool("io", _store_result_files, result.get("files", []), inline_max_bytes),
         }
+    serialization_ms = (time.perf_counter() - serialization_started) * 1000
 
-    duration_ms = (time.perf_counter() - started) * 1000
+    duration_ms = (time.perf_counter() - started) * 1000 + waited_ms
     return OrderResponse(
         action=request.action,
         status="success",
         result=result,
         duration_ms=round(duration_ms, 3),
+        queue_ms=round(execution.queue_ms + waited_ms, 3),
+        execution_ms=execution.execution_ms,
+        serialization_ms=round(serialization_ms, 3),
+        coalesced=execution.coalesced,
+        cached=execution.cached,
+        cache_age_ms=execution.cache_age_ms,
+    )
+
+
+def _stream_media_type(http_request: Request) -> str | None:
+    accept = http_request.headers.get("accept", "")
+    for media_type in (SSE_MEDIA_TYPE, NDJSON_MEDIA_TYPE):
+        if media_type in accept:
+            return media_type
+    return None
+
+
+def _encode_stream_event(event: dict[str, Any], media_type: str) -> str:
+    data = json.dumps(event, ensure_ascii=False, default=str)
+    if media_type == SSE_MEDIA_TYPE:
+        return f"event: {event['type']}\ndata: {data}\n\n"
+    return f"{data}\n"
+
+
+async def _stream_order(request: OrderRequest, plan: ActionPlan, media_type: str) -> StreamingResponse:
+    """
+    Streams the events of an order as NDJSON lines or Server-Sent Events. The stream finishes with a `result` event
+    holding the OrderResponse, or with an `error` event when the action fails once streaming has started. Failures
+    before the first event (capacity, invalid payload...) are still reported as HTTP errors.
+    """
+    started = time.perf_counter()
+    events = execute_plan_stream(plan, payload=request.payload or {})
+    try:
+        first = await anext(events)
+    except Exception as exc:
+        raise _order_http_error(request, plan, exc) from exc
+
+    async def _body() -> AsyncIterator[str]:
+        item = first
+        async with aclosing(events):
+            try:
+                while not isinstance(item, ExecutionResult):
+                    yield _encode_stream_event(item, media_type)
+                    item = await anext(events)
+            except Exception as exc:
+                error = _order_http_error(request, plan, exc)
+                event = {"type": "error", "status_code": error.status_code, "detail": str(error.detail)}
+                yield _encode_stream_event(event, media_type)
+                return
+        response = await _build_order_response(request, item, started=started)
+        yield _encode_stream_event({"type": "result", "response": response.model_dump()}, media_type)
+
+    return StreamingResponse(_body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+
+def _submit_job(request: OrderRequest, plan: ActionPlan) -> JobAccepted:
+    async def _run_job(job: JobInfo) -> OrderResponse:
+        return await _run_order(request, plan, waited_ms=(job.started_at - job.created_at) * 1000)
+
+    try:
+        job = get_job_manager().submit(request.action, _run_job)
+    except JobQueueFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        )
+    return JobAccepted(job_id=job.job_id, action=job.action, status=job.status, status_url=f"/order/jobs/{job.job_id}")
+
+
+async def _run_idempotent_order(
+    request: OrderRequest, plan: ActionPlan, idempotency_key: str
+) -> OrderResponse | JobAccepted:
+    """
+    Runs the order once per idempotency key: retries wait for the running execution or get the stored response
+    (for background orders, the same job). Failed orders are not stored, so their retries run again.
+    """
+    if not idempotency_key or len(idempotency_key) > MAX_IDEMPOTENCY_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must have between 1 and {MAX_IDEMPOTENCY_KEY_LENGTH} characters.",
+        )
+    fingerprint = request_fingerprint(request.action, request.payload, run_async=request.run_async)
+
+    async def _execute() -> OrderResponse | JobAccepted:
+        if request.run_async:
+            return _submit_job(request, plan)
+        return await _run_order(request, plan)
+
+    try:
+        value, replayed = await get_idempotency_store().run(idempotency_key, fingerprint, _execute)
+    except IdempotencyConflictError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(exc),
+        )
+    except IdempotencyStoreFullError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(exc),
+            headers={"Retry-After": "1"},
+        )
+    if replayed and isinstance(value, OrderResponse):
+        return value.model_copy(update={"replayed": True})
+    return value
+
+
+@router.post(
+    "",
+    response_model=OrderResponse,
+    summary="Execute a configured action",
+    responses={
+        202: {"model": JobAccepted, "description": "Order accepted as a background job (async=true)"},
+        400: {"description": "Invalid payload or Idempotency-Key"},
+        401: {"description": "Passkey mismatch"},
+        404: {"description": "Unknown action"},
+        409: {"description": "Idempotency-Key reused for a different request"},
+        429: {"description": "Action at capacity or job queue full"},
+        504: {"description": "Action timed out"},
+    },
+)
+async def execute_order(
+    request: OrderRequest,
+    http_request: Request,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+) -> OrderResponse | JSONResponse | StreamingResponse:
+    """
+    Executes an order. With `Accept: application/x-ndjson` or `Accept: text/event-stream` the progress of streaming
+    actions is sent as it happens; with `"async": true` the order runs as a background job. Orders sent with an
+    `Idempotency-Key` header run once: their retries get the same response (they are never streamed).
+    """
+    plan = _resolve_plan(request.action, request.passkey)
+    if idempotency_key is not None:
+        response = await _run_idempotent_order(request, plan, idempotency_key)
+    elif request.run_async:
+        response = _submit_job(request, plan)
+    else:
+        media_type = _stream_media_type(http_request)
+        if media_type is not None:
+            return await _stream_order(request, plan, media_type)
+        return await _run_order(request, plan)
+
+    if isinstance(response, JobAccepted):
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=response.model_dump())
+    return response
+
+
+@router.post(
+    "/batch",
+    response_model=BatchOrderResponse,
+    summary="Execute several configured actions concurrently",
+)
+async def execute_batch(request: BatchOrderRequest) -> BatchOrderResponse:
+    """
+    Runs every order through the same path as POST /order (passkey, admission, coalescing, cache and timeout apply
+    per item), at most `max_concurrency` at a time. Failed orders are reported per item instead of failing the batch.
+    """
+    started = time.perf_counter()
+    max_concurrency = min(request.max_concurrency or len(request.orders), get_settings().batch_max_concurrency)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _run_item(index: int, order: OrderRequest) -> BatchItemResponse:
+        async with semaphore:
+            item_started = time.perf_counter()
+            response = error = None
+            try:
+                if order.run_async:
+                    raise HTTPException(
+                        status_code=status.HTTP_400_BAD_REQUEST,
+                        detail="Asynchronous orders are not supported inside a batch.",
+                    )
+                response = await _run_order(order, _resolve_plan(order.action, order.passkey))
+            except HTTPException as exc:
+                error = OrderError(status_code=exc.status_code, detail=str(exc.detail))
+            return BatchItemResponse(
+                index=index,
+                action=order.action,
+                status="success" if error is None else "error",
+                response=response,
+                error=error,
+                duration_ms=round((time.perf_counter() - item_started) * 1000, 3),
+            )
+
+    items = await asyncio.gather(*(_run_item(index, order) for index, order in enumerate(request.orders)))
+    failed = sum(item.error is not None for item in items)
+    return BatchOrderResponse(
+        items=items,
+        succeeded=len(items) - failed,
+        failed=failed,
+        duration_ms=round((time.perf_counter() - started) * 1000, 3),
     )
+
+
+@router.get(
+    "/jobs/{job_id}",
+    response_model=JobInfo,
+    summary="Get the state of a background order",
+    responses={404: {"description": "Unknown or expired job"}},
+)
+async def get_job(job_id: str) -> JobInfo:
+    job = get_job_manager().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' does not exist or has expired.",
+        )
+    return job
+
+
+@router.post(
+    "/jobs/{job_id}/cancel",
+    response_model=JobInfo,
+    summary="Cancel a background order",
+    responses={
+        404: {"description": "Unknown or expired job"},
+        409: {"description": "Job already finished"},
+    },
+)
+async def cancel_job(job_id: str) -> JobInfo:
+    job = get_job_manager().cancel(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job '{job_id}' does not exist or has expired.",
+        )
+    if job.finished and job.status != "cancelled":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job '{job_id}' already finished with status '{job.status}'.",
+        )
+    return job
+
+
+@router.post(
+    "/cache/invalidate",
+    summary="Drop cached results of an action",
+    responses={
+        401: {"description": "Passkey mismatch"},
+        404: {"description": "Unknown action"},
+    },
+)
+async def invalidate_cache(request: CacheInvalidationRequest) -> dict[str, Any]:
+    plan = _resolve_plan(request.action, request.passkey)
+    invalidated = invalidate_cached_results(plan, request.payload)
+    logger.info("Invalidated %s cached results of action '%s'", invalidated, request.action)
+    return {"action": request.action, "invalidated": invalidated}
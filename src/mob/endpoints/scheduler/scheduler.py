@@ -1,104 +1,118 @@
 import asyncio
 import time
 
-from mob.models import FunctionRegistry, ActionConfig
-from mob.logger.logger import get_logger
 from mob.app_utils import (
-    execute_callable,
+    close_arsys_clients,
+    close_docker_client,
+    close_public_ip_service,
+    close_rcon_pools,
+    execute_checker,
+    execute_plan,
+    get_action_plan,
     get_config_repo,
-    get_settings,
+    get_public_ip_service,
 )
-
+from mob.logger.logger import get_logger
+from mob.models import ActionPlan
+from mob.runtime.admission import ActionOverloadedError
 
 DEFAULT_CHECKER_TIMEOUT = 120  # seconds
 
 
 logger = get_logger("scheduler")
 
+
 class GeneralScheduler:
     def __init__(self):
         self.periodic_tasks = self._extract_periodic_tasks()
 
-    def _extract_actions_from_repository(self):
+    def _extract_snapshot_from_repository(self):
         try:
-            # Get action configurations from the repository
-            return get_config_repo().get_actions()
+            # Get the current configuration snapshot from the repository
+            return get_config_repo().get_snapshot()
         except (FileNotFoundError, ValueError):
             logger.exception("Configuration error while loading api_config.json.")
-            return []
-
-    def _extract_periodic_tasks(self):
-        actions = self._extract_actions_from_repository()
-        return [action for action in actions.values() if action.checker_interval]
-
-    def _get_checker(self, action_config: ActionConfig):
-        try:
-            handler = FunctionRegistry.resolve(action_config.function, checker=True)
-        except RuntimeError:
-            logger.exception("Failed to resolve checker for action %s", action_config.function)
-            return None
-        return handler
-
-    def _get_function(self, action_config: ActionConfig):
-        try:
-            handler = FunctionRegistry.resolve(action_config.function, checker=False)
-        except RuntimeError:
-            logger.exception("Failed to resolve function for action %s", action_config.function)
             return None
-        return handler
 
-    async def _execute_action(self, action_config: ActionConfig):
-        function = self._get_function(action_config)
-        if not function:
-            logger.warning(f"No se pudo resolver el handler para la funcion {action_config.function}. Saltando ejecución.")
-            return
+    def _extract_periodic_tasks(self) -> list[ActionPlan]:
+        snapshot = self._extract_snapshot_from_repository()
+        if snapshot is None:
+            return []
+        plans = []
+        for action_name, action_config in snapshot.actions.items():
+            if not action_config.checker_interval:
+                continue
+            try:
+                plans.append(get_action_plan(action_name, snapshot))
+            except RuntimeError:
+                logger.exception("Failed to resolve function for action %s", action_name)
+        return plans
 
-        timeout = action_config.resolved_timeout(get_settings().default_timeout)
+    async def _execute_action(self, plan: ActionPlan):
         started = time.perf_counter()
 
         try:
-            result = await asyncio.wait_for(
-                execute_callable(function, environment=action_config.environment, payload={}),
-                timeout=timeout,
-            )
+            await execute_plan(plan, payload={})
+        except ActionOverloadedError as exc:
+            logger.warning("Skipping scheduled execution: %s", exc)
+            return None
         except asyncio.TimeoutError:
-            logger.warning(f"La funcion '{action_config.function}' ha tardado demasiado y la he cancelado.")
+            logger.warning(f"La funcion '{plan.config.function}' ha tardado demasiado y la he cancelado.")
             return None
         except ValueError:
-            logger.exception("Value error while executing function '%s'.", action_config.function)
+            logger.exception("Value error while executing function '%s'.", plan.config.function)
             return None
         except Exception:
-            logger.exception("Function '%s' failed with an unexpected error.", action_config.function)
+            logger.exception("Function '%s' failed with an unexpected error.", plan.config.function)
             return None
 
         duration_ms = (time.perf_counter() - started) * 1000
-        logger.info("Action '%s' executed in %.2f ms", action_config.function, duration_ms)
+        logger.info("Action '%s' executed in %.2f ms", plan.config.function, duration_ms)
 
-    async def _run_periodic_task(self, action_config: ActionConfig):
+    async def _run_periodic_task(self, plan: ActionPlan):
 
-        check_func = self._get_checker(action_config)
-        if not check_func:
-            logger.warning(f"No se pudo obtener el checker para la acción {action_config.function}. Saltando tarea periódica.")
+        if not plan.checker:
+            logger.warning(
+                f"No se pudo obtener el checker para la acción {plan.config.function}. Saltando tarea periódica."
+            )
             return
 
         while True:
             try:
-                check_result = await asyncio.wait_for(
-                    execute_callable(check_func, environment=action_config.environment, payload={}),
-                    timeout=DEFAULT_CHECKER_TIMEOUT,
-                )
+                check_result = await execute_checker(plan, timeout=DEFAULT_CHECKER_TIMEOUT)
                 if check_result is False:
-                    await self._execute_action(action_config)
+                    await self._execute_action(plan)
             except Exception as e:
-                logger.error(f"Error ejecutando checker '{action_config.function}': {e}")
-            await asyncio.sleep(action_config.checker_interval)
+                logger.error(f"Error ejecutando checker '{plan.config.function}': {e}")
+            await self._wait_next_check(plan)
+
+    async def _wait_next_check(self, plan: ActionPlan):
+        if not plan.config.check_on_public_ip_change:
+            await asyncio.sleep(plan.config.checker_interval)
+            return
+        # Wake up early when the public IP changes instead of waiting for the whole interval
+        change = await get_public_ip_service().wait_for_change(plan.config.checker_interval)
+        if change is not None:
+            logger.info(
+                "Public IP changed (%s -> %s): running checker of '%s' now",
+                change.previous,
+                change.current,
+                plan.config.function,
+            )
 
     async def run_async(self):
         tasks = [self._run_periodic_task(cfg) for cfg in self.periodic_tasks]
         if not tasks:
             logger.info("No hay tareas periódicas definidas en api_config.json")
             return
-        await asyncio.gather(*tasks)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # The clients of this loop die with it: close their connections
+            await close_docker_client()
+            await close_rcon_pools()
+            await close_arsys_clients()
+            await close_public_ip_service()
 
     def run(self):
         asyncio.run(self.run_async())
@@ -2,8 +2,8 @@ from __future__ import annotations
 
 from typing import Any, Dict
 
-from mob.ai import talk_to_gemini, talk_to_open_router
-from mob.app_utils import get_total_config_file
+from mob import ai
+from mob.app_utils import get_total_config_file, run_in_executor_pool
 from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
 from mob.logger.logger import get_logger
 from mob.models.ai.talk_request import TalkRequest
@@ -49,11 +49,11 @@ async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[s
         conversation=conversation,
     )
     try:
-        talk_result: TalkResult = talk_to_gemini(talk_request)
+        talk_result: TalkResult = await run_in_executor_pool("llm", ai.talk, "gemini", talk_request)
     except Exception:
         logger.exception("Gemini talk failed, falling back to OpenRouter")
-        talk_result = talk_to_open_router(talk_request)
+        talk_result = await run_in_executor_pool("llm", ai.talk, "open_router", talk_request)
     return {
         "message": talk_result.message,
-        "data": { "message": talk_result.message },
+        "data": {"message": talk_result.message},
     }
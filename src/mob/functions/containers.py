@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+from mob.app_utils import get_container_state_registry, get_docker_client
+from mob.utils.docker import DockerError
+
+
+async def check_container_running(container: str) -> bool:
+    """
+    Verify if the docker container exists on this host and is running. Answered from the container state registry
+    (kept current by the Docker events stream) instead of inspecting the container on every call.
+    """
+    return await get_container_state_registry().is_running(container)
+
+
+async def exec_command_in_container(container: str, argv: Sequence[str]) -> str:
+    """
+    Execute a command inside a docker container and return its output. `argv` is run as is, without a shell, so its
+    arguments are never interpreted.
+    """
+    try:
+        result = await get_docker_client().exec(container, argv)
+    except DockerError:
+        # The container is gone or stopped although the registry said otherwise: inspect it again next time
+        get_container_state_registry().invalidate(container)
+        raise
+    if result.exit_code != 0:
+        raise RuntimeError(f"Error ejecutando comando en el contenedor: {result.stderr}")
+    return result.stdout
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import re
+from typing import Any, Dict
+
+from mob.app_utils import get_rcon_pool
+from mob.functions.containers import check_container_running, exec_command_in_container
+from mob.utils.rcon import DEFAULT_RCON_PORT
+from mob.utils.text import remove_ansi
+
+# Raw RCON responses keep the Minecraft formatting codes that rcon-cli translates to ANSI
+FORMATTING_CODE_PATTERN = re.compile(r"\u00a7[0-9a-fk-or]", re.IGNORECASE)
+
+
+def uses_rcon(environment: Dict[str, Any]) -> bool:
+    """Whether the action environment gives direct RCON access (`rcon_host` and `rcon_password`)."""
+    return bool(environment.get("rcon_host") and environment.get("rcon_password"))
+
+
+async def run_server_command(environment: Dict[str, Any], command: str) -> str:
+    """
+    Run a console command on the Minecraft server and return its output without ANSI codes.
+
+    When the environment provides `rcon_host`/`rcon_port`/`rcon_password` the command is sent through a pooled,
+    already authenticated RCON connection; otherwise `rcon-cli` is executed inside `target_container`.
+    """
+    container = environment.get("target_container")
+    if not container and not uses_rcon(environment):
+        raise ValueError("Missing 'target_container' parameter in configuration.")
+
+    # Check if the docker container exists into this host and is running
+    if container and not await check_container_running(container):
+        raise RuntimeError(f"El contenedor '{container}' no está en ejecución o no existe.")
+
+    if uses_rcon(environment):
+        port = int(environment.get("rcon_port") or DEFAULT_RCON_PORT)
+        pool = get_rcon_pool(environment["rcon_host"], port, environment["rcon_password"])
+        result = FORMATTING_CODE_PATTERN.sub("", await pool.command(command))
+    else:
+        # rcon-cli joins its arguments back into the console command
+        result = await exec_command_in_container(container, ["rcon-cli", *command.split()])
+    return remove_ansi(result)
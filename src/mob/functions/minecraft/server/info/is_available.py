@@ -1,99 +1,98 @@
 from __future__ import annotations
 
 import asyncio
-import socket
-from typing import Any, Dict
-
-import requests
+import time
+from typing import Any, Awaitable, Dict, Tuple
 
+from mob.app_utils import get_public_ip_service
 from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+from mob.functions.containers import check_container_running
+from mob.utils.minecraft_ping import DEFAULT_MINECRAFT_PORT, ServerStatus, server_list_ping
 
 DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE = FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION
 
 
 COMMAND = None
 
+# Deadline of each step of the probe, in seconds
+CONTAINER_CHECK_TIMEOUT = 3.0
+PUBLIC_IP_TIMEOUT = 3.0
+SERVER_PING_TIMEOUT = 5.0
 
-async def _check_container_running(container: str) -> bool:
-    """Verify if the docker container is running"""
-    proc = await asyncio.create_subprocess_exec(
-        "docker",
-        "inspect",
-        "-f",
-        "{{.State.Running}}",
-        container,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, _ = await proc.communicate()
-    return stdout.decode().strip() == "true"
-
-
-async def _exec_command_in_container(container: str, command: str) -> str:
-    """Execute a command inside a docker container"""
-    proc = await asyncio.create_subprocess_exec(
-        "docker",
-        "exec",
-        container,
-        "sh",
-        "-c",
-        command,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
-        raise RuntimeError(f"Error ejecutando comando en el contenedor: {stderr.decode().strip()}")
-    return stdout.decode().strip()
-
-
-async def _is_server_reachable(ip, puerto=25565):
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-    try:
-        sock.settimeout(5)  # Tiempo máximo de espera: 5 segundos
-        result = sock.connect_ex((ip, puerto))
-        return result == 0
-    finally:
-        sock.close()
+async def _get_public_ip() -> str:
+    return await get_public_ip_service().get()
 
 
-async def _get_public_ip():
+async def _step(awaitable: Awaitable[Any], timeout: float) -> Tuple[Any, Dict[str, Any]]:
+    """Runs one step of the probe within its deadline. Returns its value (None if it failed) and a report."""
+    started = time.perf_counter()
+    value, error = None, None
     try:
-        response = requests.get("https://api.ipify.org?format=json").json()
-        return response["ip"]
-    except Exception:
-        return None
+        value = await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        error = f"Sin respuesta en {timeout:g} s"
+    except Exception as exc:
+        error = str(exc) or type(exc).__name__
+    report = {"ok": error is None, "elapsed_ms": round((time.perf_counter() - started) * 1000, 3)}
+    if error is not None:
+        report["error"] = error
+    return value, report
+
+
+async def _probe_server(ip_address: str | None, port: int) -> Tuple[str | None, ServerStatus | None, Dict[str, Any]]:
+    """Resolves the public IP (unless configured) and then pings the server through it."""
+    reports: Dict[str, Any] = {}
+    if not ip_address:
+        ip_address, reports["public_ip"] = await _step(_get_public_ip(), PUBLIC_IP_TIMEOUT)
+    if not ip_address:
+        return None, None, reports
+    status, reports["ping"] = await _step(
+        server_list_ping(ip_address, port, timeout=SERVER_PING_TIMEOUT), SERVER_PING_TIMEOUT
+    )
+    return ip_address, status, reports
 
 
 async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
     """
     Check if the Minecraft server is available and reachable.
+
+    The container check and the public IP lookup followed by a Server List Ping (version, players and latency) run
+    concurrently, each with its own deadline, so an unreachable server never blocks the event loop.
     """
     container = environment.get("target_container")
     if not container:
         raise ValueError("Missing 'target_container' parameter in configuration.")
-    ip_address_server = environment.get("ip_address_server")
+    port_server = int(environment.get("port_server") or DEFAULT_MINECRAFT_PORT)
+
+    (is_container_running, container_report), (ip_address_server, status, server_reports) = await asyncio.gather(
+        _step(check_container_running(container), CONTAINER_CHECK_TIMEOUT),
+        _probe_server(environment.get("ip_address_server"), port_server),
+    )
+    is_server_reachable = status is not None
+
+    if container_report["ok"]:
+        message = f"El servidor de Minecraft está {'en ejecución' if is_container_running else 'detenido'} "
+    else:
+        message = f"No se ha podido comprobar el contenedor '{container}' ({container_report['error']}) "
     if not ip_address_server:
-        ip_address_server = await _get_public_ip()
-        if not ip_address_server:
-            raise ValueError(
-                "No se ha podido determinar la IP pública del servidor. Proporciónala en payload.ip_address_server."
-            )
-    port_server = environment.get("port_server")
-    if not port_server:
-        port_server = 25565  # Puerto por defecto de Minecraft
-
-    is_container_running = await _check_container_running(container)
-    is_server_reachable = await _is_server_reachable(ip_address_server, port_server)
-
-    message = f"El servidor de Minecraft está {'en ejecución' if is_container_running else 'detenido'} "
-    if is_container_running and is_server_reachable:
-        message += f"y es accesible desde la dirección {ip_address_server}:{port_server}. "
-    elif is_container_running and not is_server_reachable:
+        message += "y no se ha podido determinar la IP pública del servidor. Proporciónala en ip_address_server. "
+    elif is_server_reachable:
+        message += (
+            f"y es accesible desde la dirección {ip_address_server}:{port_server} "
+            f"(versión {status.version}, {status.players_online}/{status.players_max} jugadores, "
+            f"{status.latency_ms:.0f} ms). "
+        )
+    elif is_container_running:
         message += f"pero detecto problemas de conexión desde la dirección {ip_address_server}:{port_server}. "
 
     return {
         "message": message,
-        "data": { "container_running": is_container_running, "server_reachable": is_server_reachable}
+        "data": {
+            "container_running": is_container_running,
+            "server_reachable": is_server_reachable,
+            "address": f"{ip_address_server}:{port_server}" if ip_address_server else None,
+            "server": status.to_dict() if status is not None else None,
+            "steps": {"container": container_report, **server_reports},
+        },
     }
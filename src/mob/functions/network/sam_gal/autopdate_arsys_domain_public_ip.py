@@ -1,19 +1,66 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple
-import xml.etree.ElementTree as ET
+import asyncio
 import base64
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Tuple
+
 import httpx
 
+from mob.app_utils import get_public_ip_service
+from mob.runtime.streaming import partial_event, progress_event, result_event
+from mob.utils.aio import LoopLocal
+
 # Configuración de la API de Arsys según el manual
 ARSYS_API_URL = "https://api.servidoresdns.net:54321/hosting/api/soap/index.php"
 
+HTTP_TIMEOUT = 30.0
+# Segundos que `run` reutiliza la IP pública y las zonas DNS obtenidas por `check`
+ZONE_SNAPSHOT_TTL = 60.0
+# Modificaciones simultáneas y reintentos (compartidos por toda la ejecución) por defecto; configurables en el
+# environment con `max_concurrent_updates` y `retry_budget`
+DEFAULT_MAX_CONCURRENT_UPDATES = 4
+DEFAULT_RETRY_BUDGET = 3
+RETRY_DELAY = 0.5
+
+
+@dataclass(frozen=True)
+class ZoneSnapshot:
+    """IP pública y entradas DNS de un dominio obtenidas a la vez."""
+
+    public_ip: str
+    records: List[Dict[str, str]]
+    fetched_at: float
+
+
+# Snapshots de `check` pendientes de usar por `run`, por (login, dominio)
+_snapshots: Dict[Tuple[str, str], ZoneSnapshot] = {}
+
+
+def _new_http_client() -> httpx.AsyncClient:
+    # Cliente de larga duración: las llamadas SOAP reutilizan las conexiones (y la sesión TLS del puerto 54321)
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=120.0),
+    )
+
+
+# Un cliente por bucle de eventos (API, scheduler y bot usan bucles distintos)
+_http_clients: LoopLocal[httpx.AsyncClient] = LoopLocal(_new_http_client)
+
+
+async def close_http_client() -> None:
+    """Cierra el cliente HTTP del bucle de eventos en curso, si se llegó a crear."""
+    client = _http_clients.pop(asyncio.get_running_loop())
+    if client is not None:
+        await client.aclose()
+
 
 async def get_public_ip() -> str:
-    """Obtiene la IP pública actual del host."""
-    async with httpx.AsyncClient() as client:
-        response = await client.get("https://api.ipify.org?format=json")
-        return response.json()["ip"]
+    """Obtiene la IP pública actual del host del servicio compartido (caché con TTL sobre varios proveedores)."""
+    return await get_public_ip_service().get()
 
 
 def get_auth_header(login: str, key: str) -> Dict[str, str]:
@@ -23,16 +70,9 @@ def get_auth_header(login: str, key: str) -> Dict[str, str]:
     return {"Authorization": f"Basic {encoded}"}
 
 
-async def call_arsys_soap(method: str, input_xml: str, environment: Dict[str, Any]) -> str:
-    """Realiza una llamada SOAP a la API de Arsys."""
-    login = environment.get("arsys_api_login")
-    key = environment.get("arsys_api_key")
-
-    headers = get_auth_header(login, key)
-    headers["Content-Type"] = "text/xml; charset=utf-8"
-
-    # Construcción del sobre SOAP según ejemplos del manual
-    envelope = f"""<?xml version="1.0" encoding="UTF-8"?>
+def build_soap_envelope(method: str, input_xml: str) -> str:
+    """Construcción del sobre SOAP según ejemplos del manual."""
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
 <soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/" xmlns:ns="{method}">
    <soapenv:Header/>
    <soapenv:Body>
@@ -42,120 +82,338 @@ async def call_arsys_soap(method: str, input_xml: str, environment: Dict[str, An
    </soapenv:Body>
 </soapenv:Envelope>"""
 
-    async with httpx.AsyncClient() as client:
-        response = await client.post(ARSYS_API_URL, content=envelope, headers=headers, timeout=30.0)
-        return response.text
 
+class ArsysResponseParser:
+    """
+    Parser incremental de las respuestas SOAP de Arsys: procesa el XML según llega y extrae las entradas DNS
+    (`<item>` con `name`, `type` y `value`) y el primer `<errorCode>` distinto de 0 sin construir el árbol completo.
+    """
+
+    ITEM_FIELDS = ("name", "type", "value")
+
+    def __init__(self) -> None:
+        self._parser = ET.XMLPullParser(events=("end",))
+        self._fields: Dict[str, str] = {}
+        self.records: List[Dict[str, str]] = []
+        self.error_code: str | None = None
+
+    def feed(self, data: bytes) -> None:
+        """Procesa un fragmento de la respuesta. Lanza ET.ParseError si el XML no es válido."""
+        self._parser.feed(data)
+        self._read_events()
+
+    def close(self) -> Tuple[List[Dict[str, str]] | None, str | None]:
+        """Termina el parseo. Devuelve (entradas, None) o (None, código de error)."""
+        self._parser.close()
+        self._read_events()
+        if self.error_code:
+            return None, self.error_code
+        return self.records, None
 
-def parse_arsys_dns_response(xml_content: str) -> Tuple[List[Dict[str, str]] | None, List[Dict[str, str]] | None]:
+    def _read_events(self) -> None:
+        for _, element in self._parser.read_events():
+            tag = element.tag.rsplit("}", 1)[-1]
+            if tag in self.ITEM_FIELDS:
+                self._fields[tag] = element.text or ""
+            elif tag == "item":
+                if self._fields:
+                    self.records.append({field: self._fields.get(field, "") for field in self.ITEM_FIELDS})
+                self._fields = {}
+                element.clear()
+            elif tag == "errorCode" and self.error_code is None and (element.text or "0") != "0":
+                self.error_code = element.text
+
+
+def parse_arsys_dns_response(
+    xml_content: str | bytes | Iterable[bytes],
+) -> Tuple[List[Dict[str, str]] | None, str | None]:
     """
-    Parsea el XML de Arsys y devuelve una lista de diccionarios con
-    la información de cada entrada DNS (name, type, value) y un listado de los elementos <errorCode> detectados.
-    En caso de haber algun error con valor diferente a 0, se imprimirá el error y se devolverá None.
+    Parsea el XML de Arsys (completo o en fragmentos) y devuelve una lista de diccionarios con la información de cada
+    entrada DNS (name, type, value) y el código del primer <errorCode> distinto de 0. Si hay algún error la lista es
+    None, y si el XML no es válido se devuelve (None, None).
     """
-    # Definición de namespaces para el parsing
-    namespaces = {
-        'soap': 'http://schemas.xmlsoap.org/soap/envelope/',
-        'soap-enc': 'http://schemas.xmlsoap.org/soap/encoding/',
-        'xsi': 'http://www.w3.org/2001/XMLSchema-instance'
-    }
+    if isinstance(xml_content, str):
+        xml_content = xml_content.encode("utf-8")
+    chunks = [xml_content] if isinstance(xml_content, bytes) else xml_content
+    parser = ArsysResponseParser()
+    try:
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.close()
+    except ET.ParseError:
+        return None, None
 
+
+async def _parse_arsys_stream(chunks: AsyncIterable[bytes]) -> Tuple[List[Dict[str, str]] | None, str | None]:
+    parser = ArsysResponseParser()
     try:
-        root = ET.fromstring(xml_content)
-        # Buscamos todos los elementos <item> dentro de la estructura
-        # El camino es: Body -> InfoDNSZoneResponse -> return -> res -> data -> item
-        items = root.findall(".//item", namespaces)
-        # Buscamos todos los elementos <errorCode> con valor diferente a 0 para detectar errores
-        error_codes = root.findall(".//errorCode", namespaces)
-        for error in error_codes:
-            if error.text != "0":
-                return None, error.text
-
-        dns_records = []
-        for item in items:
-            name = item.find("name").text if item.find("name") is not None else ""
-            record_type = item.find("type").text if item.find("type") is not None else ""
-            value = item.find("value").text if item.find("value") is not None else ""
-
-            dns_records.append({
-                "name": name,
-                "type": record_type,
-                "value": value
-            })
-        return dns_records, None
-    except Exception as e:
+        async for chunk in chunks:
+            parser.feed(chunk)
+        return parser.close()
+    except ET.ParseError:
         return None, None
 
 
+async def call_arsys_soap(
+    method: str, input_xml: str, environment: Dict[str, Any]
+) -> Tuple[List[Dict[str, str]] | None, str | None]:
+    """
+    Realiza una llamada SOAP a la API de Arsys con el cliente compartido y parsea la respuesta según se recibe.
+    Devuelve lo mismo que `parse_arsys_dns_response`. Lanza httpx.HTTPStatusError si Arsys responde con un error HTTP
+    (p. ej. un SOAP Fault) y httpx.TransportError si falla la conexión.
+    """
+    login = environment.get("arsys_api_login")
+    key = environment.get("arsys_api_key")
+
+    headers = get_auth_header(login, key)
+    headers["Content-Type"] = "text/xml; charset=utf-8"
+
+    envelope = build_soap_envelope(method, input_xml)
+    url = environment.get("arsys_api_url") or ARSYS_API_URL
+    async with _http_clients.get().stream("POST", url, content=envelope, headers=headers) as response:
+        if response.is_error:
+            await response.aread()
+            response.raise_for_status()
+        return await _parse_arsys_stream(response.aiter_bytes())
+
+
 async def call_arsys_soap_info_dns_zone(domain_name: str, environment: Dict[str, Any]) -> List[Dict[str, str]] | None:
     """Llama a la función InfoDNSZone de Arsys para obtener las entradas DNS de un dominio."""
     input_xml = f"<domain>{domain_name}</domain>"
-    response_xml = await call_arsys_soap("InfoDNSZone", input_xml, environment)
-    data, errors = parse_arsys_dns_response(response_xml)
+    data, errors = await call_arsys_soap("InfoDNSZone", input_xml, environment)
     if errors:
         return None
     return data
 
 
-async def check(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> bool:
+def get_domain_targets(environment: Dict[str, Any]) -> List[Tuple[str, List[str]]]:
     """
-    Verifica si la IP pública coincide con la configurada en Arsys.
+    Dominios y registros A a mantener: `domains` (lista de {"domain", "records"}) o, en configuraciones antiguas,
+    `domain` y `records`.
     """
-    domain = environment.get("domain")
-    records_to_update = environment.get("records", [])
-    try:
-        public_ip = await get_public_ip()
+    domains = environment.get("domains")
+    if domains is None:
+        domains = [{"domain": environment.get("domain"), "records": environment.get("records", [])}]
+    targets = [(entry.get("domain"), list(entry.get("records", []))) for entry in domains]
+    if not targets or not all(domain for domain, _ in targets):
+        raise ValueError("Missing 'domains' (or 'domain') parameter in configuration.")
+    return targets
+
+
+async def fetch_zone_snapshots(domain_names: List[str], environment: Dict[str, Any]) -> Dict[str, ZoneSnapshot | None]:
+    """
+    Obtiene en paralelo la IP pública y la zona DNS de cada dominio. El snapshot de un dominio es None si no se pudo
+    obtener su zona.
+    """
+    public_ip, *zones = await asyncio.gather(
+        get_public_ip(), *(call_arsys_soap_info_dns_zone(domain_name, environment) for domain_name in domain_names)
+    )
+    fetched_at = time.monotonic()
+    return {
+        domain_name: (
+            ZoneSnapshot(public_ip=public_ip, records=records, fetched_at=fetched_at) if records is not None else None
+        )
+        for domain_name, records in zip(domain_names, zones)
+    }
+
+
+def _snapshot_key(domain_name: str, environment: Dict[str, Any]) -> Tuple[str, str]:
+    return str(environment.get("arsys_api_login")), domain_name
+
+
+def _take_snapshots(domain_names: List[str], environment: Dict[str, Any]) -> Dict[str, ZoneSnapshot] | None:
+    """Devuelve (y consume) los snapshots que dejó `check` si están todos y todavía no han caducado."""
+    snapshots = {name: _snapshots.pop(_snapshot_key(name, environment), None) for name in domain_names}
+    now = time.monotonic()
+    if any(snapshot is None or now - snapshot.fetched_at > ZONE_SNAPSHOT_TTL for snapshot in snapshots.values()):
+        return None
+    return snapshots
+
+
+@dataclass(frozen=True)
+class RecordChange:
+    """Modificación necesaria de un registro A."""
+
+    domain: str
+    record: str
+    current: str
+    desired: str
+
+
+def plan_record_changes(
+    targets: List[Tuple[str, List[str]]], snapshots: Dict[str, ZoneSnapshot | None], public_ip: str
+) -> Tuple[List[RecordChange], List[Dict[str, Any]]]:
+    """
+    Compara en una sola pasada la IP deseada con la zona actual de cada dominio. Devuelve las modificaciones
+    necesarias y el resultado de los registros que no hay que modificar (sin cambios, inexistentes o sin zona).
+    """
+    changes: List[RecordChange] = []
+    outcomes: List[Dict[str, Any]] = []
+    for domain, records in targets:
+        snapshot = snapshots.get(domain)
+        if snapshot is None:
+            outcomes.extend(
+                {"domain": domain, "record": name, "status": "error", "error": "Zona DNS no disponible."}
+                for name in records
+            )
+            continue
+        current_values = {record["name"]: record["value"] for record in snapshot.records if record["type"] == "A"}
+        for name in records:
+            current = current_values.get(name)
+            if current is None:
+                outcomes.append({"domain": domain, "record": name, "status": "missing"})
+            elif current == public_ip:
+                outcomes.append({"domain": domain, "record": name, "status": "unchanged", "value": current})
+            else:
+                changes.append(RecordChange(domain=domain, record=name, current=current, desired=public_ip))
+    return changes, outcomes
 
-        response_records = await call_arsys_soap_info_dns_zone(domain, environment)
-        if response_records is None:
+
+class _RetryBudget:
+    """Reintentos compartidos por todas las modificaciones de una ejecución."""
+
+    def __init__(self, retries: int):
+        self.remaining = retries
+        self.used = 0
+
+    def take(self) -> bool:
+        if self.remaining <= 0:
             return False
-        for record_name in records_to_update:
-            if any(record for record in response_records if record["name"] == record_name and record["type"] == "A" and record["value"] != public_ip):
-                return False
+        self.remaining -= 1
+        self.used += 1
         return True
 
+
+def _is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+async def _modify_record(
+    change: RecordChange, environment: Dict[str, Any], semaphore: asyncio.Semaphore, budget: _RetryBudget
+) -> Dict[str, Any]:
+    input_xml = f"""
+        <domain>{change.domain}</domain>
+        <dns>{change.record}</dns>
+        <currenttype>A</currenttype>
+        <currentvalue>{change.current}</currentvalue>
+        <newvalue>{change.desired}</newvalue>
+    """
+    outcome: Dict[str, Any] = {"domain": change.domain, "record": change.record, "previous": change.current}
+    async with semaphore:
+        started = time.perf_counter()
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                _, error_code = await call_arsys_soap("ModifyDNSEntry", input_xml, environment)
+            except httpx.HTTPError as exc:
+                # Errores de red o 5xx: se reintentan mientras quede presupuesto
+                if _is_retryable(exc) and budget.take():
+                    await asyncio.sleep(RETRY_DELAY * attempts)
+                    continue
+                outcome.update(status="error", error=str(exc) or type(exc).__name__)
+            else:
+                if error_code:
+                    outcome.update(status="error", error_code=error_code)
+                else:
+                    outcome.update(status="updated", value=change.desired)
+            break
+        outcome.update(attempts=attempts, latency_ms=round((time.perf_counter() - started) * 1000, 3))
+    return outcome
+
+
+async def apply_record_changes(
+    changes: List[RecordChange], environment: Dict[str, Any], *, max_concurrency: int, retry_budget: _RetryBudget
+) -> AsyncIterator[Dict[str, Any]]:
+    """Lanza las modificaciones en paralelo (como mucho `max_concurrency` a la vez) y emite cada resultado al acabar."""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    tasks = [asyncio.ensure_future(_modify_record(change, environment, semaphore, retry_budget)) for change in changes]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _outcome_message(outcome: Dict[str, Any]) -> str:
+    name = f"{outcome['record']} ({outcome['domain']})"
+    status = outcome["status"]
+    if status == "updated":
+        return f"{name}: {outcome['previous']} -> {outcome['value']}."
+    if status == "unchanged":
+        return f"{name}: sin cambios."
+    if status == "missing":
+        return f"{name}: no existe."
+    return f"{name}: error {outcome.get('error_code') or outcome.get('error')}."
+
+
+async def check(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> bool:
+    """
+    Verifica si la IP pública coincide con la configurada en Arsys para todos los registros de todos los dominios.
+    """
+    targets = get_domain_targets(environment)
+    try:
+        snapshots = await fetch_zone_snapshots([domain for domain, _ in targets], environment)
+        if any(snapshot is None for snapshot in snapshots.values()):
+            return False
+        # Si el check falla, el scheduler ejecuta `run` después: reutilizará la IP y las zonas recién obtenidas
+        for domain, snapshot in snapshots.items():
+            _snapshots[_snapshot_key(domain, environment)] = snapshot
+        public_ip = next(iter(snapshots.values())).public_ip
+        changes, _ = plan_record_changes(targets, snapshots, public_ip)
+        return not changes
+
     except Exception as e:
         raise Exception(f"Error al verificar la IP: {str(e)}")
 
 
-async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
     """
-    Actualiza la IP en Arsys cuando el check devuelve False
+    Actualiza la IP en Arsys cuando el check devuelve False. Función en streaming: informa de la IP pública, de las
+    zonas DNS obtenidas y del resultado (y la latencia) de cada registro según se van modificando en paralelo.
     """
-    domain = environment.get("domain")
-    records_to_update = environment.get("records", [])
+    targets = get_domain_targets(environment)
+    domain_names = [domain for domain, _ in targets]
+    max_concurrency = int(environment.get("max_concurrent_updates") or DEFAULT_MAX_CONCURRENT_UPDATES)
+    retry_budget = _RetryBudget(int(environment.get("retry_budget", DEFAULT_RETRY_BUDGET)))
     try:
-        public_ip = await get_public_ip()
+        snapshots = _take_snapshots(domain_names, environment) or await fetch_zone_snapshots(domain_names, environment)
+        available = [snapshot for snapshot in snapshots.values() if snapshot is not None]
+        if not available:
+            yield result_event(
+                {"success": False, "message": "No se pudieron obtener las entradas DNS de los dominios."}
+            )
+            return
+        public_ip = available[0].public_ip
+        yield progress_event(f"IP pública actual: {public_ip}.")
+        yield progress_event(f"Zonas DNS obtenidas: {len(available)} de {len(domain_names)}.")
+
+        changes, outcomes = plan_record_changes(targets, snapshots, public_ip)
+        for outcome in outcomes:
+            yield partial_event(outcome, message=_outcome_message(outcome))
+        if changes:
+            yield progress_event(f"Modificando {len(changes)} registros.")
+        async for outcome in apply_record_changes(
+            changes, environment, max_concurrency=max_concurrency, retry_budget=retry_budget
+        ):
+            outcomes.append(outcome)
+            yield partial_event(outcome, message=_outcome_message(outcome))
 
-        response_records = await call_arsys_soap_info_dns_zone(domain, environment)
-        if not response_records:
-            return {
-                "success": False,
-                "message": "No se pudieron obtener las entradas DNS del dominio."
+        counts = {status: 0 for status in ("updated", "unchanged", "missing", "error")}
+        for outcome in outcomes:
+            counts[outcome["status"]] += 1
+        yield result_event(
+            {
+                "success": counts["error"] == 0,
+                "message": (
+                    f"IP pública {public_ip}: {counts['updated']} registros actualizados, "
+                    f"{counts['unchanged']} sin cambios y {counts['error']} con errores."
+                ),
+                "data": {"public_ip": public_ip, "records": outcomes, "retries": retry_budget.used},
             }
-        for record_name in records_to_update:
-            current_record = next((record for record in response_records if record["name"] == record_name and record["type"] == "A"), None)
-            if not current_record:
-                continue  # Si no se encuentra la entrada, se omite
-            current_val = current_record["value"]
-            input_xml = f"""
-                <domain>{domain}</domain>
-                <dns>{record_name}</dns>
-                <currenttype>A</currenttype>
-                <currentvalue>{current_val}</currentvalue>
-                <newvalue>{public_ip}</newvalue>
-            """
-            response_xml = await call_arsys_soap("ModifyDNSEntry", input_xml, environment)
-            response_confirmation = parse_arsys_dns_response(response_xml)
-            if not response_confirmation:
-                continue
-
-        return {
-            "success": True,
-            "message": f"IPs actualizadas correctamente a {public_ip}."
-        }
+        )
     except Exception as e:
-        return {
-            "success": False,
-            "message": f"Error al actualizar la IP: {str(e)}"
-        }
+        yield result_event({"success": False, "message": f"Error al actualizar la IP: {str(e)}"})
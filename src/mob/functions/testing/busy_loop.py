@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict
+
+from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+
+DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE = FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION
+
+
+def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Utility function leveraged in tests to validate CPU-bound execution (e.g. the 'process' executor).
+    Spins the CPU for `payload.get("seconds", 0)` seconds while holding the GIL.
+    """
+    seconds = float(payload.get("seconds", 0))
+    deadline = time.perf_counter() + seconds
+    iterations = 0
+    while time.perf_counter() < deadline:
+        iterations += 1
+    return {
+        "message": f"He estado ocupado durante {seconds} segundos.",
+        "data": {"iterations": iterations, "pid": os.getpid()},
+    }
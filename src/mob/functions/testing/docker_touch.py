@@ -1,36 +1,22 @@
 from __future__ import annotations
 
-import asyncio
 import uuid
 from typing import Any, Dict
 
+from mob.app_utils import get_docker_client
 from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+from mob.functions.containers import check_container_running
 
 DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE = FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION
 
 
-async def _check_container_running(container: str) -> bool:
-    # Verifica si el contenedor está en ejecución
-    proc = await asyncio.create_subprocess_exec(
-        "docker",
-        "inspect",
-        "-f",
-        "{{.State.Running}}",
-        container,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, _ = await proc.communicate()
-    return stdout.decode().strip() == "true"
-
-
 async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
     container = environment.get("target_container")
     if not container:
         raise ValueError("Missing 'target_container' parameter.")
 
     # Comprobación de que el contenedor existe y está en ejecución
-    if not await _check_container_running(container):
+    if not await check_container_running(container):
         raise RuntimeError(f"El contenedor '{container}' no está en ejecución o no existe.")
 
     # Ruta temporal única dentro del contenedor
@@ -38,20 +24,11 @@ async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[s
     temp_path = f"/tmp/{temp_filename}"
 
     # Comando para crear el archivo
-    proc = await asyncio.create_subprocess_exec(
-        "docker",
-        "exec",
-        container,
-        "touch",
-        temp_path,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
-        raise RuntimeError(f"Error creando archivo en el contenedor: {stderr.decode().strip()}")
+    result = await get_docker_client().exec(container, ["touch", temp_path])
+    if result.exit_code != 0:
+        raise RuntimeError(f"Error creando archivo en el contenedor: {result.stderr}")
 
     return {
         "message": f"Archivo '{temp_path}' creado exitosamente en el contenedor '{container}'.",
-        "data": { "container": container, "temp_path": temp_path },
+        "data": {"container": container, "temp_path": temp_path},
     }
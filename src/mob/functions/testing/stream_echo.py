@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Dict
+
+from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+from mob.runtime.streaming import partial_event, progress_event, result_event
+
+DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE = FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION
+
+
+async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Utility function leveraged in tests to validate streaming responses.
+    Yields `payload.get("steps", 3)` partial events, `payload.get("delay", 0)` seconds apart, before the result.
+    """
+    steps = int(payload.get("steps", 3))
+    delay = float(payload.get("delay", 0))
+    yield progress_event(f"Empezando el echo de {steps} pasos.")
+    for step in range(steps):
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield partial_event({"step": step}, message=f"Paso {step + 1} de {steps}.")
+    yield result_event({"message": f"El echo ha terminado después de {steps} pasos."})
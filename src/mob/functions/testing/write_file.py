@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+
+DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE = FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION
+
+
+def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Utility function leveraged in tests to validate result files.
+    Writes a text file of `payload.get("size", 1024)` bytes and returns it in `files`.
+    """
+    size = int(payload.get("size", 1024))
+    directory = Path(tempfile.mkdtemp(prefix="mob-write-file-"))
+    path = directory / "result.txt"
+    path.write_bytes(bytes(ord("a") + index % 26 for index in range(size)))
+    return {
+        "message": f"Se ha generado un fichero de {size} bytes.",
+        "files": [str(path)],
+    }
@@ -1,23 +1,43 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
-from typing import Any, Dict
 import asyncio
 import time
+from concurrent.futures import Future, as_completed
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict
 
-from autoweb.spatially.analyzers.availability_window_analyzer import AvailabilityWindowAnalyzer
+from autoweb.autoweb import Autoweb
 from autoweb.awengines.awe_base import AWEngineBase, AWEngineResponse, awe_pipeline
 from autoweb.webscraper.webscraper import WebScraperFactory
-from autoweb.autoweb import Autoweb
 
+from mob.app_utils import get_browser_session_pool, get_executor_pool, run_in_executor_pool
 from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+from mob.functions.webscraping.padel.vigo_twelve_schema import get_availability_grid
+from mob.runtime.browser_sessions import BrowserSession
+from mob.runtime.cancellation import CancellationToken
+from mob.runtime.streaming import partial_event, progress_event, result_event
 from mob.utils.text import str_to_python
 
 DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE = FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION
 
+SCHEDULE_URL = "https://reservas.twelvepadelzenter.com/Web/schedule.php"
+# Selectores que indican que la página está lista: el calendario de reservas o, si la sesión caducó, el login
+SCHEDULE_READY_SELECTOR = "div#reservations table.reservations"
+LOGIN_FORM_SELECTOR = "input#email"
+# Segundos máximos de espera a que aparezca un selector
+PAGE_READY_TIMEOUT = 20.0
+PAGE_READY_POLL_INTERVAL = 0.2
+# Espera fija de respaldo tras el login si el WebScraper no permite consultar el DOM
+PAGE_READY_FALLBACK_WAIT = 5.0
 
-async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
 
+async def run(
+    *, environment: Dict[str, Any], payload: Dict[str, Any], cancellation: CancellationToken | None = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streaming function: yields the availability of each date as soon as its screenshot is analyzed and finishes with
+    the complete result (message, screenshots and availability of every date).
+    """
     username = environment.get("username")
     password = environment.get("password")
 
@@ -25,21 +45,53 @@ async def run(*, environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[s
     if not dates_to_check:
         raise ValueError("payload.dates_to_check is required to check availability.")
 
-    result = await asyncio.to_thread(
-        Autoweb().run,
-        engine=AWEnginePadelCheckerVigoTwelve,
-        args={
-            "username": username,
-            "password": password,
-            "dates_to_check": dates_to_check,
-        }
+    # The engine runs in a browser thread: analyzed dates are handed over to the event loop through a queue
+    loop = asyncio.get_running_loop()
+    analyzed_dates: asyncio.Queue[tuple[str, dict]] = asyncio.Queue()
+
+    def _on_date_analyzed(date: str, availability: dict) -> None:
+        try:
+            loop.call_soon_threadsafe(analyzed_dates.put_nowait, (date, availability))
+        except RuntimeError:
+            # The loop is already closed: nobody is listening anymore
+            pass
+
+    yield progress_event(f"Comprobando la disponibilidad para las fechas: {dates_to_check}.")
+    check = asyncio.ensure_future(
+        run_in_executor_pool(
+            "browser",
+            Autoweb().run,
+            engine=AWEnginePadelCheckerVigoTwelve,
+            args={
+                "username": username,
+                "password": password,
+                "dates_to_check": dates_to_check,
+                # Lets the engine stop between steps and close the browser when the action times out
+                "cancellation": cancellation or CancellationToken(),
+                "on_date_analyzed": _on_date_analyzed,
+            },
+        )
     )
+    try:
+        while not check.done() or not analyzed_dates.empty():
+            next_date = asyncio.ensure_future(analyzed_dates.get())
+            await asyncio.wait({check, next_date}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_date.done():
+                next_date.cancel()
+                continue
+            date, availability = next_date.result()
+            yield partial_event({date: availability}, message=f"{date}: {len(availability)} pistas con huecos libres.")
+        result = check.result()
+    finally:
+        check.cancel()
 
-    return {
-        "message": f"Se ha completado la comprobación de disponibilidad para las fechas: {dates_to_check}.",
-        "files": result.files,
-        "data": result.data,
-    }
+    yield result_event(
+        {
+            "message": f"Se ha completado la comprobación de disponibilidad para las fechas: {dates_to_check}.",
+            "files": result.files,
+            "data": result.data,
+        }
+    )
 
 
 class AWEnginePadelCheckerVigoTwelve(AWEngineBase):
@@ -53,38 +105,91 @@ class AWEnginePadelCheckerVigoTwelve(AWEngineBase):
 
     @awe_pipeline
     def pipeline(self, dir_downloads: str = None):
-        # Define un nuevo WebScraper
-        webscraper = WebScraperFactory.create(self.base_url, dir_downloads=dir_downloads)
-        # Abre la URL BASE
-        webscraper.navigate(url=self.base_url)  # Navega a la URL base y espera 4 segundos
-        # Introduce las credenciales
-        webscraper.input_write(selector="input#email", text=self.username)
-        webscraper.input_write(selector="input#password", text=self.password)
-        # Click en el botón de login
-        webscraper.click(selector="button[type='submit']")
-        # Abre la URL del Scheduler
-        webscraper.navigate(url="https://reservas.twelvepadelzenter.com/Web/schedule.php")
-        # Wait
-        time.sleep(5)
+        cancellation: CancellationToken = getattr(self, "cancellation", None) or CancellationToken()
+        cancellation.raise_if_cancelled()
+        # Reutiliza un navegador ya abierto (y con la sesión iniciada) del pool, o crea uno nuevo
+        with get_browser_session_pool().session(
+            (self.base_url, self.username),
+            lambda: WebScraperFactory.create(self.base_url, dir_downloads=dir_downloads),
+            close=_close_webscraper,
+            cancellation=cancellation,
+        ) as session:
+            # Las capturas de esta ejecución van a su propio directorio de descargas
+            if dir_downloads is not None and hasattr(session.browser, "dir_downloads"):
+                session.browser.dir_downloads = dir_downloads
+            # Cierra el navegador si la acción se cancela mientras el hilo sigue trabajando
+            release_teardown = cancellation.add_callback(lambda: _discard_session(session))
+            try:
+                return self.__run_pipeline(session, cancellation)
+            finally:
+                release_teardown()
+
+    def __run_pipeline(self, session: BrowserSession, cancellation: CancellationToken):
+        webscraper = session.browser
+        # Abre el calendario de reservas, iniciando sesión si el navegador es nuevo o la sesión ha caducado
+        self.__open_schedule(session, cancellation)
         # Calcula el índice del día a comprobar
-        days_index = [(day_to_check, self.__calc_day_index_from_today(day_to_check)) for day_to_check in self.dates_to_check]
+        days_index = [
+            (day_to_check, self.__calc_day_index_from_today(day_to_check)) for day_to_check in self.dates_to_check
+        ]
         days_index = [di for di in days_index if 0 < di[1] <= 7]  # Filtra índices válidos
         if not days_index:
             return AWEngineResponse.EMPTY, {}
-        # Extrae las pistas disponibles
-        schema_json = self.__build_spatially_schema_json()
-        total_extracted_data = {}
-        for di_str, dii in days_index:
-            screenshot_path = webscraper.screenshot(selector=f"div#reservations table.reservations:nth-of-type({dii})")
-            extracted_data = (AvailabilityWindowAnalyzer.from_payload(schema_json)
-                              .analyze(str(screenshot_path))
-                              .to_dict(include_cells=True))
-            total_extracted_data[di_str] = self.__process_extracted_data(extracted_data)
+        # Extrae las pistas disponibles: cada captura se analiza en el pool "cpu" mientras se toma la siguiente
+        grid = get_availability_grid()
+        analyzer = get_executor_pool("cpu")
+        on_date_analyzed = getattr(self, "on_date_analyzed", None)
+        analyzed_data = {}
+        pending: Dict[Future, str] = {}
+
+        def _publish(analysis: Future) -> None:
+            date = pending.pop(analysis)
+            analyzed_data[date] = self.__process_extracted_data(analysis.result().to_dict(include_cells=True))
+            # Publica el resultado de la fecha sin esperar al resto (streaming)
+            if on_date_analyzed is not None:
+                on_date_analyzed(date, analyzed_data[date])
+
+        try:
+            for di_str, dii in days_index:
+                cancellation.raise_if_cancelled()
+                screenshot_path = webscraper.screenshot(selector=f"{SCHEDULE_READY_SELECTOR}:nth-of-type({dii})")
+                pending[analyzer.submit(grid.analyze, str(screenshot_path))] = di_str
+                for analysis in [analysis for analysis in pending if analysis.done()]:
+                    _publish(analysis)
+            for analysis in as_completed(list(pending)):
+                _publish(analysis)
+        finally:
+            for analysis in pending:
+                analysis.cancel()
+        total_extracted_data = {di_str: analyzed_data[di_str] for di_str, _ in days_index}
 
         return AWEngineResponse.DOWNLOADING, total_extracted_data
 
+    def __open_schedule(self, session: BrowserSession, cancellation: CancellationToken) -> None:
+        webscraper = session.browser
+        if not session.fresh:
+            webscraper.navigate(url=SCHEDULE_URL)
+            # Si no se puede comprobar que el calendario se ha cargado, se inicia sesión de nuevo por si ha caducado
+            ready = _wait_for_selector(webscraper, (SCHEDULE_READY_SELECTOR, LOGIN_FORM_SELECTOR), cancellation)
+            if ready == SCHEDULE_READY_SELECTOR:
+                return
+        # Abre la URL BASE e introduce las credenciales
+        webscraper.navigate(url=self.base_url)
+        webscraper.input_write(selector=LOGIN_FORM_SELECTOR, text=self.username)
+        webscraper.input_write(selector="input#password", text=self.password)
+        # Click en el botón de login
+        webscraper.click(selector="button[type='submit']")
+        session.record_login()
+        # Abre la URL del Scheduler y espera a que se pinte el calendario
+        webscraper.navigate(url=SCHEDULE_URL)
+        ready = _wait_for_selector(
+            webscraper, (SCHEDULE_READY_SELECTOR,), cancellation, fallback=SCHEDULE_READY_SELECTOR
+        )
+        if ready is None:
+            raise RuntimeError("El calendario de reservas no se ha cargado tras iniciar sesión.")
+
     def __calc_day_index_from_today(self, date_to_check: str) -> int:
-        """ Calcula el índice del día a partir de hoy (1 = hoy, 2 = mañana, etc.), sin importar la hora, solo el
+        """Calcula el índice del día a partir de hoy (1 = hoy, 2 = mañana, etc.), sin importar la hora, solo el
         cambio de día.
         """
         today = datetime.today()
@@ -92,49 +197,6 @@ class AWEnginePadelCheckerVigoTwelve(AWEngineBase):
         delta_days = (check_date.date() - today.date()).days
         return delta_days + 1  # +1 porque el índice empieza en 1
 
-
-    def __build_spatially_schema_json(self) -> dict:
-
-        cell_time_labels = [
-            "09:00-09:30", "09:30-10:00", "10:00-10:30", "10:30-11:00", "11:00-11:30", "11:30-12:00",
-            "12:00-12:30", "12:30-13:00", "13:00-13:30", "13:30-14:00", "14:00-14:30", "14:30-15:00",
-            "15:00-15:30", "15:30-16:00", "16:00-16:30", "16:30-17:00", "17:00-17:30", "17:30-18:00",
-            "18:00-18:30", "18:30-19:00", "19:00-19:30", "19:30-20:00", "20:00-20:30", "20:30-21:00",
-            "21:00-21:30", "21:30-22:00", "22:00-22:30", "22:30-23:00", "23:00-23:30", "23:30-00:00"
-        ]
-
-        return {
-            "name": "pistas-twelve-vigo",
-            "description": "Esquema espacial para analizar la disponibilidad de pistas de pádel en Twelve Vigo, con 12"
-                           "pistas (1-12) y franjas horarias de 30 minutos desde las 09:00 hasta las 00:00.",
-            "config": {
-                "sample_mode": "majority",
-                "sample_radius": 10,
-                "tolerance": 18,
-                "clamp_coords": True,
-                "window_span": 3,
-                "coords_step": [93, 0],
-                "default_colormap": {
-                    "#FFFFFF": True,
-                    "#D9D9D9": False
-                }
-            },
-            "data": [
-                *[{"label": f"1-{l}",  **({"coords": [437, 62]}  if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"2-{l}",  **({"coords": [437, 102]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"3-{l}",  **({"coords": [437, 142]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"4-{l}",  **({"coords": [437, 182]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"5-{l}",  **({"coords": [437, 222]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"6-{l}",  **({"coords": [437, 262]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"7-{l}",  **({"coords": [437, 302]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"8-{l}",  **({"coords": [437, 342]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"9-{l}",  **({"coords": [437, 382]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"10-{l}", **({"coords": [437, 422]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"11-{l}", **({"coords": [437, 462]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-                *[{"label": f"12-{l}", **({"coords": [437, 502]} if i == 0 else {}) } for i, l in enumerate(cell_time_labels)],
-            ]
-        }
-
     def __process_extracted_data(self, extracted_data):
         """
         Para cda elemento de la lista extracted_data[available_windows] extrae la información de la pista, la hora de
@@ -168,3 +230,63 @@ class AWEnginePadelCheckerVigoTwelve(AWEngineBase):
             except Exception as e:
                 pass
         return result
+
+
+# region Utils
+
+
+def _wait_for_selector(
+    webscraper, selectors: tuple[str, ...], cancellation: CancellationToken, *, fallback: str | None = None
+) -> str | None:
+    """
+    Waits until one of `selectors` is in the page and returns it, or None after PAGE_READY_TIMEOUT seconds. If the
+    WebScraper has no Selenium driver to query the DOM, returns `fallback` without checking anything (after waiting
+    PAGE_READY_FALLBACK_WAIT seconds for the page to load when there is a fallback).
+    """
+    deadline = time.monotonic() + PAGE_READY_TIMEOUT
+    while True:
+        cancellation.raise_if_cancelled()
+        for selector in selectors:
+            present = _is_selector_present(webscraper, selector)
+            if present is None:
+                if fallback is not None and cancellation.wait(PAGE_READY_FALLBACK_WAIT):
+                    cancellation.raise_if_cancelled()
+                return fallback
+            if present:
+                return selector
+        if time.monotonic() >= deadline:
+            return None
+        if cancellation.wait(PAGE_READY_POLL_INTERVAL):
+            cancellation.raise_if_cancelled()
+
+
+def _is_selector_present(webscraper, selector: str) -> bool | None:
+    """Whether a CSS selector matches an element of the page (through the Selenium driver), None if unknown."""
+    driver = getattr(webscraper, "driver", None)
+    if driver is None:
+        return None
+    return bool(driver.find_elements("css selector", selector))
+
+
+def _discard_session(session: BrowserSession) -> None:
+    """
+    Teardown hook: closes the browser of a cancelled check right away and keeps it out of the pool (the pool does not
+    close it again on release).
+    """
+    session.discard()
+    session.close()
+
+
+def _close_webscraper(webscraper) -> None:
+    """Closes the browser of a WebScraper (evicted or cancelled session)."""
+    for method_name in ("close", "quit"):
+        method = getattr(webscraper, method_name, None)
+        if callable(method):
+            method()
+            return
+    driver = getattr(webscraper, "driver", None)
+    if driver is not None:
+        driver.quit()
+
+
+# endregion
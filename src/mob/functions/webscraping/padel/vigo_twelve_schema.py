@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from functools import cache
+
+from mob.utils.availability_grid import AvailabilityGrid
+
+# fmt: off
+CELL_TIME_LABELS = [
+    "09:00-09:30", "09:30-10:00", "10:00-10:30", "10:30-11:00", "11:00-11:30", "11:30-12:00",
+    "12:00-12:30", "12:30-13:00", "13:00-13:30", "13:30-14:00", "14:00-14:30", "14:30-15:00",
+    "15:00-15:30", "15:30-16:00", "16:00-16:30", "16:30-17:00", "17:00-17:30", "17:30-18:00",
+    "18:00-18:30", "18:30-19:00", "19:00-19:30", "19:30-20:00", "20:00-20:30", "20:30-21:00",
+    "21:00-21:30", "21:30-22:00", "22:00-22:30", "22:30-23:00", "23:00-23:30", "23:30-00:00",
+]
+# fmt: on
+COURTS = 12
+# Coordenadas de la primera franja de la pista 1 en la captura y separación vertical entre pistas
+FIRST_CELL_COORDS = (437, 62)
+COURT_ROW_HEIGHT = 40
+
+
+def _first_cell_coords(court: int) -> list[int]:
+    return [FIRST_CELL_COORDS[0], FIRST_CELL_COORDS[1] + (court - 1) * COURT_ROW_HEIGHT]
+
+
+SPATIALLY_SCHEMA = {
+    "name": "pistas-twelve-vigo",
+    "description": (
+        "Esquema espacial para analizar la disponibilidad de pistas de pádel en Twelve Vigo, con 12"
+        "pistas (1-12) y franjas horarias de 30 minutos desde las 09:00 hasta las 00:00."
+    ),
+    "config": {
+        "sample_mode": "majority",
+        "sample_radius": 10,
+        "tolerance": 18,
+        "clamp_coords": True,
+        "window_span": 3,
+        "coords_step": [93, 0],
+        "default_colormap": {"#FFFFFF": True, "#D9D9D9": False},
+    },
+    # La primera franja de cada pista fija sus coordenadas; el resto se desplazan coords_step desde la anterior
+    "data": [
+        {"label": f"{court}-{label}", **({"coords": _first_cell_coords(court)} if i == 0 else {})}
+        for court in range(1, COURTS + 1)
+        for i, label in enumerate(CELL_TIME_LABELS)
+    ],
+}
+
+
+@cache
+def get_availability_grid() -> AvailabilityGrid:
+    """Índice precalculado de las 12x30 celdas del calendario, construido una sola vez por proceso."""
+    return AvailabilityGrid.from_payload(SPATIALLY_SCHEMA)
@@ -1,15 +1,47 @@
 from .actions import (
     ActionConfig,
+    ActionPlan,
+    BatchItemResponse,
+    BatchOrderRequest,
+    BatchOrderResponse,
+    CacheInvalidationRequest,
+    CachePolicy,
+    CompiledCallable,
     ConfigRepository,
+    ConfigSnapshot,
+    ExecutionResult,
     FunctionRegistry,
+    OrderError,
     OrderRequest,
     OrderResponse,
+    PrewarmEntry,
+    PrewarmReport,
 )
+from .files import ResultFile, ResultFileError
+from .jobs import FINISHED_JOB_STATES, JobAccepted, JobInfo, JobState
 
 __all__ = [
     "ActionConfig",
+    "ActionPlan",
+    "BatchItemResponse",
+    "BatchOrderRequest",
+    "BatchOrderResponse",
+    "CacheInvalidationRequest",
+    "CachePolicy",
+    "CompiledCallable",
+    "OrderError",
     "OrderRequest",
     "OrderResponse",
     "ConfigRepository",
+    "ConfigSnapshot",
+    "ExecutionResult",
     "FunctionRegistry",
+    "PrewarmEntry",
+    "PrewarmReport",
+    "FINISHED_JOB_STATES",
+    "JobAccepted",
+    "JobInfo",
+    "JobState",
+    "ResultFile",
+    "ResultFileError",
 ]
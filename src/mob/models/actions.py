@@ -1,12 +1,22 @@
 from __future__ import annotations
 
 import importlib
+import inspect
 import json
+import os
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
 from pathlib import Path
-from typing import Any, Callable, Dict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Mapping
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+from mob.logger.logger import get_logger
+from mob.utils.file_watcher import FileWatcher, create_file_watcher
 
 # region Constants
 
@@ -17,6 +27,29 @@ FUNCTIONS_PACKAGE = "functions"
 # endregion
 
 
+logger = get_logger("models.actions")
+
+
+class CachePolicy(BaseModel):
+    """Result cache of an idempotent action: successful results are reused for `ttl` seconds."""
+
+    model_config = ConfigDict(frozen=True)
+
+    ttl: float = Field(..., gt=0, description="Seconds a cached result stays valid.")
+    max_entries: int = Field(default=128, ge=1, description="Results kept per action (least recently used evicted).")
+    max_bytes: int | None = Field(
+        default=None,
+        ge=1,
+        description="Approximate size (JSON bytes) of the results kept per action, least recently used evicted first. "
+        "Unbounded when omitted; larger results are not cached.",
+    )
+    key_fields: tuple[str, ...] | None = Field(
+        default=None,
+        description="Payload fields identifying a result (e.g. the date of a padel search). The whole payload is "
+        "used when omitted.",
+    )
+
+
 class ActionConfig(BaseModel):
     """Describes how to execute an action defined inside api_config.json."""
 
@@ -25,6 +58,39 @@ class ActionConfig(BaseModel):
     function: str
     environment: Dict[str, Any] = Field(default_factory=dict)
     checker_interval: float | None = None
+    check_on_public_ip_change: bool = Field(
+        default=False,
+        description="Also run the checker as soon as the shared public IP service sees a new address, instead of "
+        "only every checker_interval seconds (e.g. dynamic DNS updaters).",
+    )
+    executor: str = Field(
+        default="default",
+        description="Executor class (thread pool) running the function when it is synchronous: default, io, cpu, "
+        "browser, llm or any custom class sized through EXECUTOR_POOLS. 'process' runs the function (sync or async) "
+        "in a warm worker process instead.",
+    )
+    max_concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Maximum executions of this action running at the same time (unlimited when omitted).",
+    )
+    max_queue: int | None = Field(
+        default=None,
+        ge=0,
+        description="Maximum callers waiting for a free slot when max_concurrency is reached (unbounded when "
+        "omitted). Extra callers are rejected right away.",
+    )
+    coalesce: bool = Field(
+        default=False,
+        description="Concurrent orders with the same payload share one in-flight execution and its result. Meant "
+        "for read-only actions.",
+    )
+    context_fields: tuple[str, ...] = Field(
+        default=(),
+        description="Payload fields carrying the context of the caller rather than what is asked (e.g. the "
+        "conversation Discord orders attach). They are left out of the coalescing and result cache keys.",
+    )
+    cache: CachePolicy | None = Field(default=None, description="Optional result cache for idempotent actions.")
 
     def resolved_timeout(self, fallback: float) -> float:
         return self.timeout or fallback
@@ -33,12 +99,24 @@ class ActionConfig(BaseModel):
 class OrderRequest(BaseModel):
     """Incoming payload for a /order request."""
 
+    model_config = ConfigDict(populate_by_name=True)
+
     action: str = Field(..., description="Name of the action to execute.")
     passkey: str | None = Field(default=None, description="Optional secret required by some ai.")
     payload: Dict[str, Any] | None = Field(
         default=None,
         description="Runtime payload forwarded to the target function.",
     )
+    run_async: bool = Field(
+        default=False,
+        alias="async",
+        description="Run the order as a background job: the response is a job id to poll at /order/jobs/{id}.",
+    )
+    inline_files: bool = Field(
+        default=False,
+        description="Also embed result files as base64 when they are below RESULT_FILES_INLINE_MAX_BYTES. Files are "
+        "always available for download at their URL.",
+    )
 
 
 class OrderResponse(BaseModel):
@@ -48,18 +126,96 @@ class OrderResponse(BaseModel):
     status: str
     result: Any
     duration_ms: float
+    queue_ms: float = 0.0
+    execution_ms: float = 0.0
+    serialization_ms: float = 0.0
+    coalesced: bool = False
+    cached: bool = False
+    cache_age_ms: float | None = None
+    replayed: bool = False
+
+
+class OrderError(BaseModel):
+    """Error of an order that is not reported as an HTTP error response (background jobs, batch items)."""
+
+    status_code: int
+    detail: str
+
+
+class BatchOrderRequest(BaseModel):
+    """Incoming payload for a /order/batch request."""
+
+    orders: list[OrderRequest] = Field(..., min_length=1, max_length=50, description="Orders to execute.")
+    max_concurrency: int | None = Field(
+        default=None,
+        ge=1,
+        description="Orders of the batch running at the same time (capped by the BATCH_MAX_CONCURRENCY setting).",
+    )
+
+
+class BatchItemResponse(BaseModel):
+    """Outcome of one order of a batch: its response or its error."""
+
+    index: int
+    action: str
+    status: str
+    response: OrderResponse | None = None
+    error: OrderError | None = None
+    duration_ms: float
+
+
+class BatchOrderResponse(BaseModel):
+    """Response of a /order/batch request, with one item per order (in request order)."""
+
+    items: list[BatchItemResponse]
+    succeeded: int
+    failed: int
+    duration_ms: float
+
+
+class CacheInvalidationRequest(BaseModel):
+    """Incoming payload for a /order/cache/invalidate request."""
+
+    action: str = Field(..., description="Name of the action whose cached results are dropped.")
+    passkey: str | None = Field(default=None, description="Optional secret required by some ai.")
+    payload: Dict[str, Any] | None = Field(
+        default=None,
+        description="Drops only the result cached for this payload. Every result of the action when omitted.",
+    )
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """Immutable, versioned view of api_config.json published by ConfigRepository."""
+
+    version: int
+    actions: Mapping[str, ActionConfig]
+    mtime: float
+    loaded_at: float
+    parse_ms: float
+    reload_latency_ms: float
+    sanitized_json: str
+    sanitized_json_compact: str
 
 
 class ConfigRepository:
-    """Lazy loader + cache for api_config.json."""
+    """
+    Lazy loader + cache for api_config.json.
+
+    By default every read checks the file mtime. Once `start_watching` is called, a background watcher publishes a
+    new snapshot whenever the file changes and readers just take the current snapshot reference (no syscall, no
+    lock).
+    """
 
     def __init__(self, source_path: Path):
         self.source_path = source_path
-        self._cached_actions: dict[str, ActionConfig] | None = None
-        self._cache_mtime: float | None = None
+        self._snapshot: ConfigSnapshot | None = None
+        self._file_signature: tuple[int, int, int] | None = None
+        self._last_error: Exception | None = None
+        self._watcher: FileWatcher | None = None
         self._lock = threading.Lock()
 
-    def _read_from_disk(self) -> dict[str, ActionConfig]:
+    def _read_from_disk(self) -> tuple[dict[str, Any], dict[str, ActionConfig]]:
         if not self.source_path.exists():
             raise FileNotFoundError(f"api_config.json not found at {self.source_path!s}")
 
@@ -76,44 +232,314 @@ class ConfigRepository:
                 raise ValueError(f"Action '{action_name}' must be defined with an object value.")
             actions[action_name] = ActionConfig(**action_payload)
 
-        return actions
+        return raw_data, actions
 
-    def get_actions(self) -> dict[str, ActionConfig]:
-        """
-        Returns every configured action, refreshing the cache only when the file
-        changes on disk.
-        """
+    def _stat(self) -> os.stat_result:
         try:
-            mtime = self.source_path.stat().st_mtime
+            return self.source_path.stat()
         except FileNotFoundError as exc:
             raise FileNotFoundError(f"api_config.json not found at {self.source_path!s}") from exc
 
+    def _reload_if_changed(self, stat_result: os.stat_result) -> ConfigSnapshot:
+        """Publishes a new snapshot when the file signature changed. Must be called holding `_lock`."""
+        signature = (stat_result.st_mtime_ns, stat_result.st_size, stat_result.st_ino)
+        if self._snapshot is not None and signature == self._file_signature:
+            return self._snapshot
+
+        started = time.perf_counter()
+        raw_data, actions = self._read_from_disk()
+        # Sanitized copies are rendered once per version: prompts ask for them on every message
+        sanitized_data = _remove_sensitive_fields(raw_data)
+        parse_ms = (time.perf_counter() - started) * 1000
+        loaded_at = time.time()
+        self._snapshot = ConfigSnapshot(
+            version=(self._snapshot.version + 1) if self._snapshot else 1,
+            actions=MappingProxyType(actions),
+            mtime=stat_result.st_mtime,
+            loaded_at=loaded_at,
+            parse_ms=round(parse_ms, 3),
+            reload_latency_ms=round(max(loaded_at - stat_result.st_mtime, 0.0) * 1000, 3),
+            sanitized_json=json.dumps(sanitized_data, indent=2),
+            sanitized_json_compact=json.dumps(sanitized_data, separators=(",", ":"), ensure_ascii=False),
+        )
+        self._file_signature = signature
+        self._last_error = None
+        logger.debug("Loaded api_config.json version %s in %.2f ms", self._snapshot.version, parse_ms)
+        return self._snapshot
+
+    def _on_file_change(self) -> None:
+        """Watcher callback: reloads the file, keeping the last good snapshot when the new content is invalid."""
         with self._lock:
-            if self._cached_actions is None or self._cache_mtime is None or mtime != self._cache_mtime:
-                self._cached_actions = self._read_from_disk()
-                self._cache_mtime = mtime
+            try:
+                self._reload_if_changed(self._stat())
+            except (FileNotFoundError, ValueError) as exc:
+                self._last_error = exc
+                logger.error("Could not reload api_config.json, keeping the previous snapshot: %s", exc)
+
+    def start_watching(self, mode: str = "auto", poll_interval: float = 1.0) -> None:
+        """Loads the first snapshot and starts publishing new ones from a background watcher."""
+        if self._watcher is not None:
+            return
+        self._watcher = create_file_watcher(
+            self.source_path, self._on_file_change, mode=mode, poll_interval=poll_interval
+        )
+        self._watcher.start()
+        self._on_file_change()
+        logger.info("Watching %s for changes (%s)", self.source_path, self._watcher.mode)
+
+    def stop_watching(self) -> None:
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.stop()
+
+    def get_snapshot(self) -> ConfigSnapshot:
+        """Returns the current configuration snapshot."""
+        if self._watcher is not None:
+            snapshot = self._snapshot
+            if snapshot is None:
+                raise self._last_error or FileNotFoundError(f"api_config.json not found at {self.source_path!s}")
+            return snapshot
+
+        stat_result = self._stat()
+        with self._lock:
+            return self._reload_if_changed(stat_result)
+
+    def get_actions(self) -> Mapping[str, ActionConfig]:
+        """
+        Returns every configured action, refreshing the cache only when the file
+        changes on disk.
+        """
+        return self.get_snapshot().actions
+
+    def stats(self) -> dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "source_path": str(self.source_path),
+            "watch_mode": self._watcher.mode if self._watcher is not None else None,
+            "version": snapshot.version if snapshot else None,
+            "mtime": snapshot.mtime if snapshot else None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "parse_ms": snapshot.parse_ms if snapshot else None,
+            "reload_latency_ms": snapshot.reload_latency_ms if snapshot else None,
+            "last_error": str(self._last_error) if self._last_error else None,
+        }
+
+
+KwargsAdapter = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class CompiledCallable:
+    """A resolved callable plus everything needed to invoke it without introspecting it again."""
+
+    target: str
+    func: Callable[..., Any]
+    is_async: bool
+    kwargs_adapter: KwargsAdapter
+    accepts_cancellation: bool = False
+    is_stream: bool = False
+
+    @classmethod
+    def from_callable(cls, func: Callable[..., Any], target: str = "") -> CompiledCallable:
+        parameters = inspect.signature(func).parameters
+        accepts_environment = "environment" in parameters
+        accepts_payload = "payload" in parameters
+        if accepts_environment and accepts_payload:
+            adapter = _kwargs_environment_and_payload
+        elif accepts_environment:
+            adapter = _kwargs_environment_only
+        elif accepts_payload:
+            adapter = _kwargs_payload_only
+        else:
+            # When the function does not declare expected keywords, send them anyway.
+            adapter = _kwargs_environment_and_payload
+        return cls(
+            target=target or f"{func.__module__}:{func.__qualname__}",
+            func=func,
+            is_async=inspect.iscoroutinefunction(func),
+            kwargs_adapter=adapter,
+            accepts_cancellation="cancellation" in parameters,
+            is_stream=inspect.isasyncgenfunction(func),
+        )
+
+    def build_kwargs(
+        self, environment: Dict[str, Any], payload: Dict[str, Any], cancellation: Any = None
+    ) -> Dict[str, Any]:
+        kwargs = self.kwargs_adapter(environment, payload)
+        if self.accepts_cancellation and cancellation is not None:
+            kwargs["cancellation"] = cancellation
+        return kwargs
+
+
+@dataclass(frozen=True)
+class ActionPlan:
+    """Execution plan of a configured action, compiled once per configuration snapshot."""
+
+    name: str
+    config: ActionConfig
+    function: CompiledCallable
+    checker: CompiledCallable | None
+    message_mode: FUNCTION_OUTPUT_MESSAGE_MODES | None
+    timeout: float
+
+
+@dataclass(frozen=True)
+class PrewarmEntry:
+    """Outcome of resolving one configured action during the startup prewarm."""
+
+    action: str
+    target: str
+    module: str
+    import_ms: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+@dataclass(frozen=True)
+class PrewarmReport:
+    """Startup report listing how long each configured function took to import and which ones failed."""
+
+    config_version: int
+    entries: list[PrewarmEntry]
+    duration_ms: float
+
+    @property
+    def failures(self) -> list[PrewarmEntry]:
+        return [entry for entry in self.entries if not entry.ok]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "config_version": self.config_version,
+            "duration_ms": self.duration_ms,
+            "entries": [{**asdict(entry), "ok": entry.ok} for entry in self.entries],
+        }
 
-            return self._cached_actions
+
+@dataclass(frozen=True)
+class ExecutionResult:
+    """Value returned by an action plus how long it waited for a slot and how long it ran."""
+
+    value: Any
+    queue_ms: float
+    execution_ms: float
+    coalesced: bool = False
+    cached: bool = False
+    cache_age_ms: float | None = None
 
 
 class FunctionRegistry:
-    """Caches imports for action callables."""
+    """Caches imports for action callables and the execution plans built from them."""
 
     _cache: dict[str, Callable[..., Any]] = {}
+    _plans: dict[str, ActionPlan] = {}
+    _plans_snapshot: ConfigSnapshot | None = None
     _lock = threading.Lock()
 
     @classmethod
     def resolve(cls, target: str, checker: bool = False) -> Callable[..., Any]:
         input_key = f"{target}|checker={checker}"
+        cached = cls._cache.get(input_key)
+        if cached is not None:
+            return cached
+        # Import outside the registry lock (the import system already locks per module), so unrelated modules can
+        # be imported concurrently
+        func = cls._import_target(target, checker)
         with cls._lock:
-            if input_key not in cls._cache:
-                cls._cache[input_key] = cls._import_target(target, checker)
-            return cls._cache[input_key]
+            return cls._cache.setdefault(input_key, func)
+
+    @classmethod
+    def get_plan(cls, action_name: str, snapshot: ConfigSnapshot, *, default_timeout: float) -> ActionPlan:
+        """
+        Returns the compiled plan for an action of the given snapshot. Plans are compiled on first use and dropped as
+        soon as a newer snapshot is requested, so the hot path is a plain dict lookup.
+        """
+        if cls._plans_snapshot is snapshot:
+            plan = cls._plans.get(action_name)
+            if plan is not None:
+                return plan
+
+        plan = cls._compile_plan(action_name, snapshot.actions[action_name], default_timeout)
+        with cls._lock:
+            if cls._plans_snapshot is not snapshot:
+                cls._plans = {}
+                cls._plans_snapshot = snapshot
+            if action_name not in cls._plans:
+                # Copy-on-write so lock-free readers never observe a dict being resized
+                cls._plans = {**cls._plans, action_name: plan}
+            return cls._plans[action_name]
+
+    @classmethod
+    def prewarm(cls, snapshot: ConfigSnapshot, *, default_timeout: float, max_workers: int = 1) -> PrewarmReport:
+        """
+        Imports every configured function (and checker) and compiles its plan ahead of the first request. Entries
+        that cannot be resolved are collected in the report instead of raising.
+        """
+        started = time.perf_counter()
+        if max_workers > 1:
+            with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mob-prewarm") as executor:
+                entries = list(
+                    executor.map(lambda name: cls._prewarm_action(name, snapshot, default_timeout), snapshot.actions)
+                )
+        else:
+            entries = [cls._prewarm_action(name, snapshot, default_timeout) for name in snapshot.actions]
+        return PrewarmReport(
+            config_version=snapshot.version,
+            entries=entries,
+            duration_ms=round((time.perf_counter() - started) * 1000, 3),
+        )
+
+    @classmethod
+    def _prewarm_action(cls, action_name: str, snapshot: ConfigSnapshot, default_timeout: float) -> PrewarmEntry:
+        action_config = snapshot.actions[action_name]
+        module_path, _ = _split_function_target(action_config.function, False)
+        dotted_path = f"mob.{FUNCTIONS_PACKAGE}.{module_path}"
+        started = time.perf_counter()
+        error = None
+        try:
+            plan = cls.get_plan(action_name, snapshot, default_timeout=default_timeout)
+            if action_config.checker_interval and plan.checker is None:
+                error = "Checker could not be resolved."
+        except Exception as exc:
+            # Any failure (a module raising at import, a bad signature...) fails this entry, never the whole prewarm
+            error = f"{exc} ({exc.__cause__})" if exc.__cause__ else str(exc)
+        return PrewarmEntry(
+            action=action_name,
+            target=action_config.function,
+            module=dotted_path,
+            import_ms=round((time.perf_counter() - started) * 1000, 3),
+            error=error,
+        )
 
     @classmethod
     def clear(cls) -> None:
         with cls._lock:
             cls._cache.clear()
+            cls._plans = {}
+            cls._plans_snapshot = None
+
+    @classmethod
+    def _compile_plan(cls, action_name: str, action_config: ActionConfig, default_timeout: float) -> ActionPlan:
+        func = cls.resolve(action_config.function)
+
+        checker = None
+        if action_config.checker_interval:
+            try:
+                checker = CompiledCallable.from_callable(cls.resolve(action_config.function, checker=True))
+            except RuntimeError:
+                logger.exception("Failed to resolve checker for action %s", action_name)
+
+        handler_module = importlib.import_module(func.__module__)
+        return ActionPlan(
+            name=action_name,
+            config=action_config,
+            function=CompiledCallable.from_callable(func),
+            checker=checker,
+            message_mode=getattr(handler_module, "DEFAULT_FUNCTION_OUTPUT_MESSAGE_MODE", None),
+            timeout=action_config.resolved_timeout(default_timeout),
+        )
 
     @staticmethod
     def _import_target(target: str, checker: bool) -> Callable[..., Any]:
@@ -121,7 +547,8 @@ class FunctionRegistry:
         dotted_path = f"mob.{FUNCTIONS_PACKAGE}.{module_path}"
         try:
             module = importlib.import_module(dotted_path)
-        except ImportError as exc:
+        except Exception as exc:
+            # Not only ImportError: a module may fail on its own code at import time
             raise RuntimeError(f"Cannot import module '{dotted_path}'.") from exc
 
         try:
@@ -133,6 +560,15 @@ class FunctionRegistry:
 # region Utils
 
 
+def _remove_sensitive_fields(obj: Any) -> Any:
+    """Drops 'sensitive' fields (those starting with '_') at any depth."""
+    if isinstance(obj, dict):
+        return {key: _remove_sensitive_fields(value) for key, value in obj.items() if not key.startswith("_")}
+    if isinstance(obj, list):
+        return [_remove_sensitive_fields(item) for item in obj]
+    return obj
+
+
 def _split_function_target(target: str, checker: bool) -> tuple[str, str]:
     """
     Splits the configured function string into module + attribute parts. When an
@@ -149,4 +585,16 @@ def _split_function_target(target: str, checker: bool) -> tuple[str, str]:
     return module_path, attr_name
 
 
+def _kwargs_environment_and_payload(environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"environment": environment, "payload": payload}
+
+
+def _kwargs_environment_only(environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"environment": environment}
+
+
+def _kwargs_payload_only(environment: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    return {"payload": payload}
+
+
 # endregion
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+
+class ResultFile(BaseModel):
+    """File produced by an order, kept in the result file store and downloadable from `url`."""
+
+    file_id: str = Field(..., description="Content address of the file (SHA-256 of its bytes plus its extension).")
+    filename: str
+    content_type: str
+    size: int
+    url: str = Field(..., description="Download URL (supports HTTP Range requests).")
+    expires_at: float = Field(..., description="Epoch seconds after which the file may be removed.")
+    content: str | None = Field(
+        default=None,
+        description="Base64 content, only when the order asked for inline files and the file is small enough.",
+    )
+
+
+class ResultFileError(BaseModel):
+    """File produced by an order that could not be kept in the result file store."""
+
+    filename: str
+    error: str
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from mob.models.actions import OrderError, OrderResponse
+
+JobState = Literal["queued", "running", "succeeded", "failed", "cancelled"]
+
+FINISHED_JOB_STATES: frozenset[str] = frozenset({"succeeded", "failed", "cancelled"})
+
+
+class JobInfo(BaseModel):
+    """State of an order executed in the background (`POST /order` with `"async": true`)."""
+
+    job_id: str
+    action: str
+    status: JobState = "queued"
+    created_at: float = Field(..., description="Epoch seconds when the job was accepted.")
+    started_at: float | None = None
+    finished_at: float | None = None
+    response: OrderResponse | None = None
+    error: OrderError | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_JOB_STATES
+
+
+class JobAccepted(BaseModel):
+    """Response of an order accepted as a background job."""
+
+    job_id: str
+    action: str
+    status: JobState
+    status_url: str
@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+
+class ActionOverloadedError(RuntimeError):
+    """Raised when an action cannot be admitted: all its slots are busy and its wait queue is full."""
+
+    def __init__(self, action: str, message: str):
+        super().__init__(message)
+        self.action = action
+
+
+class _Waiter:
+    """A caller queued for a slot. `granted` is only changed under the limiter lock: it is the source of truth."""
+
+    __slots__ = ("loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.future: asyncio.Future[None] = loop.create_future()
+        self.granted = False
+
+
+class ActionLimiter:
+    """
+    Caps the concurrent executions of one action, with a bounded queue of callers waiting for a slot.
+
+    The limiter is process-wide: the API, the scheduler and the Discord bot run their own event loops, so the counters
+    are guarded by a thread lock and a released slot is handed to the oldest waiter on whichever loop it waits.
+    """
+
+    def __init__(self, action: str, max_concurrency: int, max_queue: int | None):
+        self.action = action
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._lock = threading.Lock()
+        self._waiters: deque[_Waiter] = deque()
+        self._active = 0
+        self._admitted = 0
+        self._rejected = 0
+
+    @asynccontextmanager
+    async def admit(self, max_wait: float | None = None) -> AsyncIterator[float]:
+        """Waits for a free slot (at most `max_wait` seconds) and yields the time spent queued, in milliseconds."""
+        started = time.perf_counter()
+        await self._acquire(max_wait)
+        try:
+            yield (time.perf_counter() - started) * 1000
+        finally:
+            self._release()
+
+    async def _acquire(self, max_wait: float | None) -> None:
+        with self._lock:
+            waiting = len(self._waiters)
+            if self.max_queue is not None and self._active + waiting >= self.max_concurrency + self.max_queue:
+                self._rejected += 1
+                raise ActionOverloadedError(
+                    self.action,
+                    f"Action '{self.action}' is at capacity ({self._active} running, {waiting} queued).",
+                )
+            if self._active < self.max_concurrency and not waiting:
+                self._active += 1
+                self._admitted += 1
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+
+        try:
+            await asyncio.wait_for(waiter.future, timeout=max_wait)
+        except BaseException as exc:
+            with self._lock:
+                granted = waiter.granted
+                if not granted:
+                    self._waiters.remove(waiter)
+                    self._rejected += 1
+            if granted:
+                # The slot was handed over while timing out or being cancelled: pass it on
+                self._release()
+            if isinstance(exc, asyncio.TimeoutError):
+                raise ActionOverloadedError(
+                    self.action, f"Action '{self.action}' waited more than {max_wait} seconds for a free slot."
+                ) from None
+            raise
+
+    def _release(self) -> None:
+        with self._lock:
+            while self._waiters:
+                waiter = self._waiters.popleft()
+                try:
+                    waiter.loop.call_soon_threadsafe(_wake, waiter.future)
+                except RuntimeError:
+                    # Its loop is closed, so nobody is waiting anymore
+                    continue
+                # The slot goes straight to the waiter: `_active` stays the same
+                waiter.granted = True
+                self._admitted += 1
+                return
+            self._active -= 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_concurrency": self.max_concurrency,
+                "max_queue": self.max_queue,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+            }
+
+    def _idle(self) -> bool:
+        with self._lock:
+            return not self._active and not self._waiters
+
+
+class AdmissionController:
+    """Process-wide registry of action limiters. A limiter is replaced as soon as the configured limits change."""
+
+    _limiters: dict[tuple[str, int, int | None], ActionLimiter] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_limiter(cls, action: str, max_concurrency: int, max_queue: int | None) -> ActionLimiter:
+        key = (action, max_concurrency, max_queue)
+        limiter = cls._limiters.get(key)
+        if limiter is not None:
+            return limiter
+        with cls._lock:
+            limiter = cls._limiters.get(key)
+            if limiter is None:
+                # Drop limiters of previous configurations once they are idle
+                for old_key in [k for k, v in cls._limiters.items() if k[0] == action and v._idle()]:
+                    del cls._limiters[old_key]
+                limiter = cls._limiters[key] = ActionLimiter(action, max_concurrency, max_queue)
+            return limiter
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, Any]]:
+        """Counters per action, summed over the limiters of old configurations still draining."""
+        with cls._lock:
+            limiters = list(cls._limiters.items())
+        stats: dict[str, dict[str, Any]] = {}
+        for (action, _, _), limiter in limiters:
+            limiter_stats = limiter.stats()
+            current = stats.get(action)
+            if current is None:
+                stats[action] = limiter_stats
+                continue
+            for counter in ("active", "queued", "admitted", "rejected"):
+                current[counter] += limiter_stats[counter]
+            current["max_concurrency"] = limiter_stats["max_concurrency"]
+            current["max_queue"] = limiter_stats["max_queue"]
+        return stats
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._limiters.clear()
+
+
+def _wake(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Hashable, Iterator
+
+from mob.logger.logger import get_logger
+from mob.runtime.cancellation import CancellationToken
+
+logger = get_logger("runtime.browser_sessions")
+
+# region Constants
+
+DEFAULT_BROWSER_SESSION_MAX = 2
+DEFAULT_BROWSER_SESSION_IDLE_TTL_SECONDS = 600.0
+DEFAULT_BROWSER_SESSION_ACQUIRE_TIMEOUT_SECONDS = 120.0
+
+# Granularity of the waits for a free session, so a cancelled caller stops waiting promptly
+_ACQUIRE_POLL_SECONDS = 0.25
+_MIN_SWEEP_INTERVAL_SECONDS = 1.0
+
+# endregion
+
+
+class BrowserSessionPoolExhaustedError(TimeoutError):
+    """Raised when no browser session frees up within the acquire timeout (every session is in use)."""
+
+
+class BrowserSession:
+    """
+    One browser kept alive between executions. `key` identifies what the session is bound to (site and user), so
+    only callers with the same key reuse it and find it already logged in.
+    """
+
+    def __init__(self, pool: BrowserSessionPool, key: Hashable, browser: Any, close: Callable[[Any], Any]):
+        self.key = key
+        self.browser = browser
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.uses = 0
+        self._pool = pool
+        self._close = close
+        self._discarded = False
+        self._closed = False
+        self._close_lock = threading.Lock()
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the session was just created (nothing ran in it yet, so it is not logged in)."""
+        return self.uses == 0
+
+    @property
+    def discarded(self) -> bool:
+        return self._discarded
+
+    def discard(self) -> None:
+        """Closes the browser when it is released instead of returning it to the pool (broken or cancelled)."""
+        self._discarded = True
+
+    def record_login(self) -> None:
+        """Counts a login done in this session (a relogin when the session was reused)."""
+        self._pool._count("relogins" if not self.fresh else "logins")
+
+    def close(self) -> None:
+        """Closes the browser. Only the first call closes it (a cancellation hook may close it before the release)."""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+        try:
+            self._close(self.browser)
+        except Exception:
+            logger.warning("Closing browser session %r failed", self.key, exc_info=True)
+
+
+class BrowserSessionPool:
+    """
+    Pool of warm browser sessions shared by the executions of browser-driven functions, so they do not pay the
+    browser startup and the login on every call.
+
+    Sessions are leased to one caller at a time through `session()`, which creates one with `factory` when there is
+    no idle session for the key. At most `max_sessions` browsers are alive: at the cap, the least recently used idle
+    session of another key is closed to make room, or the caller waits for a session to be released. Sessions idle
+    for more than `idle_ttl` seconds are closed by a background sweeper, and sessions released after an error are
+    closed instead of reused. Whether a reused session is still logged in is up to the caller to check.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_sessions: int = DEFAULT_BROWSER_SESSION_MAX,
+        idle_ttl: float = DEFAULT_BROWSER_SESSION_IDLE_TTL_SECONDS,
+        acquire_timeout: float = DEFAULT_BROWSER_SESSION_ACQUIRE_TIMEOUT_SECONDS,
+    ):
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl = idle_ttl
+        self.acquire_timeout = acquire_timeout
+        self._condition = threading.Condition()
+        # Idle sessions, least recently used first
+        self._idle: list[BrowserSession] = []
+        self._in_use = 0
+        self._creating = 0
+        self._closed = False
+        self._stop_sweeper = threading.Event()
+        self._sweeper: threading.Thread | None = None
+        self._counters = {
+            "created": 0,
+            "reused": 0,
+            "logins": 0,
+            "relogins": 0,
+            "waits": 0,
+            "evicted_idle": 0,
+            "evicted_cap": 0,
+            "discarded": 0,
+            "failed_creations": 0,
+        }
+
+    @contextmanager
+    def session(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        *,
+        close: Callable[[Any], Any],
+        cancellation: CancellationToken | None = None,
+    ) -> Iterator[BrowserSession]:
+        """
+        Leases a session bound to `key`: an idle one if there is any, otherwise a new browser built by `factory` and
+        closed with `close` when evicted. The session goes back to the pool on exit, unless the block raised or
+        discarded it.
+        """
+        session = self._acquire(key, factory, close, cancellation)
+        try:
+            yield session
+        except BaseException:
+            session.discard()
+            raise
+        finally:
+            self._release(session)
+
+    def close(self) -> None:
+        """Closes the idle sessions now and the leased ones when they are released."""
+        with self._condition:
+            self._closed = True
+            sessions, self._idle = self._idle, []
+            self._condition.notify_all()
+        self._stop_sweeper.set()
+        for session in sessions:
+            session.close()
+
+    def evict_idle(self) -> int:
+        """Closes the sessions idle for more than `idle_ttl` seconds. Returns how many were closed."""
+        with self._condition:
+            expired = self._pop_expired()
+        for session in expired:
+            session.close()
+        return len(expired)
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            now = time.monotonic()
+            return {
+                **self._counters,
+                "max_sessions": self.max_sessions,
+                "idle_ttl": self.idle_ttl,
+                "sessions": len(self._idle) + self._in_use + self._creating,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "oldest_idle": round(now - self._idle[0].last_used, 3) if self._idle else None,
+            }
+
+    def _acquire(
+        self,
+        key: Hashable,
+        factory: Callable[[], Any],
+        close: Callable[[Any], Any],
+        cancellation: CancellationToken | None,
+    ) -> BrowserSession:
+        deadline = time.monotonic() + self.acquire_timeout
+        to_close: list[BrowserSession] = []
+        waited = False
+        try:
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("The browser session pool is closed.")
+                    to_close.extend(self._pop_expired())
+                    # Most recently used first: it is the one most likely to still be logged in
+                    for index in range(len(self._idle) - 1, -1, -1):
+                        if self._idle[index].key == key:
+                            session = self._idle.pop(index)
+                            self._in_use += 1
+                            self._counters["reused"] += 1
+                            return session
+                    if len(self._idle) + self._in_use + self._creating >= self.max_sessions and self._idle:
+                        to_close.append(self._idle.pop(0))
+                        self._counters["evicted_cap"] += 1
+                    if len(self._idle) + self._in_use + self._creating < self.max_sessions:
+                        self._creating += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise BrowserSessionPoolExhaustedError(
+                            f"No browser session was released within {self.acquire_timeout:g} seconds "
+                            f"({self._in_use} of {self.max_sessions} in use)."
+                        )
+                    if not waited:
+                        waited = True
+                        self._counters["waits"] += 1
+                    self._condition.wait(min(remaining, _ACQUIRE_POLL_SECONDS))
+                    if cancellation is not None:
+                        cancellation.raise_if_cancelled()
+        finally:
+            for session in to_close:
+                session.close()
+
+        # The browser starts outside the lock: other callers keep leasing idle sessions meanwhile
+        try:
+            browser = factory()
+        except BaseException:
+            with self._condition:
+                self._creating -= 1
+                self._counters["failed_creations"] += 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._creating -= 1
+            self._in_use += 1
+            self._counters["created"] += 1
+        return BrowserSession(self, key, browser, close)
+
+    def _release(self, session: BrowserSession) -> None:
+        with self._condition:
+            self._in_use -= 1
+            keep = not session.discarded and not self._closed
+            if keep:
+                session.uses += 1
+                session.last_used = time.monotonic()
+                self._idle.append(session)
+            elif session.discarded:
+                self._counters["discarded"] += 1
+            self._condition.notify()
+        if keep:
+            self._ensure_sweeper()
+        else:
+            session.close()
+
+    def _pop_expired(self) -> list[BrowserSession]:
+        """Removes the expired idle sessions. Called with the lock held."""
+        now = time.monotonic()
+        expired = [session for session in self._idle if now - session.last_used >= self.idle_ttl]
+        if expired:
+            self._idle = [session for session in self._idle if now - session.last_used < self.idle_ttl]
+            self._counters["evicted_idle"] += len(expired)
+            self._condition.notify_all()
+        return expired
+
+    def _ensure_sweeper(self) -> None:
+        with self._condition:
+            if self._sweeper is not None or self._closed:
+                return
+            self._sweeper = threading.Thread(target=self._sweep, name="mob-browser-sessions", daemon=True)
+        self._sweeper.start()
+
+    def _sweep(self) -> None:
+        interval = max(self.idle_ttl / 2, _MIN_SWEEP_INTERVAL_SECONDS)
+        while not self._stop_sweeper.wait(interval):
+            evicted = self.evict_idle()
+            if evicted:
+                logger.info("Closed %d idle browser session(s)", evicted)
+
+    def _count(self, name: str) -> None:
+        with self._condition:
+            self._counters[name] += 1
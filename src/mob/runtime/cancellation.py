@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import threading
+from typing import Any, Callable
+
+from mob.logger.logger import get_logger
+
+logger = get_logger("runtime.cancellation")
+
+
+class ActionCancelledError(Exception):
+    """Raised by functions that observe a cancelled token: the caller timed out or went away."""
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation contract between the runtime and action functions.
+
+    Functions declaring a `cancellation` keyword receive the token of their execution. The runtime cancels it when the
+    execution is cancelled (timeout, client gone, coalesced callers gone), which lets work running outside the event
+    loop stop early: sync functions poll `cancelled`/`raise_if_cancelled()` or sleep through `wait()`, and resources
+    that outlive a thread (browsers, remote sessions) register teardown hooks with `add_callback()`.
+
+    The runtime does not track local subprocesses: a function that spawns one must kill it, and its children, from a
+    teardown hook. Commands run in containers through `DockerClient.exec` are killed with their process group.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], Any]] = []
+        self.reason: str | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Marks the token as cancelled and runs the teardown hooks in a background thread (they may block)."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        if callbacks:
+            threading.Thread(
+                target=self._run_callbacks, args=(callbacks,), name="mob-cancellation", daemon=True
+            ).start()
+
+    def add_callback(self, callback: Callable[[], Any]) -> Callable[[], None]:
+        """
+        Registers a teardown hook, run once when the token is cancelled (right away if it already is). Returns a
+        function that unregisters it, to be called when the resource is released normally.
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        self._run_callbacks([callback])
+        return lambda: None
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise ActionCancelledError(f"Execution cancelled: {self.reason}.")
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Blocks up to `timeout` seconds (a cancellable `time.sleep`). Returns True when the token was cancelled."""
+        return self._event.wait(timeout)
+
+    def _remove_callback(self, callback: Callable[[], Any]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @staticmethod
+    def _run_callbacks(callbacks: list[Callable[[], Any]]) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Cancellation hook %r failed", callback)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Awaitable, Callable, Iterable, TypeVar
+
+from mob.logger.logger import get_logger
+from mob.utils.json import dumps_canonical
+
+logger = get_logger("runtime.coalescing")
+
+T = TypeVar("T")
+
+
+class _Flight:
+    """One in-flight execution shared by every caller with the same key."""
+
+    __slots__ = ("loop", "task", "future", "waiters")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.task: asyncio.Task | None = None
+        # Thread-safe result holder: callers can wait from other event loops (scheduler, Discord)
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Single-flight execution: concurrent calls with the same action and key share one execution and all receive its
+    result (or its exception). The shared value is handed out as is, so callers must not mutate it.
+
+    The execution keeps running while at least one caller waits for it and is cancelled when the last one leaves.
+    """
+
+    _lock = threading.Lock()
+    _flights: dict[tuple[str, str], _Flight] = {}
+    _counters: dict[str, dict[str, int]] = {}
+
+    @classmethod
+    async def run(cls, action: str, key: str, factory: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """Runs `factory()` unless an identical call is already in flight. Returns the value and if it was shared."""
+        flight_key = (action, key)
+        loop = asyncio.get_running_loop()
+        with cls._lock:
+            counters = cls._counters.setdefault(action, {"executions": 0, "hits": 0})
+            flight = cls._flights.get(flight_key)
+            coalesced = flight is not None
+            if flight is None:
+                flight = cls._flights[flight_key] = _Flight(loop)
+                flight.task = loop.create_task(factory())
+                flight.task.add_done_callback(lambda task: cls._finish(flight_key, flight, task))
+                counters["executions"] += 1
+            else:
+                counters["hits"] += 1
+            flight.waiters += 1
+
+        try:
+            value = await asyncio.shield(asyncio.wrap_future(flight.future))
+        except asyncio.CancelledError:
+            cls._leave(flight_key, flight)
+            raise
+        with cls._lock:
+            flight.waiters -= 1
+        return value, coalesced
+
+    @classmethod
+    def _leave(cls, flight_key: tuple[str, str], flight: _Flight) -> None:
+        with cls._lock:
+            flight.waiters -= 1
+            if flight.waiters or flight.future.done():
+                return
+            # Nobody waits for the result anymore: stop the execution and let the next caller start a new one
+            if cls._flights.get(flight_key) is flight:
+                del cls._flights[flight_key]
+        flight.loop.call_soon_threadsafe(flight.task.cancel)
+
+    @classmethod
+    def _finish(cls, flight_key: tuple[str, str], flight: _Flight, task: asyncio.Task) -> None:
+        with cls._lock:
+            if cls._flights.get(flight_key) is flight:
+                del cls._flights[flight_key]
+        if task.cancelled():
+            flight.future.cancel()
+        elif task.exception() is not None:
+            flight.future.set_exception(task.exception())
+        else:
+            flight.future.set_result(task.result())
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, int]]:
+        with cls._lock:
+            stats = {action: dict(counters, in_flight=0) for action, counters in cls._counters.items()}
+            for action, _ in cls._flights:
+                stats[action]["in_flight"] += 1
+        return stats
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._flights.clear()
+            cls._counters.clear()
+
+
+def identity_payload(payload: dict[str, Any], ignored_fields: Iterable[str] = ()) -> dict[str, Any]:
+    """The payload without `ignored_fields` (the context fields of the action): what identifies the order."""
+    ignored = frozenset(ignored_fields)
+    return {field: value for field, value in payload.items() if field not in ignored}
+
+
+def coalescing_key(
+    payload: dict[str, Any], environment: dict[str, Any] | None = None, *, ignored_fields: Iterable[str] = ()
+) -> str | None:
+    """
+    Canonical JSON of the call arguments (sorted keys, no whitespace), or None when they cannot be serialized and the
+    call must run on its own. `environment` is the configured one of the action: per-call additions (the extras the
+    AI attaches to Discord orders) do not change what is being asked, and neither do the `ignored_fields` of the
+    payload (the context fields of the action).
+    """
+    try:
+        return dumps_canonical({"payload": identity_payload(payload, ignored_fields), "environment": environment})
+    except (TypeError, ValueError):
+        logger.debug("Arguments cannot be canonicalized, running without coalescing.", exc_info=True)
+        return None
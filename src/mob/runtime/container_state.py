@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from mob.logger.logger import get_logger
+from mob.utils.docker import ContainerNotFoundError, DockerClient
+
+logger = get_logger("runtime.container_state")
+
+# region Constants
+
+DEFAULT_CONTAINER_STATE_TTL_SECONDS = 30.0
+
+# Events of the Docker events stream that change whether a container is running
+_RUNNING_EVENTS = {"start": True, "restart": True, "die": False, "stop": False}
+_REMOVED_EVENTS = {"destroy"}
+
+_RECONNECT_DELAY_SECONDS = 1.0
+_MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+# endregion
+
+
+@dataclass(frozen=True)
+class _ContainerState:
+    running: bool
+    updated_at: float
+
+
+class ContainerStateRegistry:
+    """
+    Process-wide view of which containers are running, so functions do not inspect their container on every call.
+
+    The view is seeded with the container list and kept current by a watcher subscribed to the Docker events stream.
+    While the watcher is connected the view is authoritative; when it is not (daemon restarting, socket missing...)
+    entries are trusted for `ttl` seconds and then refreshed with an inspect.
+
+    The watcher runs on the event loop that first queries the registry and is restarted on another loop if that one
+    goes away.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], DockerClient],
+        *,
+        ttl: float = DEFAULT_CONTAINER_STATE_TTL_SECONDS,
+        watch_events: bool = True,
+    ):
+        self.ttl = ttl
+        self.watch_events = watch_events
+        self._client_factory = client_factory
+        self._lock = threading.Lock()
+        self._states: dict[str, _ContainerState] = {}
+        self._aliases: dict[str, str] = {}
+        self._watcher: asyncio.Task | None = None
+        self._connected = False
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "events": 0, "reconnects": 0}
+
+    async def is_running(self, container: str) -> bool:
+        """Whether a container (name or id) exists and is running."""
+        self._ensure_watcher()
+        now = time.time()
+        with self._lock:
+            state = self._states.get(self._aliases.get(container, container))
+            if state is not None and (self._connected or now - state.updated_at < self.ttl):
+                self._counters["hits"] += 1
+                return state.running
+            self._counters["stale" if state is not None else "misses"] += 1
+
+        try:
+            running = bool((await self._client_factory().inspect_container(container)).get("State", {}).get("Running"))
+        except ContainerNotFoundError:
+            running = False
+        self._set(container, running)
+        return running
+
+    def invalidate(self, container: str | None = None) -> None:
+        """Forgets a container (e.g. an exec found it stopped) or the whole view."""
+        with self._lock:
+            if container is None:
+                self._states.clear()
+                self._aliases.clear()
+                return
+            self._states.pop(self._aliases.pop(container, container), None)
+
+    def stop(self) -> None:
+        with self._lock:
+            watcher, self._watcher = self._watcher, None
+            self._connected = False
+        if watcher is not None and not watcher.done():
+            try:
+                watcher.get_loop().call_soon_threadsafe(watcher.cancel)
+            except RuntimeError:
+                # The loop is already closed
+                pass
+
+    def stats(self) -> dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"] + self._counters["stale"]
+            return {
+                **self._counters,
+                "hit_ratio": round(self._counters["hits"] / lookups, 3) if lookups else None,
+                "containers": len(self._states),
+                "oldest_entry_age": (
+                    round(now - min(s.updated_at for s in self._states.values()), 3) if self._states else None
+                ),
+                "events_connected": self._connected,
+                "ttl": self.ttl,
+            }
+
+    def _set(self, container: str, running: bool, *, container_id: str | None = None) -> None:
+        with self._lock:
+            key = container_id or self._aliases.get(container, container)
+            if container_id is not None:
+                self._aliases[container] = container_id
+            self._states[key] = _ContainerState(running=running, updated_at=time.time())
+
+    def _ensure_watcher(self) -> None:
+        if not self.watch_events:
+            return
+        with self._lock:
+            watcher = self._watcher
+            if watcher is not None and not watcher.done() and not watcher.get_loop().is_closed():
+                return
+            self._connected = False
+            self._watcher = asyncio.get_running_loop().create_task(self._watch(), name="mob-container-events")
+
+    async def _watch(self) -> None:
+        delay = _RECONNECT_DELAY_SECONDS
+        while True:
+            try:
+                client = self._client_factory()
+                since = time.time()
+                await self._seed(client)
+                delay = _RECONNECT_DELAY_SECONDS
+                async for event in client.events(since=since):
+                    self._apply(event)
+                raise ConnectionError("Docker events stream closed.")
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                with self._lock:
+                    self._connected = False
+                    self._counters["reconnects"] += 1
+                logger.warning("Docker events stream unavailable (%s), retrying in %.0f s", exc, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY_SECONDS)
+
+    async def _seed(self, client: DockerClient) -> None:
+        containers = await client.list_containers(include_stopped=True)
+        now = time.time()
+        with self._lock:
+            self._states.clear()
+            self._aliases.clear()
+            for summary in containers:
+                container_id = summary["Id"]
+                self._states[container_id] = _ContainerState(summary.get("State") == "running", now)
+                for name in summary.get("Names", []):
+                    self._aliases[name.lstrip("/")] = container_id
+            # The view is complete: from now on the events keep it current
+            self._connected = True
+        logger.info("Container state registry seeded with %s containers", len(containers))
+
+    def _apply(self, event: dict[str, Any]) -> None:
+        action = str(event.get("Action") or event.get("status") or "").split(":", 1)[0]
+        actor = event.get("Actor") or {}
+        container_id = actor.get("ID") or event.get("id")
+        name = (actor.get("Attributes") or {}).get("name")
+        with self._lock:
+            self._counters["events"] += 1
+        if not container_id:
+            return
+        if action in _REMOVED_EVENTS:
+            with self._lock:
+                self._states.pop(container_id, None)
+                if name:
+                    self._aliases.pop(name, None)
+            return
+        running = _RUNNING_EVENTS.get(action)
+        if running is not None:
+            self._set(name or container_id, running, container_id=container_id)
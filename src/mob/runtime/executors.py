@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Mapping
+
+from mob.logger.logger import get_logger
+
+logger = get_logger("runtime.executors")
+
+# region Constants
+
+DEFAULT_EXECUTOR = "default"
+
+# Thread pool size of each executor class. Classes not listed here (custom names used in api_config.json) get the
+# size of the default pool.
+DEFAULT_EXECUTOR_POOL_SIZES: dict[str, int] = {
+    DEFAULT_EXECUTOR: 8,
+    "io": 16,
+    "cpu": os.cpu_count() or 2,
+    "browser": 2,
+    "llm": 4,
+}
+
+# endregion
+
+
+class ExecutorPool:
+    """Named, separately sized thread pool that keeps queue-depth and wait-time metrics."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"mob-{name}")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._abandoned = 0
+        self._total_wait_ms = 0.0
+        self._max_wait_ms = 0.0
+
+    def submit(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        """Schedules `func` in this pool from synchronous code (e.g. a browser thread fanning out CPU work)."""
+        submitted_at = time.perf_counter()
+        context = contextvars.copy_context()
+        with self._lock:
+            self._queued += 1
+            self._submitted += 1
+
+        def _task() -> Any:
+            wait_ms = (time.perf_counter() - submitted_at) * 1000
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait_ms += wait_ms
+                self._max_wait_ms = max(self._max_wait_ms, wait_ms)
+            failed = False
+            try:
+                return context.run(func, *args, **kwargs)
+            except BaseException:
+                failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+                    self._failed += int(failed)
+
+        future = self._executor.submit(_task)
+        future.add_done_callback(self._on_done)
+        return future
+
+    async def run(self, func: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Any:
+        """Runs `func` in this pool (propagating context variables, like asyncio.to_thread) and awaits its result."""
+        loop = asyncio.get_running_loop()
+        future = self.submit(func, *args, **kwargs)
+        try:
+            return await asyncio.wrap_future(future, loop=loop)
+        except asyncio.CancelledError:
+            # Queued calls are dropped; a running thread cannot be interrupted and holds its slot until it returns
+            if not future.cancel() and not future.done():
+                with self._lock:
+                    self._abandoned += 1
+                logger.warning("Call to %r abandoned while running in the '%s' pool.", func, self.name)
+            raise
+
+    def _on_done(self, future: Future) -> None:
+        if future.cancelled():
+            # Cancelled while queued: `_task` never ran
+            with self._lock:
+                self._queued -= 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            started = self._submitted - self._queued
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "failed": self._failed,
+                "abandoned": self._abandoned,
+                "avg_wait_ms": round(self._total_wait_ms / started, 3) if started else 0.0,
+                "max_wait_ms": round(self._max_wait_ms, 3),
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+class ExecutorRegistry:
+    """Process-wide registry of executor pools, created lazily on first use."""
+
+    _pools: dict[str, ExecutorPool] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, name: str, pool_sizes: Mapping[str, int] | None = None) -> ExecutorPool:
+        pool = cls._pools.get(name)
+        if pool is not None:
+            return pool
+        sizes = {**DEFAULT_EXECUTOR_POOL_SIZES, **(pool_sizes or {})}
+        with cls._lock:
+            if name not in cls._pools:
+                max_workers = sizes.get(name, sizes[DEFAULT_EXECUTOR])
+                cls._pools[name] = ExecutorPool(name, max_workers)
+                logger.debug("Created executor pool '%s' with %s workers", name, max_workers)
+            return cls._pools[name]
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, Any]]:
+        return {name: pool.stats() for name, pool in list(cls._pools.items())}
+
+    @classmethod
+    def shutdown(cls, wait: bool = False) -> None:
+        with cls._lock:
+            pools, cls._pools = cls._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+
+# region Utils
+
+
+def parse_pool_sizes(value: str | None) -> dict[str, int]:
+    """Parses `EXECUTOR_POOLS`-like strings (`io=16,cpu=4,browser=2`) into a {class: size} mapping."""
+    sizes: dict[str, int] = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, _, size = item.partition("=")
+        try:
+            sizes[name.strip()] = max(int(size), 1)
+        except ValueError as exc:
+            raise ValueError(f"Invalid executor pool size '{item.strip()}', expected '<class>=<threads>'.") from exc
+    return sizes
+
+
+# endregion
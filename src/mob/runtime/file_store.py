@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import mimetypes
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from mob.logger.logger import get_logger
+
+logger = get_logger("runtime.file_store")
+
+# region Constants
+
+DEFAULT_RESULT_FILES_PATH = Path(tempfile.gettempdir()) / "mob-result-files"
+DEFAULT_RESULT_FILES_TTL_SECONDS = 3600.0
+DEFAULT_INLINE_MAX_BYTES = 256 * 1024
+
+# Minimum seconds between two sweeps of expired files
+_CLEANUP_INTERVAL_SECONDS = 60.0
+_HASH_CHUNK_BYTES = 1024 * 1024
+# Locks serializing the puts of the same source path (striped so their number stays bounded)
+_SOURCE_LOCK_STRIPES = 64
+_FILE_ID_PATTERN = re.compile(r"^[0-9a-f]{64}(\.[A-Za-z0-9]{1,16})?$")
+
+# endregion
+
+
+@dataclass(frozen=True)
+class StoredFile:
+    file_id: str
+    filename: str
+    content_type: str
+    size: int
+    path: Path
+    expires_at: float
+
+    def read_base64(self) -> str:
+        return base64.b64encode(self.path.read_bytes()).decode("utf-8")
+
+
+class ResultFileStore:
+    """
+    Content-addressed store of the files produced by actions (screenshots, reports...).
+
+    Files are moved into `root` under the SHA-256 of their content, so results shared by coalesced or cached orders
+    point to a single copy, and are removed `ttl` seconds after they were last stored. The expired files are swept
+    lazily from `put` at most once per minute. Storing the same source path again returns the stored file, even
+    after the source was moved away: puts of one source are serialized, so concurrent callers sharing a result (a
+    coalesced or cached order) never race on the move. All methods block on disk: call them from a worker thread.
+    """
+
+    def __init__(self, root: Path = DEFAULT_RESULT_FILES_PATH, *, ttl: float = DEFAULT_RESULT_FILES_TTL_SECONDS):
+        self.root = root
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._filenames: dict[str, str] = {}
+        self._sources: dict[Path, str] = {}
+        self._source_locks = [threading.Lock() for _ in range(_SOURCE_LOCK_STRIPES)]
+        self._last_cleanup = 0.0
+        self._stored = 0
+        self._deduplicated = 0
+        self._expired = 0
+
+    def put(self, source: Path | str) -> StoredFile:
+        """Moves `source` into the store. Raises OSError when the file cannot be read."""
+        source = Path(source).resolve()
+        # The source -> id mapping is recorded before the lock is released: a caller waiting on it finds it
+        with self._source_locks[hash(source) % _SOURCE_LOCK_STRIPES]:
+            stored = self._put(source)
+        self._maybe_cleanup()
+        return stored
+
+    def _put(self, source: Path) -> StoredFile:
+        try:
+            file_id = _content_id(source)
+        except FileNotFoundError:
+            # Already moved into the store (a cached or coalesced result stored again)
+            with self._lock:
+                known_id = self._sources.get(source)
+            stored = self.get(known_id) if known_id is not None else None
+            if stored is None:
+                raise
+            return stored
+        path = self._path(file_id)
+
+        if path.exists():
+            # Same content stored before: refresh its expiration and drop the duplicate
+            os.utime(path)
+            source.unlink(missing_ok=True)
+            deduplicated = True
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            staging = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+            shutil.move(source, staging)
+            os.replace(staging, path)
+            deduplicated = False
+
+        with self._lock:
+            self._filenames[file_id] = source.name
+            self._sources[source] = file_id
+            self._stored += 1
+            self._deduplicated += deduplicated
+        return self._describe(file_id, path, path.stat())
+
+    def get(self, file_id: str) -> StoredFile | None:
+        """Returns a stored file that has not expired, or None (also for malformed ids)."""
+        if not _FILE_ID_PATTERN.match(file_id):
+            return None
+        path = self._path(file_id)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        if stat.st_mtime + self.ttl < time.time():
+            return None
+        return self._describe(file_id, path, stat)
+
+    def cleanup(self) -> int:
+        """Removes the expired files. Returns how many were removed."""
+        expired_before = time.time() - self.ttl
+        removed: list[str] = []
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < expired_before:
+                    path.unlink()
+                    removed.append(path.name)
+            except FileNotFoundError:
+                continue
+        with self._lock:
+            self._last_cleanup = time.monotonic()
+            self._expired += len(removed)
+            for file_id in removed:
+                self._filenames.pop(file_id, None)
+            if removed:
+                removed_ids = set(removed)
+                self._sources = {src: fid for src, fid in self._sources.items() if fid not in removed_ids}
+        if removed:
+            logger.info("Removed %s expired result files from %s", len(removed), self.root)
+        return len(removed)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "root": str(self.root),
+                "ttl": self.ttl,
+                "stored": self._stored,
+                "deduplicated": self._deduplicated,
+                "expired": self._expired,
+            }
+
+    def _maybe_cleanup(self) -> None:
+        with self._lock:
+            due = time.monotonic() - self._last_cleanup >= _CLEANUP_INTERVAL_SECONDS
+            if due:
+                self._last_cleanup = time.monotonic()
+        if due:
+            try:
+                self.cleanup()
+            except OSError:
+                logger.exception("Could not clean up expired result files in %s", self.root)
+
+    def _path(self, file_id: str) -> Path:
+        return self.root / file_id[:2] / file_id
+
+    def _describe(self, file_id: str, path: Path, stat: os.stat_result) -> StoredFile:
+        with self._lock:
+            filename = self._filenames.get(file_id, file_id)
+        content_type, _ = mimetypes.guess_type(filename)
+        return StoredFile(
+            file_id=file_id,
+            filename=filename,
+            content_type=content_type or "application/octet-stream",
+            size=stat.st_size,
+            path=path,
+            expires_at=stat.st_mtime + self.ttl,
+        )
+
+
+# region Utils
+
+
+def _content_id(source: Path) -> str:
+    digest = hashlib.sha256()
+    with source.open("rb") as handle:
+        while chunk := handle.read(_HASH_CHUNK_BYTES):
+            digest.update(chunk)
+    return digest.hexdigest() + source.suffix.lower()
+
+
+# endregion
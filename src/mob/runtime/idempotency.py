@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, TypeVar
+
+from mob.logger.logger import get_logger
+from mob.utils.json import dumps_canonical
+
+logger = get_logger("runtime.idempotency")
+
+T = TypeVar("T")
+
+# region Constants
+
+DEFAULT_IDEMPOTENCY_TTL_SECONDS = 3600.0
+DEFAULT_IDEMPOTENCY_MAX_KEYS = 1000
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+
+# endregion
+
+
+class IdempotencyConflictError(RuntimeError):
+    """Raised when an idempotency key is reused for a different request."""
+
+
+class IdempotencyStoreFullError(RuntimeError):
+    """Raised when every slot of the store holds an execution that is still running."""
+
+
+class _Entry:
+    """Execution recorded under an idempotency key: running (`task`) or completed (`value`)."""
+
+    __slots__ = ("fingerprint", "task", "value", "finished_at")
+
+    def __init__(self, fingerprint: str, task: asyncio.Task):
+        self.fingerprint = fingerprint
+        self.task: asyncio.Task | None = task
+        self.value: Any = None
+        self.finished_at: float | None = None
+
+
+class IdempotencyStore:
+    """
+    Bounded record of the executions started with an `Idempotency-Key`, so retries of side-effecting orders do not
+    run the function again: a retry arriving while the first execution runs waits for it, and a later retry gets the
+    stored result.
+
+    Executions keep running when the client that started them goes away (its retry attaches to them). Failed or
+    cancelled executions are not recorded, so they can be retried. Completed entries expire after `ttl` seconds and
+    the oldest are evicted once `max_keys` entries are stored; running ones are never evicted.
+    """
+
+    def __init__(self, *, ttl: float = DEFAULT_IDEMPOTENCY_TTL_SECONDS, max_keys: int = DEFAULT_IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._counters = {"executions": 0, "attached": 0, "replayed": 0, "conflicts": 0, "evicted": 0}
+
+    async def run(self, key: str, fingerprint: str, factory: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        Runs `factory()` unless `key` was already used. Returns the value and whether it comes from a previous call.
+        Raises IdempotencyConflictError when the key was used with another fingerprint.
+        """
+        self._evict()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.fingerprint != fingerprint:
+                self._counters["conflicts"] += 1
+                raise IdempotencyConflictError(f"Idempotency key '{key}' was already used for a different request.")
+            if entry.task is None:
+                self._counters["replayed"] += 1
+                return entry.value, True
+            self._counters["attached"] += 1
+            return await asyncio.shield(entry.task), True
+
+        if len(self._entries) >= self.max_keys:
+            raise IdempotencyStoreFullError(f"Too many executions in flight ({len(self._entries)}) with a key.")
+        task = asyncio.ensure_future(factory())
+        entry = self._entries[key] = _Entry(fingerprint, task)
+        task.add_done_callback(lambda done: self._finish(key, entry, done))
+        self._counters["executions"] += 1
+        return await asyncio.shield(task), False
+
+    def stats(self) -> dict[str, Any]:
+        in_flight = sum(entry.task is not None for entry in self._entries.values())
+        return {
+            **self._counters,
+            "stored": len(self._entries) - in_flight,
+            "in_flight": in_flight,
+            "ttl": self.ttl,
+            "max_keys": self.max_keys,
+        }
+
+    def _finish(self, key: str, entry: _Entry, task: asyncio.Task) -> None:
+        if self._entries.get(key) is not entry:
+            return
+        if task.cancelled() or task.exception() is not None:
+            # Not recorded: the client may retry the order
+            del self._entries[key]
+            return
+        entry.value = task.result()
+        entry.task = None
+        entry.finished_at = time.time()
+        self._entries.move_to_end(key)
+
+    def _evict(self) -> None:
+        expired_before = time.time() - self.ttl
+        completed = [key for key, entry in self._entries.items() if entry.task is None]
+        expired = [key for key in completed if self._entries[key].finished_at < expired_before]
+        # Over capacity: make room for one more key dropping the oldest completed entries
+        overflow = len(self._entries) - len(expired) - self.max_keys + 1
+        if overflow > 0:
+            expired.extend([key for key in completed if key not in expired][:overflow])
+        for key in expired:
+            del self._entries[key]
+        self._counters["evicted"] += len(expired)
+
+
+def request_fingerprint(action: str, payload: dict[str, Any] | None, *, run_async: bool = False) -> str:
+    """Identifies the request sent with an idempotency key, to detect keys reused for other requests."""
+    canonical = dumps_canonical({"action": action, "payload": payload or {}, "async": run_async})
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
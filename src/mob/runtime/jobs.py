@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from mob.logger.logger import get_logger
+from mob.models import JobInfo, OrderError, OrderResponse
+from mob.utils.aio import LoopLocal
+
+logger = get_logger("runtime.jobs")
+
+JobRunner = Callable[[JobInfo], Awaitable[OrderResponse]]
+
+# region Constants
+
+DEFAULT_JOB_WORKERS = 4
+DEFAULT_JOB_QUEUE_SIZE = 100
+DEFAULT_JOB_RETENTION_SECONDS = 3600.0
+DEFAULT_JOB_MAX_STORED = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    data TEXT NOT NULL
+)
+"""
+
+# endregion
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when a job cannot be accepted because the background queue is full."""
+
+
+class JobStore:
+    """
+    Keeps the state of background jobs in memory, evicting finished jobs once they are older than `retention`
+    seconds or when more than `max_jobs` are stored (oldest first).
+
+    With a `path`, every change is also written to a SQLite database (from a single background thread, so the event
+    loop never waits on disk) and finished jobs survive restarts. Jobs that were still pending when the process
+    stopped are reloaded as failed.
+    """
+
+    def __init__(
+        self,
+        *,
+        retention: float = DEFAULT_JOB_RETENTION_SECONDS,
+        max_jobs: int = DEFAULT_JOB_MAX_STORED,
+        path: Path | None = None,
+    ):
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self.path = path
+        self._jobs: OrderedDict[str, JobInfo] = OrderedDict()
+        self._lock = threading.Lock()
+        self._evicted = 0
+        self._db: sqlite3.Connection | None = None
+        self._writer: ThreadPoolExecutor | None = None
+        if path is not None:
+            self._open_database(path)
+
+    def add(self, job: JobInfo) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+            evicted = self._evict_locked()
+        self._persist(job, evicted)
+
+    def update(self, job: JobInfo) -> None:
+        with self._lock:
+            if job.job_id not in self._jobs:
+                return
+            self._jobs[job.job_id] = job
+        self._persist(job, [])
+
+    def get(self, job_id: str) -> JobInfo | None:
+        with self._lock:
+            evicted = self._evict_locked()
+            job = self._jobs.get(job_id)
+        if evicted:
+            self._persist(None, evicted)
+        return job
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            by_status: dict[str, int] = {}
+            for job in self._jobs.values():
+                by_status[job.status] = by_status.get(job.status, 0) + 1
+            return {
+                "stored": len(self._jobs),
+                "by_status": by_status,
+                "evicted": self._evicted,
+                "retention": self.retention,
+                "max_jobs": self.max_jobs,
+                "sqlite": str(self.path) if self.path else None,
+            }
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def _evict_locked(self) -> list[str]:
+        expired_before = time.time() - self.retention
+        evicted = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished and job.finished_at is not None and job.finished_at < expired_before
+        ]
+        for job_id in evicted:
+            del self._jobs[job_id]
+        # Over capacity: drop the oldest finished jobs (pending ones are bounded by the queue size)
+        overflow = len(self._jobs) - self.max_jobs
+        if overflow > 0:
+            oldest_finished = [job_id for job_id, job in self._jobs.items() if job.finished][:overflow]
+            for job_id in oldest_finished:
+                del self._jobs[job_id]
+            evicted.extend(oldest_finished)
+        self._evicted += len(evicted)
+        return evicted
+
+    def _open_database(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mob-jobstore")
+
+        now = time.time()
+        interrupted: list[JobInfo] = []
+        for (data,) in self._db.execute("SELECT data FROM jobs ORDER BY created_at"):
+            job = JobInfo.model_validate_json(data)
+            if not job.finished:
+                job = job.model_copy(
+                    update={
+                        "status": "failed",
+                        "finished_at": now,
+                        "error": OrderError(status_code=500, detail="Job interrupted by a restart."),
+                    }
+                )
+                interrupted.append(job)
+            self._jobs[job.job_id] = job
+        evicted = self._evict_locked()
+        for job in interrupted:
+            if job.job_id in self._jobs:
+                self._write(job, [])
+        self._write(None, evicted)
+        logger.info("Loaded %s jobs from %s (%s interrupted)", len(self._jobs), path, len(interrupted))
+
+    def _persist(self, job: JobInfo | None, evicted: list[str]) -> None:
+        if self._writer is None or (job is None and not evicted):
+            return
+        try:
+            self._writer.submit(self._write, job, evicted)
+        except RuntimeError:
+            logger.warning("Job store is closed, job %s is only kept in memory.", job.job_id if job else None)
+
+    def _write(self, job: JobInfo | None, evicted: list[str]) -> None:
+        if self._db is None:
+            return
+        try:
+            if job is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO jobs (job_id, created_at, data) VALUES (?, ?, ?)",
+                    (job.job_id, job.created_at, job.model_dump_json()),
+                )
+            if evicted:
+                self._db.executemany("DELETE FROM jobs WHERE job_id = ?", [(job_id,) for job_id in evicted])
+        except sqlite3.Error:
+            logger.exception("Could not persist job state to %s", self.path)
+
+
+class _JobQueue:
+    """Queue and worker tasks of one event loop."""
+
+    def __init__(self, size: int):
+        self.queue: asyncio.Queue[tuple[str, JobRunner]] = asyncio.Queue(maxsize=size)
+        self.workers: list[asyncio.Task] = []
+
+
+class JobManager:
+    """
+    Runs orders in the background with a bounded number of concurrent workers fed by a bounded queue. Job state
+    (including the final OrderResponse or error) is published to a JobStore.
+    """
+
+    def __init__(
+        self, store: JobStore, *, workers: int = DEFAULT_JOB_WORKERS, queue_size: int = DEFAULT_JOB_QUEUE_SIZE
+    ):
+        self.store = store
+        self.workers = workers
+        self.queue_size = queue_size
+        self._queues: LoopLocal[_JobQueue] = LoopLocal(lambda: _JobQueue(queue_size))
+        self._running: dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, action: str, runner: JobRunner) -> JobInfo:
+        """Queues `runner` as a new job. Raises JobQueueFullError when the queue is full."""
+        job_queue = self._queues.get()
+        self._start_workers(job_queue)
+        job = JobInfo(job_id=uuid.uuid4().hex, action=action, created_at=time.time())
+        try:
+            job_queue.queue.put_nowait((job.job_id, runner))
+        except asyncio.QueueFull:
+            raise JobQueueFullError(f"Job queue is full ({self.queue_size} jobs waiting).") from None
+        self.store.add(job)
+        return job
+
+    def get(self, job_id: str) -> JobInfo | None:
+        return self.store.get(job_id)
+
+    def cancel(self, job_id: str) -> JobInfo | None:
+        """Cancels a queued or running job. Finished jobs are returned unchanged."""
+        job = self.store.get(job_id)
+        if job is None or job.finished:
+            return job
+        with self._lock:
+            task = self._running.get(job_id)
+        if task is not None:
+            # The worker records the cancelled state once the execution has unwound
+            task.get_loop().call_soon_threadsafe(task.cancel)
+            return job
+        job = job.model_copy(update={"status": "cancelled", "finished_at": time.time()})
+        self.store.update(job)
+        return job
+
+    def stop(self) -> None:
+        """Cancels the workers of every loop together with the jobs they are running."""
+        for job_queue in self._queues.values():
+            workers, job_queue.workers = job_queue.workers, []
+            for worker in workers:
+                try:
+                    worker.get_loop().call_soon_threadsafe(worker.cancel)
+                except RuntimeError:
+                    # The loop is already closed
+                    pass
+
+    def stats(self) -> dict[str, Any]:
+        queues = self._queues.values()
+        with self._lock:
+            running = len(self._running)
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "queued": sum(job_queue.queue.qsize() for job_queue in queues),
+            "running": running,
+            "store": self.store.stats(),
+        }
+
+    def _start_workers(self, job_queue: _JobQueue) -> None:
+        if job_queue.workers:
+            return
+        loop = asyncio.get_running_loop()
+        job_queue.workers = [
+            loop.create_task(self._worker(job_queue.queue), name=f"mob-job-worker-{index}")
+            for index in range(self.workers)
+        ]
+
+    async def _worker(self, queue: asyncio.Queue[tuple[str, JobRunner]]) -> None:
+        while True:
+            job_id, runner = await queue.get()
+            try:
+                await self._run_job(job_id, runner)
+            except Exception:
+                logger.exception("Job worker failed while running job %s", job_id)
+            finally:
+                queue.task_done()
+
+    async def _run_job(self, job_id: str, runner: JobRunner) -> None:
+        job = self.store.get(job_id)
+        if job is None or job.status != "queued":
+            # Cancelled (or evicted) while waiting in the queue
+            return
+        job = job.model_copy(update={"status": "running", "started_at": time.time()})
+        self.store.update(job)
+
+        task = asyncio.create_task(runner(job))
+        with self._lock:
+            self._running[job_id] = task
+        try:
+            await asyncio.wait({task})
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            with self._lock:
+                self._running.pop(job_id, None)
+
+        update: dict[str, Any] = {"finished_at": time.time()}
+        if task.cancelled():
+            update["status"] = "cancelled"
+        elif task.exception() is not None:
+            exc = task.exception()
+            update["status"] = "failed"
+            # HTTP-like errors (e.g. fastapi.HTTPException) keep their status code and detail
+            update["error"] = OrderError(
+                status_code=getattr(exc, "status_code", 500), detail=str(getattr(exc, "detail", None) or exc)
+            )
+        else:
+            update["status"] = "succeeded"
+            update["response"] = task.result()
+        self.store.update(job.model_copy(update=update))
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import asyncio
+import importlib
+import inspect
+import multiprocessing
+import pickle
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing.connection import Connection
+from typing import Any
+
+from mob.logger.logger import get_logger
+
+logger = get_logger("runtime.process_pool")
+
+# region Constants
+
+PROCESS_EXECUTOR = "process"
+
+DEFAULT_PROCESS_POOL_SIZE = 2
+DEFAULT_MAX_TASKS_PER_WORKER = 50
+
+# How often a dispatcher thread checks if its task was cancelled while waiting for the worker
+_CANCEL_POLL_INTERVAL = 0.05
+_WORKER_STOP_TIMEOUT = 2.0
+
+# endregion
+
+
+class ProcessWorkerError(RuntimeError):
+    """Raised when a worker process dies or cannot transport the task or its result."""
+
+
+class _ProcessWorker:
+    """A warm worker process that keeps the function modules it already imported."""
+
+    def __init__(self, context: multiprocessing.context.BaseContext):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_connection,), daemon=True)
+        self.process.start()
+        child_connection.close()
+        self.tasks_done = 0
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        try:
+            self.connection.send_bytes(pickle.dumps(None))
+        except (OSError, ValueError):
+            pass
+        self.process.join(_WORKER_STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.kill()
+        self.connection.close()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(_WORKER_STOP_TIMEOUT)
+        self.connection.close()
+
+
+class ProcessPool:
+    """
+    Pool of warm worker processes for CPU-bound functions.
+
+    Unlike `concurrent.futures.ProcessPoolExecutor`, a task that times out or is cancelled kills the worker running
+    it (and a fresh one is spawned on demand), so runaway work never keeps holding a CPU. Workers are recycled after
+    `max_tasks_per_worker` tasks to bound memory growth.
+    """
+
+    def __init__(
+        self, max_workers: int = DEFAULT_PROCESS_POOL_SIZE, max_tasks_per_worker: int = DEFAULT_MAX_TASKS_PER_WORKER
+    ):
+        self.max_workers = max_workers
+        self.max_tasks_per_worker = max_tasks_per_worker
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self._context = multiprocessing.get_context(method)
+        # One dispatcher thread per worker: each one owns a worker while a task runs
+        self._dispatchers = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mob-process-dispatch")
+        self._idle: list[_ProcessWorker] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stats = {"spawned": 0, "tasks": 0, "failed": 0, "killed": 0, "recycled": 0}
+
+    def start(self) -> None:
+        """Spawns every worker upfront so the first tasks do not pay for the process startup."""
+        with self._lock:
+            missing = self.max_workers - len(self._idle)
+        workers = [self._spawn() for _ in range(max(missing, 0))]
+        with self._lock:
+            self._idle.extend(workers)
+
+    async def run(
+        self, target: str, environment: dict[str, Any], payload: dict[str, Any], *, timeout: float | None = None
+    ) -> Any:
+        """
+        Runs the function `target` ("module:attribute") in a worker process. `environment` and `payload` must be
+        picklable. Cancelling the awaiting task (e.g. an outer `asyncio.wait_for`) kills the worker.
+        """
+        try:
+            message = pickle.dumps((target, environment, payload))
+        except Exception as exc:
+            raise ProcessWorkerError(f"Cannot send the task '{target}' to a worker process: {exc}") from exc
+
+        cancelled = threading.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._dispatchers, self._dispatch, target, message, cancelled, timeout)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def _dispatch(self, target: str, message: bytes, cancelled: threading.Event, timeout: float | None) -> Any:
+        worker = self._acquire()
+        deadline = time.monotonic() + timeout if timeout else None
+        try:
+            worker.connection.send_bytes(message)
+            ready = self._wait_for_result(worker, cancelled, deadline)
+            response = worker.connection.recv_bytes() if ready else None
+        except (EOFError, OSError) as exc:
+            self._kill(worker, reason="died")
+            raise ProcessWorkerError(f"Worker process died while running '{target}'.") from exc
+
+        if response is None:
+            self._kill(worker, reason="cancelled" if cancelled.is_set() else "timed out")
+            if cancelled.is_set():
+                raise ProcessWorkerError(f"Task '{target}' was cancelled.")
+            raise TimeoutError(f"Task '{target}' timed out after {timeout} seconds.")
+
+        self._release(worker)
+        ok, value = pickle.loads(response)
+        with self._lock:
+            self._stats["tasks"] += 1
+            self._stats["failed"] += int(not ok)
+        if not ok:
+            raise value
+        return value
+
+    @staticmethod
+    def _wait_for_result(worker: _ProcessWorker, cancelled: threading.Event, deadline: float | None) -> bool:
+        """Waits for the worker answer. Returns False when the task must be abandoned (cancelled or timed out)."""
+        while not worker.connection.poll(_CANCEL_POLL_INTERVAL):
+            if cancelled.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                return False
+            if not worker.is_alive():
+                raise EOFError("Worker process exited.")
+        return True
+
+    def _spawn(self) -> _ProcessWorker:
+        worker = _ProcessWorker(self._context)
+        with self._lock:
+            self._stats["spawned"] += 1
+        return worker
+
+    def _acquire(self) -> _ProcessWorker:
+        with self._lock:
+            if self._closed:
+                raise ProcessWorkerError("The process pool is shut down.")
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    return worker
+        return self._spawn()
+
+    def _release(self, worker: _ProcessWorker) -> None:
+        worker.tasks_done += 1
+        recycle = worker.tasks_done >= self.max_tasks_per_worker
+        with self._lock:
+            if not recycle and not self._closed:
+                self._idle.append(worker)
+                return
+            self._stats["recycled"] += int(recycle)
+        worker.stop()
+
+    def _kill(self, worker: _ProcessWorker, reason: str) -> None:
+        logger.warning("Killing worker process %s: task %s", worker.process.pid, reason)
+        worker.kill()
+        with self._lock:
+            self._stats["killed"] += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_tasks_per_worker": self.max_tasks_per_worker,
+                "idle": len(self._idle),
+                **self._stats,
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._closed = True
+            workers, self._idle = self._idle, []
+        for worker in workers:
+            worker.stop()
+        self._dispatchers.shutdown(wait=False, cancel_futures=True)
+
+
+_pool: ProcessPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool(
+    max_workers: int = DEFAULT_PROCESS_POOL_SIZE, max_tasks_per_worker: int = DEFAULT_MAX_TASKS_PER_WORKER
+) -> ProcessPool:
+    """Returns the process-wide pool, creating it with the given sizing on first use."""
+    global _pool
+    if _pool is not None:
+        return _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPool(max_workers=max_workers, max_tasks_per_worker=max_tasks_per_worker)
+        return _pool
+
+
+def get_process_pool_stats() -> dict[str, Any] | None:
+    return _pool.stats() if _pool is not None else None
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+# region Utils
+
+
+def _worker_main(connection: Connection) -> None:
+    """Entry point of worker processes: runs tasks sent through `connection` until told to stop."""
+    # Ctrl+C is handled by the parent, which kills or stops its workers
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    functions: dict[str, Any] = {}
+    while True:
+        try:
+            message = pickle.loads(connection.recv_bytes())
+        except (EOFError, OSError):
+            return
+        if message is None:
+            return
+
+        target, environment, payload = message
+        try:
+            func = functions.get(target)
+            if func is None:
+                func = functions[target] = _import_callable(target)
+            result = _call(func, environment, payload)
+            response = pickle.dumps((True, result))
+        except BaseException as exc:
+            try:
+                response = pickle.dumps((False, exc))
+            except Exception:
+                response = pickle.dumps((False, ProcessWorkerError(f"{type(exc).__name__}: {exc}")))
+        try:
+            connection.send_bytes(response)
+        except Exception as exc:
+            connection.send_bytes(pickle.dumps((False, ProcessWorkerError(f"Result is not picklable: {exc}"))))
+
+
+def _import_callable(target: str) -> Any:
+    module_path, attr_name = target.split(":", 1)
+    obj: Any = importlib.import_module(module_path)
+    for part in attr_name.split("."):
+        obj = getattr(obj, part)
+    return obj
+
+
+def _call(func: Any, environment: dict[str, Any], payload: dict[str, Any]) -> Any:
+    from mob.models import CompiledCallable
+
+    kwargs = CompiledCallable.from_callable(func).build_kwargs(environment, payload)
+    result = func(**kwargs)
+    if inspect.iscoroutine(result):
+        return asyncio.run(result)
+    if inspect.isasyncgen(result):
+        from mob.runtime.streaming import collect_stream
+
+        return asyncio.run(collect_stream(result))
+    return result
+
+
+# endregion
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import asyncio
+import ipaddress
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Sequence
+
+import httpx
+
+from mob.logger.logger import get_logger
+from mob.utils.aio import LoopLocal
+
+logger = get_logger("runtime.public_ip")
+
+# region Constants
+
+DEFAULT_PUBLIC_IP_PROVIDERS = (
+    "https://api.ipify.org?format=json",
+    "https://icanhazip.com",
+    "https://checkip.amazonaws.com",
+)
+DEFAULT_PUBLIC_IP_TTL_SECONDS = 60.0
+DEFAULT_PUBLIC_IP_TIMEOUT_SECONDS = 3.0
+
+# After every provider failed, the stale address is served for this long before trying again
+_OUTAGE_RETRY_SECONDS = 10.0
+
+# endregion
+
+
+class PublicIpUnavailableError(RuntimeError):
+    """No provider answered and there is no previous address to fall back to."""
+
+
+@dataclass(frozen=True)
+class PublicIpChange:
+    previous: str
+    current: str
+    detected_at: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class _LoopState:
+    """HTTP client and in-flight resolution of one event loop."""
+
+    def __init__(self, timeout: float):
+        self.client = httpx.AsyncClient(timeout=timeout)
+        self.resolving: asyncio.Task | None = None
+
+
+class PublicIpService:
+    """
+    Public IP address of the host, shared by every function that needs it.
+
+    The address is cached for `ttl` seconds. Refreshing it races all the providers and keeps the first valid answer,
+    so a slow or broken provider does not delay the result. When every provider fails the last known address is
+    served (stale) instead of failing. Callers can wait for the address to change with `wait_for_change` instead of
+    polling the functions that depend on it.
+
+    Usable from any event loop: HTTP clients and in-flight resolutions are kept per loop.
+    """
+
+    def __init__(
+        self,
+        providers: Sequence[str] = DEFAULT_PUBLIC_IP_PROVIDERS,
+        *,
+        ttl: float = DEFAULT_PUBLIC_IP_TTL_SECONDS,
+        timeout: float = DEFAULT_PUBLIC_IP_TIMEOUT_SECONDS,
+    ):
+        self.providers = tuple(providers) or DEFAULT_PUBLIC_IP_PROVIDERS
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._loops: LoopLocal[_LoopState] = LoopLocal(lambda: _LoopState(timeout))
+        self._address: str | None = None
+        self._resolved_at = 0.0
+        self._retry_at = 0.0
+        self._last_change: PublicIpChange | None = None
+        self._waiters: set[asyncio.Future] = set()
+        self._wins: dict[str, int] = {}
+        self._counters = {"hits": 0, "resolutions": 0, "failures": 0, "stale_served": 0, "changes": 0}
+
+    async def get(self, *, max_age: float | None = None) -> str:
+        """
+        Returns the public IP, resolving it when the cached one is older than `max_age` (the TTL by default).
+        Raises PublicIpUnavailableError only when it was never resolved and no provider answers.
+        """
+        max_age = self.ttl if max_age is None else max_age
+        now = time.monotonic()
+        with self._lock:
+            if self._address is not None and (now - self._resolved_at < max_age or now < self._retry_at):
+                self._counters["hits"] += 1
+                return self._address
+
+        # Concurrent callers of the same loop share one resolution
+        state = self._loops.get()
+        if state.resolving is None or state.resolving.done():
+            state.resolving = asyncio.ensure_future(self._refresh(state.client))
+        return await asyncio.shield(state.resolving)
+
+    def peek(self) -> str | None:
+        """Last known address without resolving it."""
+        with self._lock:
+            return self._address
+
+    async def wait_for_change(self, timeout: float) -> PublicIpChange | None:
+        """
+        Waits until the public IP changes, refreshing it every `ttl` seconds in the meantime. Returns the change, or
+        None when `timeout` seconds pass without one.
+        """
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        with self._lock:
+            self._waiters.add(waiter)
+        deadline = loop.time() + timeout
+        try:
+            while not waiter.done() and (remaining := deadline - loop.time()) > 0:
+                try:
+                    return await asyncio.wait_for(asyncio.shield(waiter), min(remaining, self.ttl))
+                except asyncio.TimeoutError:
+                    pass
+                try:
+                    await self.get()
+                except PublicIpUnavailableError:
+                    pass
+                # Let the notification scheduled by a change found in `get` run
+                await asyncio.sleep(0)
+            return waiter.result() if waiter.done() else None
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    async def aclose(self) -> None:
+        """Closes the HTTP client of the running event loop."""
+        state = self._loops.pop(asyncio.get_running_loop())
+        if state is not None:
+            await state.client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "address": self._address,
+                "age": round(time.monotonic() - self._resolved_at, 3) if self._address is not None else None,
+                "ttl": self.ttl,
+                "providers": list(self.providers),
+                "wins": dict(self._wins),
+                "waiters": len(self._waiters),
+                "last_change": self._last_change.to_dict() if self._last_change else None,
+            }
+
+    async def _refresh(self, client: httpx.AsyncClient) -> str:
+        try:
+            address, provider = await self._race(client)
+        except PublicIpUnavailableError as exc:
+            with self._lock:
+                self._counters["failures"] += 1
+                stale = self._address
+                if stale is not None:
+                    self._counters["stale_served"] += 1
+                    self._retry_at = time.monotonic() + _OUTAGE_RETRY_SECONDS
+            if stale is None:
+                raise
+            logger.warning("Public IP providers unavailable (%s), serving the last known address %s", exc, stale)
+            return stale
+
+        with self._lock:
+            previous = self._address
+            self._address = address
+            self._resolved_at = time.monotonic()
+            self._retry_at = 0.0
+            self._counters["resolutions"] += 1
+            self._wins[provider] = self._wins.get(provider, 0) + 1
+            change, waiters = None, []
+            if previous is not None and previous != address:
+                change = self._last_change = PublicIpChange(previous, address, time.time())
+                self._counters["changes"] += 1
+                waiters = list(self._waiters)
+        if change is not None:
+            logger.info("Public IP changed from %s to %s", change.previous, change.current)
+            for waiter in waiters:
+                try:
+                    waiter.get_loop().call_soon_threadsafe(_notify, waiter, change)
+                except RuntimeError:
+                    # The loop of that waiter is closed
+                    pass
+        return address
+
+    async def _race(self, client: httpx.AsyncClient) -> tuple[str, str]:
+        tasks = [asyncio.ensure_future(self._query(client, provider)) for provider in self.providers]
+        errors: list[str] = []
+        try:
+            for next_done in asyncio.as_completed(tasks, timeout=self.timeout):
+                try:
+                    return await next_done
+                except asyncio.TimeoutError:
+                    raise
+                except Exception as exc:
+                    errors.append(str(exc) or type(exc).__name__)
+        except asyncio.TimeoutError:
+            errors.append(f"no answer in {self.timeout:g} s")
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise PublicIpUnavailableError("; ".join(errors))
+
+    @staticmethod
+    async def _query(client: httpx.AsyncClient, provider: str) -> tuple[str, str]:
+        response = await client.get(provider)
+        response.raise_for_status()
+        text = response.text.strip()
+        if text.startswith("{"):
+            text = str(response.json().get("ip", ""))
+        try:
+            return str(ipaddress.ip_address(text)), provider
+        except ValueError:
+            raise ValueError(f"{provider} returned an invalid address") from None
+
+
+# region Utils
+
+
+def _notify(waiter: asyncio.Future, change: PublicIpChange) -> None:
+    if not waiter.done():
+        waiter.set_result(change)
+
+
+# endregion
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable
+
+from mob.logger.logger import get_logger
+from mob.models import CachePolicy
+from mob.runtime.coalescing import identity_payload
+from mob.utils.json import dumps_canonical
+
+logger = get_logger("runtime.result_cache")
+
+
+class ResultCache:
+    """
+    LRU of action results with a time to live. Entries are evicted when they expire (lazily, on lookup) or when the
+    cache holds more than `max_entries` of them or more than `max_bytes` of results (least recently used first). The
+    size of a result is estimated from its JSON encoding.
+    """
+
+    def __init__(self, action: str, policy: CachePolicy):
+        self.action = action
+        self.policy = policy
+        # key -> (stored at, value, estimated size in bytes)
+        self._entries: OrderedDict[str, tuple[float, Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._oversized = 0
+
+    def get(self, key: str) -> tuple[Any, float] | None:
+        """Returns the cached value and its age in milliseconds, or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.policy.ttl:
+                del self._entries[key]
+                self._bytes -= entry[2]
+                self._expirations += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        stored_at, value, _ = entry
+        return value, (now - stored_at) * 1000
+
+    def put(self, key: str, value: Any) -> None:
+        size = _estimate_size(value)
+        max_bytes = self.policy.max_bytes
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[2]
+            if max_bytes is not None and size > max_bytes:
+                # Would evict everything else and still not fit
+                self._oversized += 1
+                return
+            self._entries[key] = (time.monotonic(), value, size)
+            self._bytes += size
+            while len(self._entries) > self.policy.max_entries or (max_bytes is not None and self._bytes > max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def invalidate(self, key: str | None = None) -> int:
+        """Drops one entry, or every entry when `key` is None. Returns how many were removed."""
+        with self._lock:
+            if key is None:
+                removed = len(self._entries)
+                self._entries.clear()
+                self._bytes = 0
+                return removed
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return 0
+            self._bytes -= entry[2]
+            return 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl": self.policy.ttl,
+                "max_entries": self.policy.max_entries,
+                "max_bytes": self.policy.max_bytes,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "oversized": self._oversized,
+            }
+
+
+class ResultCacheRegistry:
+    """Process-wide caches per action. A cache is replaced (and its entries dropped) when its policy changes."""
+
+    _lock = threading.Lock()
+    _caches: dict[str, ResultCache] = {}
+
+    @classmethod
+    def get(cls, action: str, policy: CachePolicy) -> ResultCache:
+        cache = cls._caches.get(action)
+        if cache is not None and cache.policy == policy:
+            return cache
+        with cls._lock:
+            cache = cls._caches.get(action)
+            if cache is None or cache.policy != policy:
+                cache = cls._caches[action] = ResultCache(action, policy)
+            return cache
+
+    @classmethod
+    def invalidate(cls, action: str, key: str | None = None) -> int:
+        cache = cls._caches.get(action)
+        return cache.invalidate(key) if cache is not None else 0
+
+    @classmethod
+    def stats(cls) -> dict[str, dict[str, Any]]:
+        return {action: cache.stats() for action, cache in list(cls._caches.items())}
+
+    @classmethod
+    def clear(cls) -> None:
+        with cls._lock:
+            cls._caches.clear()
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate size of a result: its compact JSON encoding, or the shallow object size if it is not JSON."""
+    try:
+        return len(json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str).encode())
+    except (TypeError, ValueError, RecursionError):
+        return sys.getsizeof(value)
+
+
+def cache_key(
+    policy: CachePolicy,
+    payload: dict[str, Any],
+    environment: dict[str, Any] | None = None,
+    *,
+    ignored_fields: Iterable[str] = (),
+) -> str | None:
+    """
+    Canonical JSON of the payload fields selected by the policy (the whole payload but its `ignored_fields`, the
+    context fields of the action, when it lists none) and the configured environment of the action, or None when
+    they cannot be serialized and the result must not be cached. Lookups and invalidations must pass the same
+    (configured) environment and ignored fields.
+    """
+    if policy.key_fields is not None:
+        payload = {field: payload.get(field) for field in policy.key_fields}
+    else:
+        payload = identity_payload(payload, ignored_fields)
+    try:
+        return dumps_canonical({"payload": payload, "environment": environment})
+    except (TypeError, ValueError):
+        logger.debug("Arguments cannot be canonicalized, skipping the result cache.", exc_info=True)
+        return None
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from contextlib import aclosing
+from typing import Any, AsyncGenerator
+
+# region Constants
+
+# Types of the events yielded by streaming functions (async generators)
+STREAM_EVENT_PROGRESS = "progress"
+STREAM_EVENT_PARTIAL = "partial"
+STREAM_EVENT_RESULT = "result"
+
+# endregion
+
+
+def progress_event(message: str, data: Any = None) -> dict[str, Any]:
+    """Status update without a result (e.g. 'logged in', 'fetching the DNS zone')."""
+    event: dict[str, Any] = {"type": STREAM_EVENT_PROGRESS, "message": message}
+    if data is not None:
+        event["data"] = data
+    return event
+
+
+def partial_event(data: Any, message: str | None = None) -> dict[str, Any]:
+    """A piece of the result that is already usable (e.g. the availability of one date)."""
+    event: dict[str, Any] = {"type": STREAM_EVENT_PARTIAL, "data": data}
+    if message is not None:
+        event["message"] = message
+    return event
+
+
+def result_event(result: dict[str, Any]) -> dict[str, Any]:
+    """Final result of the function: the same dict a non-streaming function would return."""
+    return {"type": STREAM_EVENT_RESULT, "result": result}
+
+
+class StreamCollector:
+    """Folds the events of a stream into the result a non-streaming caller would receive."""
+
+    def __init__(self):
+        self.result: dict[str, Any] | None = None
+        self._last_message: str | None = None
+        self._partials: list[Any] = []
+
+    def add(self, event: dict[str, Any]) -> bool:
+        """Records an event. Returns True when it is the result event (the stream is complete)."""
+        event_type = event.get("type")
+        if event_type == STREAM_EVENT_RESULT:
+            self.result = event["result"]
+            return True
+        if event_type == STREAM_EVENT_PARTIAL:
+            self._partials.append(event.get("data"))
+        self._last_message = event.get("message", self._last_message)
+        return False
+
+    def value(self) -> dict[str, Any]:
+        """The result event, or a summary (last message + partial data) of streams that ended without one."""
+        if self.result is not None:
+            return self.result
+        return {"message": self._last_message or "", "data": self._partials}
+
+
+async def collect_stream(events: AsyncGenerator[dict[str, Any], None]) -> dict[str, Any]:
+    """Consumes a streaming function for callers that only want its final result."""
+    collector = StreamCollector()
+    async with aclosing(events):
+        async for event in events:
+            if collector.add(event):
+                break
+    return collector.value()
@@ -23,6 +23,140 @@ class Settings(BaseSettings):
         description="Fallback timeout (in seconds) when an action omits it.",
     )
     log_level: str = Field(default="INFO", description="Python logging level.")
+    config_watch_mode: str = Field(
+        default="off",
+        description="How api_config.json changes are detected: 'off' (stat on every read), 'auto', 'inotify' or "
+        "'polling' (background watcher publishing immutable snapshots).",
+    )
+    config_poll_interval: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds between checks when api_config.json is watched by polling.",
+    )
+    prewarm_functions: bool = Field(
+        default=False,
+        description="Import every configured function and compile its plan at startup instead of on first use.",
+    )
+    prewarm_workers: int = Field(
+        default=1,
+        ge=1,
+        description="Number of threads used to import function modules during the startup prewarm.",
+    )
+    executor_pools: dict[str, int] = Field(
+        default_factory=dict,
+        description="Thread pool size per executor class, overriding the built-in defaults (io, cpu, browser, ...).",
+    )
+    process_pool_size: int = Field(
+        default=2,
+        ge=1,
+        description="Worker processes available to actions configured with the 'process' executor.",
+    )
+    process_pool_max_tasks: int = Field(
+        default=50,
+        ge=1,
+        description="Tasks a worker process runs before being recycled.",
+    )
+    batch_max_concurrency: int = Field(
+        default=8,
+        ge=1,
+        description="Orders of a /order/batch request running at the same time.",
+    )
+    job_workers: int = Field(
+        default=4,
+        ge=1,
+        description="Background workers running asynchronous orders (POST /order with async=true).",
+    )
+    job_queue_size: int = Field(
+        default=100,
+        ge=1,
+        description="Asynchronous orders waiting for a worker before new ones are rejected.",
+    )
+    job_retention: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Seconds the result of a finished job is kept.",
+    )
+    job_max_stored: int = Field(
+        default=1000,
+        ge=1,
+        description="Maximum jobs kept in the store (the oldest finished ones are evicted first).",
+    )
+    job_store_path: Path | None = Field(
+        default=None,
+        description="Optional SQLite database where job results are persisted to survive restarts.",
+    )
+    result_files_path: Path | None = Field(
+        default=None,
+        description="Directory of the content-addressed store of result files (a temporary directory by default).",
+    )
+    result_files_ttl: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Seconds a result file stays downloadable after it was produced.",
+    )
+    result_files_inline_max_bytes: int = Field(
+        default=256 * 1024,
+        ge=0,
+        description="Largest result file embedded as base64 when an order asks for inline files.",
+    )
+    idempotency_ttl: float = Field(
+        default=3600.0,
+        gt=0,
+        description="Seconds the response of an order sent with an Idempotency-Key is replayed to its retries "
+        "(capped at job_retention and result_files_ttl, as the response points to jobs and result files).",
+    )
+    idempotency_max_keys: int = Field(
+        default=1000,
+        ge=1,
+        description="Maximum idempotency keys remembered (the oldest completed ones are evicted first).",
+    )
+    docker_socket_path: str = Field(
+        default="/var/run/docker.sock",
+        description="Unix socket of the Docker Engine API used to inspect containers and run commands in them.",
+    )
+    container_state_ttl: float = Field(
+        default=30.0,
+        gt=0,
+        description="Seconds a cached container state is trusted while the Docker events stream is unavailable.",
+    )
+    container_events: bool = Field(
+        default=True,
+        description="Keep the container state registry current with the Docker events stream (TTL cache only if off).",
+    )
+    rcon_pool_size: int = Field(
+        default=2,
+        ge=1,
+        description="Maximum authenticated RCON connections kept open per Minecraft server.",
+    )
+    rcon_timeout: float = Field(
+        default=10.0,
+        gt=0,
+        description="Seconds to wait for an RCON connection, login or command response.",
+    )
+    public_ip_providers: list[str] = Field(
+        default_factory=list,
+        description="URLs raced to resolve the public IP (plain text or ipify-like JSON). Built-in list if empty.",
+    )
+    public_ip_ttl: float = Field(
+        default=60.0,
+        gt=0,
+        description="Seconds the resolved public IP is reused before asking the providers again.",
+    )
+    public_ip_timeout: float = Field(
+        default=3.0,
+        gt=0,
+        description="Seconds to wait for the first valid answer of the public IP providers.",
+    )
+    browser_session_max: int = Field(
+        default=2,
+        ge=1,
+        description="Maximum warm browser sessions kept alive for browser-driven functions (e.g. the padel checker).",
+    )
+    browser_session_idle_ttl: float = Field(
+        default=600.0,
+        gt=0,
+        description="Seconds an unused browser session stays open before it is closed.",
+    )
     discord_bot_token: str = Field(
         default="",
         description="Discord bot token used for connecting to the Discord API.",
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import weakref
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class LoopLocal(Generic[T]):
+    """
+    Lazily creates one value per running event loop.
+
+    asyncio primitives, streams and HTTP clients are bound to the loop that first uses them, while this application
+    can run several loops in the same process (API, scheduler, Discord).
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._values: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, T] = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        loop = asyncio.get_running_loop()
+        value = self._values.get(loop)
+        if value is None:
+            with self._lock:
+                value = self._values.get(loop)
+                if value is None:
+                    value = self._values[loop] = self._factory()
+        return value
+
+    def pop(self, loop: asyncio.AbstractEventLoop) -> T | None:
+        with self._lock:
+            return self._values.pop(loop, None)
+
+    def values(self) -> list[T]:
+        with self._lock:
+            return list(self._values.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from os import PathLike
+from typing import Any, Mapping, Sequence
+
+import numpy as np
+
+# region Constants
+
+SAMPLE_MODES = ("majority", "mean", "center")
+DEFAULT_SAMPLE_MODE = "majority"
+DEFAULT_SAMPLE_RADIUS = 0
+DEFAULT_TOLERANCE = 0
+DEFAULT_WINDOW_SPAN = 1
+
+# endregion
+
+
+@dataclass(frozen=True)
+class GridAnalysis:
+    """Classification of every cell of a screenshot and the windows of consecutive available cells."""
+
+    name: str
+    labels: Sequence[str]
+    coords: np.ndarray
+    values: list[Any]
+    available_windows: list[dict[str, Any]]
+
+    def to_dict(self, include_cells: bool = False) -> dict[str, Any]:
+        data: dict[str, Any] = {"name": self.name, "available_windows": self.available_windows}
+        if include_cells:
+            data["cells"] = [
+                {"label": label, "coords": [int(x), int(y)], "value": value}
+                for label, (x, y), value in zip(self.labels, self.coords, self.values)
+            ]
+        return data
+
+
+class AvailabilityGrid:
+    """
+    Vectorized sampler of a spatial schema: a grid of labelled cells (e.g. courts x time slots) whose colour tells
+    whether each one is available.
+
+    Takes the same payload as the spatially schemas (`name`, `config` and `data` cells with optional `coords`, the rest
+    laid out with `coords_step` from the previous one). The cell coordinates and their sampling offsets are computed
+    once per schema (and the clamped pixel index once per image size), so analyzing a screenshot is a single gather of
+    every sampled pixel followed by array operations:
+
+    - each pixel takes the nearest colour of `default_colormap` within `tolerance` (per channel);
+    - `majority` mode gives each cell the value of the colour most of its pixels match, `mean` the one matching the
+      average colour of the sampled square and `center` the one of its centre pixel (None if nothing matches);
+    - a window is `window_span` consecutive truthy cells of the same row. A row is a run of cells laid out by
+      `coords_step`: it ends where the next cell sets its own `coords`.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        labels: Sequence[str],
+        coords: np.ndarray,
+        rows: np.ndarray,
+        colors: np.ndarray,
+        color_values: Sequence[Any],
+        sample_mode: str = DEFAULT_SAMPLE_MODE,
+        sample_radius: int = DEFAULT_SAMPLE_RADIUS,
+        tolerance: int = DEFAULT_TOLERANCE,
+        clamp_coords: bool = True,
+        window_span: int = DEFAULT_WINDOW_SPAN,
+    ):
+        if sample_mode not in SAMPLE_MODES:
+            raise ValueError(f"Unknown sample_mode '{sample_mode}' (expected one of {', '.join(SAMPLE_MODES)}).")
+        if not len(colors):
+            raise ValueError("The schema needs a default_colormap with at least one colour.")
+        self.name = name
+        self.labels = list(labels)
+        self.coords = coords
+        self.rows = rows
+        self.colors = colors.astype(np.int16)
+        self.color_values = list(color_values)
+        self.sample_mode = sample_mode
+        self.sample_radius = 0 if sample_mode == "center" else max(0, int(sample_radius))
+        self.tolerance = int(tolerance)
+        self.clamp_coords = clamp_coords
+        self.window_span = max(1, int(window_span))
+        radius = self.sample_radius
+        offsets_y, offsets_x = np.mgrid[-radius : radius + 1, -radius : radius + 1]
+        # (cells, samples) pixel coordinates, independent of the image size
+        self._sample_x = coords[:, :1] + offsets_x.ravel()[None, :]
+        self._sample_y = coords[:, 1:] + offsets_y.ravel()[None, :]
+        self._lock = threading.Lock()
+        self._indexes: dict[tuple[int, int], tuple[np.ndarray, np.ndarray | None]] = {}
+
+    @classmethod
+    def from_payload(cls, payload: Mapping[str, Any]) -> AvailabilityGrid:
+        config = payload.get("config", {})
+        step = np.asarray(config.get("coords_step", [0, 0]), dtype=np.int64)
+        coords: list[np.ndarray] = []
+        rows: list[int] = []
+        for cell in payload.get("data", []):
+            if "coords" in cell:
+                coords.append(np.asarray(cell["coords"], dtype=np.int64))
+                rows.append(rows[-1] + 1 if rows else 0)
+            elif coords:
+                coords.append(coords[-1] + step)
+                rows.append(rows[-1])
+            else:
+                raise ValueError(f"The first cell of schema '{payload.get('name')}' has no coords.")
+        colormap = config.get("default_colormap", {})
+        return cls(
+            name=payload.get("name", ""),
+            labels=[cell.get("label", str(index)) for index, cell in enumerate(payload.get("data", []))],
+            coords=np.array(coords, dtype=np.int64).reshape(-1, 2),
+            rows=np.array(rows, dtype=np.int64),
+            colors=np.array([_hex_to_rgb(color) for color in colormap], dtype=np.int16).reshape(-1, 3),
+            color_values=list(colormap.values()),
+            sample_mode=config.get("sample_mode", DEFAULT_SAMPLE_MODE),
+            sample_radius=config.get("sample_radius", DEFAULT_SAMPLE_RADIUS),
+            tolerance=config.get("tolerance", DEFAULT_TOLERANCE),
+            clamp_coords=config.get("clamp_coords", True),
+            window_span=config.get("window_span", DEFAULT_WINDOW_SPAN),
+        )
+
+    def analyze(self, image: str | PathLike | np.ndarray | Any) -> GridAnalysis:
+        """Classifies every cell of a screenshot (path, PIL image or HxWx3 array) and finds the available windows."""
+        pixels = _load_rgb(image)
+        flat_index, valid = self._pixel_index(pixels.shape[0], pixels.shape[1])
+        # One gather of every sampled pixel, channel first so each channel is contiguous: (3, cells, samples)
+        samples = np.take(pixels.ravel(), flat_index).astype(np.int16)
+        classes = self._classify(samples, valid)
+        values = [self.color_values[k] if k >= 0 else None for k in classes.tolist()]
+        return GridAnalysis(
+            name=self.name,
+            labels=self.labels,
+            coords=self.coords,
+            values=values,
+            available_windows=self._windows(classes),
+        )
+
+    def _pixel_index(self, height: int, width: int) -> tuple[np.ndarray, np.ndarray | None]:
+        """
+        Flat index of every channel of every sample for an image size, (3, cells, samples), and the mask of the
+        samples inside the image when they are not clamped.
+        """
+        key = (height, width)
+        with self._lock:
+            cached = self._indexes.get(key)
+        if cached is not None:
+            return cached
+        xs, ys = self._sample_x, self._sample_y
+        valid = None
+        if not self.clamp_coords:
+            valid = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        pixel = np.clip(ys, 0, height - 1) * width + np.clip(xs, 0, width - 1)
+        index = pixel[None, :, :] * 3 + np.arange(3)[:, None, None]
+        with self._lock:
+            self._indexes[key] = (index, valid)
+        return index, valid
+
+    def _classify(self, samples: np.ndarray, valid: np.ndarray | None) -> np.ndarray:
+        """Index of the colormap colour of each cell, -1 when none matches."""
+        if self.sample_mode == "mean":
+            weights = np.ones(samples.shape[1:]) if valid is None else valid.astype(np.float64)
+            counts = weights.sum(axis=1)
+            mean = (samples * weights).sum(axis=2) / np.maximum(counts, 1)
+            nearest, matched = self._match(np.rint(mean).astype(np.int16)[:, :, None])
+            return np.where(matched[:, 0] & (counts > 0), nearest[:, 0], -1)
+
+        nearest, matched = self._match(samples)
+        if valid is not None:
+            matched &= valid
+        # Votes of each cell for each colour, unmatched samples voting for an extra discarded one: (cells, colours)
+        cells, colours = samples.shape[1], len(self.colors)
+        ballots = np.where(matched, nearest, colours) + np.arange(cells)[:, None] * (colours + 1)
+        votes = np.bincount(ballots.ravel(), minlength=cells * (colours + 1)).reshape(cells, colours + 1)[:, :colours]
+        return np.where(votes.any(axis=1), votes.argmax(axis=1), -1)
+
+    def _match(self, samples: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Nearest colour of each (3, cells, samples) sample and whether it is within the tolerance."""
+        red, green, blue = samples
+        nearest = np.zeros(red.shape, dtype=np.int64)
+        best = None
+        for k, (r, g, b) in enumerate(self.colors.tolist()):
+            # Largest channel difference, computed in place on contiguous channel planes
+            distance = np.abs(red - r)
+            np.maximum(distance, np.abs(green - g), out=distance)
+            np.maximum(distance, np.abs(blue - b), out=distance)
+            if best is None:
+                best = distance
+            else:
+                nearest[distance < best] = k
+                np.minimum(best, distance, out=best)
+        return nearest, best <= self.tolerance
+
+    def _windows(self, classes: np.ndarray) -> list[dict[str, Any]]:
+        span = self.window_span
+        if len(classes) < span:
+            return []
+        truthy = np.array([bool(value) for value in self.color_values] + [False], dtype=bool)
+        available = truthy[classes].astype(np.int64)
+        # Sliding sum over `span` cells: a window starts where all of them are available and in the same row
+        totals = np.convolve(available, np.ones(span, dtype=np.int64), mode="valid")
+        same_row = self.rows[: len(totals)] == self.rows[span - 1 :]
+        starts = np.flatnonzero((totals == span) & same_row)
+        return [
+            {
+                "start_index": int(start),
+                "end_index": int(start + span - 1),
+                "start_label": self.labels[start],
+                "end_label": self.labels[start + span - 1],
+            }
+            for start in starts
+        ]
+
+
+# region Utils
+
+
+def _hex_to_rgb(color: str) -> tuple[int, int, int]:
+    color = color.lstrip("#")
+    if len(color) == 3:
+        color = "".join(channel * 2 for channel in color)
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16)
+
+
+def _load_rgb(image: str | PathLike | np.ndarray | Any) -> np.ndarray:
+    """HxWx3 uint8 array of a screenshot. Pillow is only needed for paths and PIL images."""
+    if isinstance(image, np.ndarray):
+        pixels = image
+    else:
+        from PIL import Image
+
+        if isinstance(image, (str, PathLike)):
+            with Image.open(image) as opened:
+                pixels = np.asarray(opened.convert("RGB"))
+        else:
+            pixels = np.asarray(image.convert("RGB"))
+    if pixels.ndim == 2:
+        pixels = np.repeat(pixels[..., None], 3, axis=2)
+    return np.ascontiguousarray(pixels[..., :3], dtype=np.uint8)
+
+
+# endregion
@@ -0,0 +1,247 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Sequence
+
+import httpx
+
+from mob.logger.logger import get_logger
+
+logger = get_logger("utils.docker")
+
+# region Constants
+
+DEFAULT_DOCKER_SOCKET = "/var/run/docker.sock"
+DEFAULT_DOCKER_API_VERSION = "v1.41"
+DEFAULT_DOCKER_TIMEOUT_SECONDS = 30.0
+DEFAULT_DOCKER_MAX_CONNECTIONS = 10
+
+STDOUT = "stdout"
+STDERR = "stderr"
+
+# Output of non-TTY execs is multiplexed in frames: 8-byte header (stream id, 3 padding bytes, big-endian size)
+_STREAM_NAMES = {0: STDOUT, 1: STDOUT, 2: STDERR}
+_FRAME_HEADER = struct.Struct(">BxxxL")
+# Commands are started through a shell that first prints their PID inside the container, so an interrupted exec can be
+# killed: the API cannot stop an exec and the Pid of /exec/{id}/json belongs to the host PID namespace
+_PID_PREAMBLE = ("sh", "-c", 'echo "$$" && exec "$@"', "sh")
+# The runtime starts exec processes in their own session, so the PID is also their process group: the signal goes to
+# the group (the command and its children), or to the PID alone when it does not lead a group
+_KILL_SCRIPT = 'kill -s "$0" -- "-$1" 2>/dev/null || kill -s "$0" "$1"'
+# Seconds an interrupted command gets to exit after SIGTERM before it is sent SIGKILL
+_KILL_GRACE_SECONDS = 5.0
+_KILL_POLL_SECONDS = 0.25
+
+# endregion
+
+
+class DockerError(RuntimeError):
+    """Error response of the Docker Engine API."""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class ContainerNotFoundError(DockerError):
+    """The container does not exist on this host."""
+
+
+@dataclass(frozen=True)
+class ExecResult:
+    exit_code: int
+    stdout: str
+    stderr: str
+
+
+class DockerClient:
+    """
+    Minimal async client of the Docker Engine API over its unix socket: container inspection and command execution
+    without spawning the docker CLI. Connections are kept alive and reused between calls.
+
+    The client is bound to the event loop that uses it first: get it through `app_utils.get_docker_client()`.
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_DOCKER_SOCKET,
+        *,
+        api_version: str = DEFAULT_DOCKER_API_VERSION,
+        timeout: float = DEFAULT_DOCKER_TIMEOUT_SECONDS,
+        max_connections: int = DEFAULT_DOCKER_MAX_CONNECTIONS,
+    ):
+        self.socket_path = socket_path
+        transport = httpx.AsyncHTTPTransport(
+            uds=socket_path,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+        # Exec output is streamed for as long as the command runs: only connecting and writing are bounded
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            base_url=f"http://docker/{api_version}",
+            timeout=httpx.Timeout(timeout, read=None),
+        )
+        # SIGKILL escalations of interrupted execs, awaited on close
+        self._kills: set[asyncio.Task] = set()
+
+    async def inspect_container(self, container: str) -> dict[str, Any]:
+        """Returns the `docker inspect` document of a container. Raises ContainerNotFoundError if it does not exist."""
+        response = await self._client.get(f"/containers/{container}/json")
+        _raise_for_status(response, container)
+        return response.json()
+
+    async def is_container_running(self, container: str) -> bool:
+        """Same as `docker inspect -f '{{.State.Running}}'`: False when the container is stopped or missing."""
+        try:
+            state = (await self.inspect_container(container)).get("State", {})
+        except ContainerNotFoundError:
+            return False
+        return bool(state.get("Running"))
+
+    async def list_containers(self, *, include_stopped: bool = True) -> list[dict[str, Any]]:
+        """Same as `docker ps [--all]`: summaries with `Id`, `Names` ('/name') and `State` ('running', 'exited'...)."""
+        response = await self._client.get("/containers/json", params={"all": "true" if include_stopped else "false"})
+        _raise_for_status(response, "containers", container=False)
+        return response.json()
+
+    async def events(self, *, since: float | None = None, types: Sequence[str] = ("container",)) -> AsyncIterator[dict]:
+        """
+        Subscribes to the events stream of the daemon (`docker events`), starting at `since` (epoch seconds) so events
+        that happened while a previous view was being built are not lost. Runs until the connection is closed.
+        """
+        params = {"filters": json.dumps({"type": list(types)})}
+        if since is not None:
+            params["since"] = str(int(since))
+        async with self._client.stream("GET", "/events", params=params) as response:
+            if response.is_error:
+                await response.aread()
+                _raise_for_status(response, "events", container=False)
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    async def create_exec(self, container: str, cmd: Sequence[str]) -> str:
+        """Creates an exec instance of `cmd` in a running container and returns its id."""
+        response = await self._client.post(
+            f"/containers/{container}/exec",
+            json={"Cmd": list(cmd), "AttachStdout": True, "AttachStderr": True, "Tty": False},
+        )
+        _raise_for_status(response, container)
+        return response.json()["Id"]
+
+    async def stream_exec(self, exec_id: str) -> AsyncIterator[tuple[str, bytes]]:
+        """Starts an exec instance and yields its output as (`stdout`|`stderr`, chunk) while the command runs."""
+        async with self._client.stream(
+            "POST", f"/exec/{exec_id}/start", json={"Detach": False, "Tty": False}
+        ) as response:
+            if response.is_error:
+                await response.aread()
+                _raise_for_status(response, exec_id, container=False)
+            buffer = bytearray()
+            async for data in response.aiter_raw():
+                buffer.extend(data)
+                while len(buffer) >= _FRAME_HEADER.size:
+                    stream_id, size = _FRAME_HEADER.unpack_from(buffer)
+                    end = _FRAME_HEADER.size + size
+                    if len(buffer) < end:
+                        break
+                    yield _STREAM_NAMES.get(stream_id, STDOUT), bytes(buffer[_FRAME_HEADER.size : end])
+                    del buffer[:end]
+
+    async def inspect_exec(self, exec_id: str) -> dict[str, Any]:
+        response = await self._client.get(f"/exec/{exec_id}/json")
+        _raise_for_status(response, exec_id, container=False)
+        return response.json()
+
+    async def exec(self, container: str, cmd: Sequence[str]) -> ExecResult:
+        """
+        Runs `cmd` in a container and collects its output, like `docker exec`. If the call is cancelled (or the
+        output stream fails) while the command runs, the command is killed instead of being left running.
+        """
+        exec_id = await self.create_exec(container, [*_PID_PREAMBLE, *cmd])
+        chunks: dict[str, list[bytes]] = {STDOUT: [], STDERR: []}
+        preamble = bytearray()
+        pid: int | None = None
+        try:
+            async for stream, data in self.stream_exec(exec_id):
+                if pid is None and stream == STDOUT:
+                    preamble.extend(data)
+                    line, newline, data = bytes(preamble).partition(b"\n")
+                    if not newline:
+                        continue
+                    pid = int(line)
+                chunks[stream].append(data)
+        except BaseException:
+            if pid is not None:
+                await asyncio.shield(self._kill_exec(container, exec_id, pid))
+            raise
+        if pid is None:
+            # The shell failed before printing the PID: whatever it wrote is the output
+            chunks[STDOUT].append(bytes(preamble))
+        exit_code = (await self.inspect_exec(exec_id)).get("ExitCode")
+        return ExecResult(
+            exit_code=exit_code if exit_code is not None else -1,
+            stdout=b"".join(chunks[STDOUT]).decode(errors="replace").strip(),
+            stderr=b"".join(chunks[STDERR]).decode(errors="replace").strip(),
+        )
+
+    async def _kill_exec(self, container: str, exec_id: str, pid: int) -> None:
+        """
+        Sends SIGTERM to the process group of an interrupted exec (through another exec) if it is still running, and
+        SIGKILL in the background if it is still running after _KILL_GRACE_SECONDS.
+        """
+        if await self._signal_exec(container, exec_id, pid, "TERM"):
+            task = asyncio.create_task(self._escalate_kill(container, exec_id, pid))
+            self._kills.add(task)
+            task.add_done_callback(self._kills.discard)
+
+    async def _escalate_kill(self, container: str, exec_id: str, pid: int) -> None:
+        deadline = asyncio.get_running_loop().time() + _KILL_GRACE_SECONDS
+        try:
+            while asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(_KILL_POLL_SECONDS)
+                if not (await self.inspect_exec(exec_id)).get("Running"):
+                    return
+        except (DockerError, httpx.HTTPError):
+            pass
+        await self._signal_exec(container, exec_id, pid, "KILL")
+
+    async def _signal_exec(self, container: str, exec_id: str, pid: int, signal: str) -> bool:
+        """Sends `signal` to the process group of an exec if it is still running. Returns whether it was sent."""
+        try:
+            if not (await self.inspect_exec(exec_id)).get("Running"):
+                return False
+            kill_id = await self.create_exec(container, ["sh", "-c", _KILL_SCRIPT, signal, str(pid)])
+            async for _ in self.stream_exec(kill_id):
+                pass
+            logger.info("Sent SIG%s to process %s of interrupted exec %s in %s", signal, pid, exec_id, container)
+            return True
+        except (DockerError, httpx.HTTPError) as exc:
+            logger.warning("Could not kill process %s of interrupted exec %s in %s: %s", pid, exec_id, container, exc)
+            return False
+
+    async def aclose(self) -> None:
+        # Pending SIGKILLs are bounded by the grace period: let them run instead of leaving the commands alive
+        await asyncio.gather(*self._kills, return_exceptions=True)
+        await self._client.aclose()
+
+
+# region Utils
+
+
+def _raise_for_status(response: httpx.Response, resource: str, *, container: bool = True) -> None:
+    if not response.is_error:
+        return
+    try:
+        message = response.json().get("message") or response.text
+    except ValueError:
+        message = response.text
+    if response.status_code == 404 and container:
+        raise ContainerNotFoundError(404, message or f"No such container: {resource}")
+    raise DockerError(response.status_code, message or f"Docker API error {response.status_code}")
+
+
+# endregion
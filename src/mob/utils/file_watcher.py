@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable
+
+from mob.logger.logger import get_logger
+
+logger = get_logger("utils.file_watcher")
+
+# region Constants
+
+WATCH_MODE_AUTO = "auto"
+WATCH_MODE_INOTIFY = "inotify"
+WATCH_MODE_POLLING = "polling"
+
+# Subset of <sys/inotify.h> flags relevant for detecting config file rewrites
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0x00000800
+IN_CLOEXEC = 0x00080000
+
+_FILE_EVENTS = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_DELETE_SELF | IN_MOVE_SELF
+_DIRECTORY_EVENTS = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_ATTRIB
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Time the watcher waits for the burst of events produced by a single save to settle
+DEFAULT_DEBOUNCE_SECONDS = 0.05
+DEFAULT_POLL_INTERVAL = 1.0
+
+# endregion
+
+
+class FileWatcher(ABC):
+    """Background thread invoking `on_change` whenever the watched file may have changed."""
+
+    mode: str = ""
+
+    def __init__(self, path: Path, on_change: Callable[[], None]):
+        self.path = path
+        self.on_change = on_change
+        self._stop_event = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"mob-{self.mode}-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = 2.0) -> None:
+        self._stop_event.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+        self._thread = None
+
+    def _notify(self) -> None:
+        try:
+            self.on_change()
+        except Exception:
+            logger.exception("File watcher callback failed for %s", self.path)
+
+    @abstractmethod
+    def _run(self) -> None:
+        """Body of the watcher thread: runs until `_stop_event` is set."""
+
+
+class PollingFileWatcher(FileWatcher):
+    """Portable fallback: asks the callback to re-check the file every `poll_interval` seconds."""
+
+    mode = WATCH_MODE_POLLING
+
+    def __init__(self, path: Path, on_change: Callable[[], None], poll_interval: float = DEFAULT_POLL_INTERVAL):
+        super().__init__(path, on_change)
+        self.poll_interval = poll_interval
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            self._notify()
+
+
+class InotifyFileWatcher(FileWatcher):
+    """
+    Linux inotify watcher. Watches both the file (in-place writes, bind mounts) and its parent directory (editors
+    and deploy tools that replace the file through a rename).
+    """
+
+    mode = WATCH_MODE_INOTIFY
+
+    def __init__(
+        self,
+        path: Path,
+        on_change: Callable[[], None],
+        debounce: float = DEFAULT_DEBOUNCE_SECONDS,
+    ):
+        super().__init__(path, on_change)
+        self.debounce = debounce
+        self._libc = _load_libc()
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._file_wd: int | None = None
+        try:
+            self._add_watch(self.path.parent, _DIRECTORY_EVENTS)
+        except OSError:
+            # The caller falls back to polling: do not leak the inotify instance
+            os.close(self._fd)
+            self._fd = -1
+            raise
+        self._watch_file()
+
+    def stop(self, timeout: float | None = 2.0) -> None:
+        super().stop(timeout)
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _add_watch(self, path: Path, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(path)), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch failed for {path!s}: {os.strerror(errno)}")
+        return wd
+
+    def _watch_file(self) -> None:
+        # The file can be missing or replaced by a new inode: (re)register it whenever possible
+        try:
+            self._file_wd = self._add_watch(self.path, _FILE_EVENTS)
+        except OSError:
+            self._file_wd = None
+
+    def _drain_events(self) -> bool:
+        """Reads every pending event and reports if any of them concerns the watched file."""
+        relevant = False
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            offset = 0
+            while offset < len(buffer):
+                wd, _mask, _cookie, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+                offset += _EVENT_HEADER.size
+                name = buffer[offset : offset + name_length].rstrip(b"\0")
+                offset += name_length
+                if wd == self._file_wd or os.fsdecode(name) == self.path.name:
+                    relevant = True
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            fd = self._fd
+            if fd < 0:
+                return
+            readable, _, _ = select.select([fd], [], [], 0.5)
+            if not readable or not self._drain_events():
+                continue
+            # Let the writer finish the burst of events of a single save before reloading
+            if self._stop_event.wait(self.debounce):
+                return
+            if self._fd >= 0:
+                self._drain_events()
+                self._watch_file()
+            self._notify()
+
+
+def create_file_watcher(
+    path: Path,
+    on_change: Callable[[], None],
+    *,
+    mode: str = WATCH_MODE_AUTO,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> FileWatcher:
+    """
+    Builds the watcher for the requested mode. `auto` prefers inotify and falls back to polling when it is not
+    available (non-Linux hosts, exhausted inotify instances, ...).
+    """
+    if mode not in (WATCH_MODE_AUTO, WATCH_MODE_INOTIFY, WATCH_MODE_POLLING):
+        raise ValueError(f"Unknown file watch mode '{mode}'.")
+
+    if mode in (WATCH_MODE_AUTO, WATCH_MODE_INOTIFY):
+        try:
+            return InotifyFileWatcher(path, on_change)
+        except OSError:
+            if mode == WATCH_MODE_INOTIFY:
+                raise
+            logger.warning("inotify is not available for %s, falling back to polling.", path, exc_info=True)
+
+    return PollingFileWatcher(path, on_change, poll_interval=poll_interval)
+
+
+# region Utils
+
+
+def _load_libc() -> ctypes.CDLL:
+    library = ctypes.util.find_library("c")
+    if library is None:
+        raise OSError("libc not found: inotify is not available on this platform.")
+    libc = ctypes.CDLL(library, use_errno=True)
+    if not hasattr(libc, "inotify_init1"):
+        raise OSError("libc does not expose inotify on this platform.")
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_init1.restype = ctypes.c_int
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    libc.inotify_add_watch.restype = ctypes.c_int
+    return libc
+
+
+# endregion
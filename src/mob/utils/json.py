@@ -180,6 +180,14 @@ def extract_json_from_llm_response(
     return result
 
 
+def dumps_canonical(value: Any) -> str:
+    """
+    Canonical JSON rendering (sorted keys, no whitespace) used to build lookup keys from payloads. Raises TypeError
+    when the value is not JSON serializable.
+    """
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
 if __name__ == "__main__":
 
     test_cases = [
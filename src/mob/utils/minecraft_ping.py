@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import struct
+import time
+from dataclasses import asdict, dataclass
+from typing import Any
+
+# region Constants
+
+DEFAULT_MINECRAFT_PORT = 25565
+DEFAULT_PING_TIMEOUT_SECONDS = 5.0
+# The ping/pong only refines the latency: a server that does not answer it keeps the status latency
+PONG_TIMEOUT_SECONDS = 1.0
+
+# -1 asks the server to answer with its own protocol version (Server List Ping of Minecraft 1.7+)
+_PROTOCOL_VERSION = -1
+_STATUS_STATE = 1
+_HANDSHAKE_PACKET = 0x00
+_STATUS_REQUEST_PACKET = 0x00
+_PING_PACKET = 0x01
+_MAX_VARINT_BYTES = 5
+_MAX_PACKET_BYTES = 2 * 1024 * 1024
+_FORMATTING_CODE_PATTERN = re.compile(r"§[0-9a-fk-or]", re.IGNORECASE)
+
+# endregion
+
+
+class ServerListPingError(RuntimeError):
+    """The server answered something that is not a valid Server List Ping response."""
+
+
+@dataclass(frozen=True)
+class ServerStatus:
+    version: str
+    protocol: int
+    players_online: int
+    players_max: int
+    motd: str
+    latency_ms: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+async def server_list_ping(
+    host: str, port: int = DEFAULT_MINECRAFT_PORT, *, timeout: float = DEFAULT_PING_TIMEOUT_SECONDS
+) -> ServerStatus:
+    """
+    Asks a Minecraft server for the status shown in the multiplayer list (version, players, MOTD) and measures the
+    latency with a ping/pong exchange, like the game client does. The connection and the status are bounded by
+    `timeout` (asyncio.TimeoutError); the ping/pong only gets what is left of it, at most PONG_TIMEOUT_SECONDS, and
+    the status round trip is reported when it does not complete. Raises OSError when the server cannot be reached and
+    ServerListPingError when its answer is not a valid status.
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    async with asyncio.timeout_at(deadline):
+        reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async with asyncio.timeout_at(deadline):
+            status, latency_ms = await _read_status(reader, writer, host, port)
+        pong_timeout = min(PONG_TIMEOUT_SECONDS, deadline - asyncio.get_running_loop().time())
+        try:
+            async with asyncio.timeout(max(pong_timeout, 0.0)):
+                latency_ms = await _ping_latency(reader, writer) or latency_ms
+        except (OSError, asyncio.IncompleteReadError, ServerListPingError, TimeoutError):
+            # Servers that close, stall or answer garbage instead keep the status round trip
+            pass
+    finally:
+        writer.close()
+    return _parse_status(status, latency_ms)
+
+
+async def _read_status(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter, host: str, port: int
+) -> tuple[Any, float]:
+    """Handshake and status request. Returns the status JSON and the round trip in milliseconds."""
+    handshake = (
+        _varint(_HANDSHAKE_PACKET)
+        + _varint(_PROTOCOL_VERSION)
+        + _string(host)
+        + struct.pack(">H", port)
+        + _varint(_STATUS_STATE)
+    )
+    started = time.perf_counter()
+    writer.write(_frame(handshake) + _frame(_varint(_STATUS_REQUEST_PACKET)))
+    await writer.drain()
+    packet = await _read_packet(reader)
+    latency_ms = (time.perf_counter() - started) * 1000
+    packet_id, offset = _decode_varint(packet, 0)
+    if packet_id != _STATUS_REQUEST_PACKET:
+        raise ServerListPingError(f"Unexpected status packet id {packet_id:#x}.")
+    length, offset = _decode_varint(packet, offset)
+    try:
+        return json.loads(packet[offset : offset + length].decode("utf-8")), latency_ms
+    except ValueError as exc:
+        raise ServerListPingError(f"Invalid status JSON: {exc}") from exc
+
+
+async def _ping_latency(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> float | None:
+    """Round trip of a ping/pong in milliseconds, or None when the pong does not echo the token."""
+    token = int.from_bytes(os.urandom(8), "big", signed=True)
+    started = time.perf_counter()
+    writer.write(_frame(_varint(_PING_PACKET) + struct.pack(">q", token)))
+    await writer.drain()
+    pong = await _read_packet(reader)
+    if not pong.endswith(struct.pack(">q", token)):
+        return None
+    return (time.perf_counter() - started) * 1000
+
+
+def _parse_status(status: Any, latency_ms: float) -> ServerStatus:
+    if not isinstance(status, dict):
+        raise ServerListPingError(f"The status JSON is a {type(status).__name__}, not an object.")
+    version = status.get("version") or {}
+    players = status.get("players") or {}
+    if not isinstance(version, dict) or not isinstance(players, dict):
+        raise ServerListPingError("The version and players of the status JSON must be objects.")
+    try:
+        return ServerStatus(
+            version=str(version.get("name", "")),
+            protocol=int(version.get("protocol", 0)),
+            players_online=int(players.get("online", 0)),
+            players_max=int(players.get("max", 0)),
+            motd=_FORMATTING_CODE_PATTERN.sub("", _chat_text(status.get("description", ""))).strip(),
+            latency_ms=round(latency_ms, 3),
+        )
+    except (TypeError, ValueError) as exc:
+        raise ServerListPingError(f"Invalid status field: {exc}") from exc
+
+
+# region Utils
+
+
+def _varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    data = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            data.append(byte | 0x80)
+        else:
+            data.append(byte)
+            return bytes(data)
+
+
+def _decode_varint(data: bytes, offset: int) -> tuple[int, int]:
+    result = 0
+    for shift in range(_MAX_VARINT_BYTES):
+        if offset >= len(data):
+            raise ServerListPingError("Truncated VarInt.")
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << (7 * shift)
+        if not byte & 0x80:
+            return (result - (1 << 32) if result & (1 << 31) else result), offset
+    raise ServerListPingError("VarInt too long.")
+
+
+def _string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return _varint(len(data)) + data
+
+
+def _frame(payload: bytes) -> bytes:
+    return _varint(len(payload)) + payload
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> bytes:
+    length = 0
+    for shift in range(_MAX_VARINT_BYTES):
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << (7 * shift)
+        if not byte & 0x80:
+            break
+    else:
+        raise ServerListPingError("VarInt too long.")
+    if not 0 < length <= _MAX_PACKET_BYTES:
+        raise ServerListPingError(f"Invalid packet length {length}.")
+    return await reader.readexactly(length)
+
+
+def _chat_text(component: Any) -> str:
+    """Flattens a chat component (plain string or {"text", "extra"} tree) to its text."""
+    if isinstance(component, str):
+        return component
+    if isinstance(component, list):
+        return "".join(_chat_text(part) for part in component)
+    if isinstance(component, dict):
+        return str(component.get("text", "")) + _chat_text(component.get("extra", []))
+    return ""
+
+
+# endregion
@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from mob.logger.logger import get_logger
+
+logger = get_logger("utils.rcon")
+
+# region Constants
+
+DEFAULT_RCON_PORT = 25575
+DEFAULT_RCON_TIMEOUT_SECONDS = 10.0
+DEFAULT_RCON_POOL_SIZE = 2
+DEFAULT_RCON_HEALTH_CHECK_INTERVAL_SECONDS = 30.0
+
+# Packet types of the Source RCON protocol spoken by Minecraft servers
+SERVERDATA_AUTH = 3
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_RESPONSE_VALUE = 0
+
+# Packets are framed as: little-endian int32 size, int32 request id, int32 type, body, two NUL bytes
+_SIZE = struct.Struct("<i")
+_HEADER = struct.Struct("<ii")
+# Responses are split in packets of 4096 characters, which may take up to 4 bytes each in UTF-8
+_MAX_PACKET_SIZE = 4 * 4096 + _HEADER.size + 2
+_AUTH_REQUEST_ID = 1
+_MAX_REQUEST_ID = 0x7FFFFFFF
+
+_RECONNECT_DELAY_SECONDS = 1.0
+_MAX_RECONNECT_DELAY_SECONDS = 30.0
+
+# endregion
+
+
+class RconError(RuntimeError):
+    """Base error of the RCON client."""
+
+
+class RconAuthError(RconError):
+    """The server rejected the RCON password."""
+
+
+class RconConnectionError(RconError, ConnectionError):
+    """The RCON connection is closed or the server did not answer in time."""
+
+
+@dataclass
+class _Pending:
+    future: asyncio.Future
+    command_id: int | None
+    fragments: list[bytes] = field(default_factory=list)
+
+
+class RconConnection:
+    """
+    One authenticated RCON session. Several commands can be in flight at once: each is sent with its own request id
+    followed by an empty RESPONSE_VALUE packet. The server answers packets in order, so the echo of that empty packet
+    marks the end of the (possibly fragmented) response of the command. Use `RconConnection.open` to create it.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, *, timeout: float):
+        self.timeout = timeout
+        self.last_used = time.monotonic()
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(_AUTH_REQUEST_ID + 1)
+        self._pending: dict[int, _Pending] = {}
+        self._responses: dict[int, _Pending] = {}
+        self._write_lock = asyncio.Lock()
+        self._reader_task: asyncio.Task | None = None
+        self._closed = False
+
+    @classmethod
+    async def open(
+        cls, host: str, port: int, password: str, *, timeout: float = DEFAULT_RCON_TIMEOUT_SECONDS
+    ) -> RconConnection:
+        """Connects and logs in. Raises RconAuthError when the password is rejected."""
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        except (OSError, asyncio.TimeoutError) as exc:
+            raise RconConnectionError(f"Cannot connect to RCON at {host}:{port}: {exc or 'timeout'}") from exc
+        connection = cls(reader, writer, timeout=timeout)
+        try:
+            await asyncio.wait_for(connection._login(password), timeout)
+        except BaseException as exc:
+            connection.close()
+            if isinstance(exc, (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError)):
+                raise RconConnectionError(f"RCON login to {host}:{port} failed: {exc or 'timeout'}") from exc
+            raise
+        connection._reader_task = asyncio.get_running_loop().create_task(connection._read_loop())
+        return connection
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def command(self, command: str) -> str:
+        """Runs a console command (without the leading slash) and returns its response."""
+        command_id, marker_id = self._next_id(), self._next_id()
+        data = _encode(command_id, SERVERDATA_EXECCOMMAND, command)
+        data += _encode(marker_id, SERVERDATA_RESPONSE_VALUE, "")
+        return await self._request(data, marker_id, command_id)
+
+    async def ping(self) -> bool:
+        """Health check: whether the server still answers on this connection."""
+        marker_id = self._next_id()
+        try:
+            await self._request(_encode(marker_id, SERVERDATA_RESPONSE_VALUE, ""), marker_id, None)
+        except RconConnectionError:
+            return False
+        return True
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._writer.close()
+        if self._reader_task is not None and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+        self._fail_pending(RconConnectionError("RCON connection closed."))
+
+    async def _login(self, password: str) -> None:
+        self._writer.write(_encode(_AUTH_REQUEST_ID, SERVERDATA_AUTH, password))
+        await self._writer.drain()
+        while True:
+            request_id, packet_type, _ = await _read_packet(self._reader)
+            # Some servers send an empty RESPONSE_VALUE before the AUTH_RESPONSE
+            if packet_type != SERVERDATA_AUTH_RESPONSE:
+                continue
+            if request_id == -1:
+                raise RconAuthError("RCON password rejected by the server.")
+            return
+
+    async def _request(self, data: bytes, marker_id: int, command_id: int | None) -> str:
+        if self._closed:
+            raise RconConnectionError("RCON connection closed.")
+        pending = _Pending(asyncio.get_running_loop().create_future(), command_id)
+        self._pending[marker_id] = pending
+        if command_id is not None:
+            self._responses[command_id] = pending
+        self.last_used = time.monotonic()
+        try:
+            async with self._write_lock:
+                self._writer.write(data)
+                await self._writer.drain()
+            return await asyncio.wait_for(pending.future, self.timeout)
+        except RconError:
+            raise
+        except asyncio.TimeoutError:
+            # The server stopped answering: later responses could not be matched reliably
+            self.close()
+            raise RconConnectionError(f"No RCON response in {self.timeout} s.") from None
+        except OSError as exc:
+            self.close()
+            raise RconConnectionError(f"RCON connection lost: {exc}") from exc
+        finally:
+            self._pending.pop(marker_id, None)
+            if command_id is not None:
+                self._responses.pop(command_id, None)
+            self.last_used = time.monotonic()
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                request_id, _, body = await _read_packet(self._reader)
+                pending = self._pending.get(request_id)
+                if pending is not None:
+                    response = b"".join(pending.fragments).decode("utf-8", errors="replace")
+                    if not pending.future.done():
+                        pending.future.set_result(response)
+                elif (pending := self._responses.get(request_id)) is not None:
+                    pending.fragments.append(body)
+        except asyncio.CancelledError:
+            raise
+        except (OSError, asyncio.IncompleteReadError, RconError) as exc:
+            logger.debug("RCON connection closed by the server: %s", exc)
+        finally:
+            self.close()
+
+    def _next_id(self) -> int:
+        # Request ids are positive int32 (-1 means authentication failure)
+        request_id = next(self._ids)
+        if request_id > _MAX_REQUEST_ID:
+            self._ids = itertools.count(_AUTH_REQUEST_ID + 1)
+            request_id = next(self._ids)
+        return request_id
+
+    def _fail_pending(self, error: Exception) -> None:
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+
+class RconPool:
+    """
+    Authenticated RCON connections to one server, opened on demand up to `size` and shared by concurrent commands.
+
+    Connections idle for more than `health_check_interval` seconds are pinged before being reused and replaced when
+    they do not answer. When the server cannot be reached, new connections are attempted with an exponential backoff
+    (1 s to 30 s) and commands fail fast in between. Bound to the event loop that uses it.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        *,
+        size: int = DEFAULT_RCON_POOL_SIZE,
+        timeout: float = DEFAULT_RCON_TIMEOUT_SECONDS,
+        health_check_interval: float = DEFAULT_RCON_HEALTH_CHECK_INTERVAL_SECONDS,
+    ):
+        self.host = host
+        self.port = port
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._password = password
+        self._connections: list[RconConnection] = []
+        self._connect_lock = asyncio.Lock()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._counters = {"commands": 0, "errors": 0, "connects": 0, "health_checks": 0, "unhealthy": 0}
+
+    async def command(self, command: str) -> str:
+        connection = await self._acquire()
+        self._counters["commands"] += 1
+        try:
+            return await connection.command(command)
+        except RconError:
+            self._counters["errors"] += 1
+            raise
+
+    async def aclose(self) -> None:
+        for connection in self._connections:
+            connection.close()
+        self._connections.clear()
+
+    def stats(self) -> dict[str, Any]:
+        live = [connection for connection in self._connections if not connection.closed]
+        return {
+            **self._counters,
+            "connections": len(live),
+            "in_flight": sum(connection.in_flight for connection in live),
+            "consecutive_failures": self._failures,
+        }
+
+    async def _acquire(self) -> RconConnection:
+        while True:
+            self._connections = [connection for connection in self._connections if not connection.closed]
+            idle = [connection for connection in self._connections if connection.in_flight == 0]
+            if not idle and len(self._connections) < self.size:
+                connection = await self._connect()
+                if connection is None:
+                    continue
+                return connection
+            connection = idle[0] if idle else min(self._connections, key=lambda c: c.in_flight)
+            if connection.in_flight or time.monotonic() - connection.last_used < self.health_check_interval:
+                return connection
+            self._counters["health_checks"] += 1
+            if await connection.ping():
+                return connection
+            self._counters["unhealthy"] += 1
+            connection.close()
+
+    async def _connect(self) -> RconConnection | None:
+        """Opens a connection, or returns None when another caller opened one meanwhile."""
+        async with self._connect_lock:
+            live = [connection for connection in self._connections if not connection.closed]
+            if len(live) >= self.size or any(connection.in_flight == 0 for connection in live):
+                return None
+            delay = self._retry_at - time.monotonic()
+            if delay > 0:
+                raise RconConnectionError(
+                    f"RCON server {self.host}:{self.port} unavailable, next attempt in {delay:.1f} s."
+                )
+            try:
+                connection = await RconConnection.open(self.host, self.port, self._password, timeout=self.timeout)
+            except RconError as exc:
+                self._failures += 1
+                backoff = min(_RECONNECT_DELAY_SECONDS * 2 ** (self._failures - 1), _MAX_RECONNECT_DELAY_SECONDS)
+                self._retry_at = time.monotonic() + backoff
+                logger.warning(
+                    "RCON connection to %s:%s failed (%s), retry in %.0f s", self.host, self.port, exc, backoff
+                )
+                raise
+            self._failures = 0
+            self._retry_at = 0.0
+            self._counters["connects"] += 1
+            self._connections.append(connection)
+            return connection
+
+
+class RconPools:
+    """RCON pools of the running event loop, one per server (host, port, password)."""
+
+    def __init__(self, *, size: int = DEFAULT_RCON_POOL_SIZE, timeout: float = DEFAULT_RCON_TIMEOUT_SECONDS):
+        self.size = size
+        self.timeout = timeout
+        self._pools: dict[tuple[str, int, str], RconPool] = {}
+
+    def get(self, host: str, port: int, password: str) -> RconPool:
+        key = (host, port, password)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = RconPool(host, port, password, size=self.size, timeout=self.timeout)
+        return pool
+
+    async def aclose(self) -> None:
+        pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            await pool.aclose()
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {f"{pool.host}:{pool.port}": pool.stats() for pool in list(self._pools.values())}
+
+
+# region Utils
+
+
+def _encode(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = _HEADER.pack(request_id, packet_type) + body.encode("utf-8") + b"\x00\x00"
+    return _SIZE.pack(len(payload)) + payload
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, int, bytes]:
+    (size,) = _SIZE.unpack(await reader.readexactly(_SIZE.size))
+    if size < _HEADER.size + 2 or size > _MAX_PACKET_SIZE:
+        raise RconError(f"Malformed RCON packet of {size} bytes.")
+    data = await reader.readexactly(size)
+    request_id, packet_type = _HEADER.unpack_from(data)
+    return request_id, packet_type, data[_HEADER.size : -2]
+
+
+# endregion
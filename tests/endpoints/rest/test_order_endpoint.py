@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from mob import app_utils
+from mob.app import app
+from mob.app_utils import reset_runtime_state, shutdown_job_manager
+from mob.endpoints.rest.order_endpoint import _store_result_files
+
+
+@pytest.fixture(autouse=True)
+def _config(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """Serve a small api_config.json and clear cached settings/config repos around each test."""
+    config_path = tmp_path / "api_config.json"
+    config_path.write_text(
+        json.dumps(
+            {
+                "echo": {"function": "testing.slow_echo", "timeout": 0.5},
+                "locked": {"function": "testing.slow_echo", "_passkey": "secret"},
+                "stream": {"function": "testing.stream_echo", "timeout": 0.5},
+                "file": {"function": "testing.write_file"},
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.setenv("API_CONFIG_PATH", str(config_path))
+    monkeypatch.setenv("RESULT_FILES_PATH", str(tmp_path / "result_files"))
+    reset_runtime_state()
+    yield
+    reset_runtime_state()
+
+
+def _client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://mob")
+
+
+@pytest.mark.asyncio
+async def test_batch_reports_responses_and_errors_per_item() -> None:
+    orders = [
+        {"action": "echo", "payload": {"delay": 0.1}},
+        {"action": "echo", "payload": {"delay": 0.1}},
+        {"action": "echo", "payload": {"delay": 5}},
+        {"action": "missing"},
+    ]
+    async with _client() as client:
+        response = await client.post("/order/batch", json={"orders": orders, "max_concurrency": 2})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["index"] for item in body["items"]] == [0, 1, 2, 3]
+    assert [item["status"] for item in body["items"]] == ["success", "success", "error", "error"]
+    assert body["items"][2]["error"]["status_code"] == 504
+    assert body["items"][3]["error"]["status_code"] == 404
+    assert (body["succeeded"], body["failed"]) == (2, 2)
+    # Both short orders ran side by side, the timeout ran next to them
+    assert body["duration_ms"] < 1000
+
+
+@pytest.mark.asyncio
+async def test_async_orders_return_a_job_to_poll() -> None:
+    async with _client() as client:
+        accepted = await client.post("/order", json={"action": "echo", "payload": {"delay": 0.05}, "async": True})
+        assert accepted.status_code == 202
+        status_url = accepted.json()["status_url"]
+
+        for _ in range(100):
+            job = (await client.get(status_url)).json()
+            if job["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+
+        assert job["response"]["result"]["message"].startswith("El echo")
+        assert (await client.post(f"{status_url}/cancel")).status_code == 409
+        assert (await client.get("/order/jobs/unknown")).status_code == 404
+
+    # Stop the job workers while their loop is still running
+    shutdown_job_manager()
+    await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_streaming_orders_send_ndjson_events() -> None:
+    async with _client() as client:
+        response = await client.post(
+            "/order",
+            json={"action": "stream", "payload": {"steps": 2}},
+            headers={"Accept": "application/x-ndjson"},
+        )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [event["type"] for event in events] == ["progress", "partial", "partial", "result"]
+    assert events[-1]["response"]["result"]["message"] == "El echo ha terminado después de 2 pasos."
+
+
+@pytest.mark.asyncio
+async def test_streaming_orders_report_late_failures_as_error_events() -> None:
+    async with _client() as client:
+        response = await client.post(
+            "/order",
+            json={"action": "stream", "payload": {"steps": 5, "delay": 0.2}},
+            headers={"Accept": "text/event-stream"},
+        )
+        # Non-streaming actions are sent as a single result event
+        echo = await client.post("/order", json={"action": "echo"}, headers={"Accept": "text/event-stream"})
+
+    assert response.status_code == 200
+    blocks = response.text.strip().split("\n\n")
+    assert blocks[0].startswith("event: progress\ndata: ")
+    assert blocks[-1].startswith("event: error\ndata: ")
+    assert json.loads(blocks[-1].split("data: ", 1)[1])["status_code"] == 504
+    assert echo.text.startswith("event: result\n")
+
+
+@pytest.mark.asyncio
+async def test_result_files_are_returned_by_reference_and_downloadable_by_range() -> None:
+    async with _client() as client:
+        response = await client.post("/order", json={"action": "file", "payload": {"size": 2048}})
+        inline = await client.post("/order", json={"action": "file", "payload": {"size": 16}, "inline_files": True})
+
+        (stored,) = response.json()["result"]["files"]
+        assert (stored["filename"], stored["size"]) == ("result.txt", 2048)
+        assert "content" not in stored
+
+        download = await client.get(stored["url"])
+        assert download.status_code == 200 and len(download.content) == 2048
+        part = await client.get(stored["url"], headers={"Range": "bytes=10-19"})
+        assert part.status_code == 206
+        assert part.content == download.content[10:20]
+        assert (await client.get("/files/" + "0" * 64)).status_code == 404
+
+    assert inline.json()["result"]["files"][0]["content"] == "YWJjZGVmZ2hpamtsbW5vcA=="
+
+
+def test_result_files_that_cannot_be_stored_are_reported(tmp_path: Path) -> None:
+    (tmp_path / "kept.txt").write_text("kept", encoding="utf-8")
+
+    files = _store_result_files([str(tmp_path / "kept.txt"), str(tmp_path / "gone.png")], None)
+
+    assert files[0]["filename"] == "kept.txt" and files[0]["size"] == 4
+    assert files[1] == {"filename": "gone.png", "error": "No such file or directory"}
+
+
+@pytest.mark.asyncio
+async def test_idempotency_key_runs_the_order_once() -> None:
+    order = {"action": "echo", "payload": {"delay": 0.1}}
+    headers = {"Idempotency-Key": "retry-1"}
+    async with _client() as client:
+        first, retry = await asyncio.gather(
+            client.post("/order", json=order, headers=headers),
+            client.post("/order", json=order, headers=headers),
+        )
+        replay = await client.post("/order", json=order, headers=headers)
+        conflict = await client.post("/order", json={"action": "echo"}, headers=headers)
+
+    assert first.status_code == retry.status_code == replay.status_code == 200
+    assert sorted([first.json()["replayed"], retry.json()["replayed"]]) == [False, True]
+    assert replay.json()["replayed"] is True
+    assert replay.json()["duration_ms"] == first.json()["duration_ms"]
+    assert conflict.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_stats_only_report_components_already_in_use() -> None:
+    async with _client() as client:
+        stats = (await client.get("/stats")).json()
+        assert stats["jobs"] is None and stats["containers"] is None and stats["browser_sessions"] is None
+        assert (app_utils._job_manager, app_utils._container_states, app_utils._browser_sessions) == (None, None, None)
+
+        accepted = await client.post("/order", json={"action": "echo", "payload": {"delay": 0}, "async": True})
+        for _ in range(100):
+            if (await client.get(accepted.json()["status_url"])).json()["status"] == "succeeded":
+                break
+            await asyncio.sleep(0.01)
+        assert (await client.get("/stats")).json()["jobs"]["store"]["stored"] == 1
+
+    shutdown_job_manager()
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import xml.etree.ElementTree as ET
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from mob.functions.network.sam_gal import autopdate_arsys_domain_public_ip as arsys
+from mob.runtime.streaming import collect_stream
+from mob.utils.aio import LoopLocal
+
+ENVIRONMENT = {
+    "domain": "example.com",
+    "records": ["example.com", "www.example.com"],
+    "arsys_api_login": "login",
+    "arsys_api_key": "key",
+}
+
+
+def _zone_response(*records: tuple[str, str, str], error_code: str = "0") -> str:
+    items = "".join(
+        f"<item><name>{name}</name><type>{record_type}</type><value>{value}</value></item>"
+        for name, record_type, value in records
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<SOAP-ENV:Envelope xmlns:SOAP-ENV="http://schemas.xmlsoap.org/soap/envelope/"><SOAP-ENV:Body>'
+        '<ns1:Response xmlns:ns1="urn:arsys">'
+        f"<return><errorCode>{error_code}</errorCode><res><data>{items}</data></res></return>"
+        "</ns1:Response></SOAP-ENV:Body></SOAP-ENV:Envelope>"
+    )
+
+
+def test_parser_handles_chunked_responses() -> None:
+    xml = _zone_response(("example.com", "A", "1.1.1.1"), ("mail.example.com", "MX", "mx.example.com")).encode()
+    chunks = [xml[start : start + 7] for start in range(0, len(xml), 7)]
+    records, error_code = arsys.parse_arsys_dns_response(chunks)
+    assert error_code is None
+    assert records == [
+        {"name": "example.com", "type": "A", "value": "1.1.1.1"},
+        {"name": "mail.example.com", "type": "MX", "value": "mx.example.com"},
+    ]
+    assert arsys.parse_arsys_dns_response(_zone_response(error_code="2001")) == (None, "2001")
+    assert arsys.parse_arsys_dns_response("<not xml") == (None, None)
+
+
+@pytest.mark.asyncio
+async def test_run_reuses_the_snapshot_of_check(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[str] = []
+
+    async def public_ip() -> str:
+        calls.append("public_ip")
+        return "2.2.2.2"
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        method = "InfoDNSZone" if b"InfoDNSZone" in request.content else "ModifyDNSEntry"
+        calls.append(method)
+        if method == "InfoDNSZone":
+            return httpx.Response(
+                200, text=_zone_response(("example.com", "A", "1.1.1.1"), ("www.example.com", "A", "2.2.2.2"))
+            )
+        return httpx.Response(200, text=_zone_response())
+
+    clients = LoopLocal(lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(arsys, "get_public_ip", public_ip)
+    monkeypatch.setattr(arsys, "_http_clients", clients)
+    monkeypatch.setattr(arsys, "_snapshots", {})
+
+    assert await arsys.check(environment=ENVIRONMENT, payload={}) is False
+    result = await collect_stream(arsys.run(environment=ENVIRONMENT, payload={}))
+
+    assert result["success"] is True
+    assert calls[:2] == ["public_ip", "InfoDNSZone"]
+    assert set(calls[2:]) == {"ModifyDNSEntry"}
+    # The snapshot is consumed: the next run fetches the zone again
+    await collect_stream(arsys.run(environment=ENVIRONMENT, payload={}))
+    assert calls.count("InfoDNSZone") == 2
+    assert len(clients.values()) == 1
+    await arsys.close_http_client()
+    assert clients.values() == []
+
+
+class FakeArsysServer:
+    """Local HTTP server speaking the subset of the Arsys SOAP API used by the updater (InfoDNSZone, ModifyDNSEntry)."""
+
+    def __init__(self, zones: dict[str, dict[str, str]], *, delay: float = 0.0):
+        self.zones = zones
+        self.delay = delay
+        self.fail_first: dict[str, int] = {}
+        self.methods: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.port = 0
+        self._handlers: set[asyncio.Task] = set()
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/hosting/api/soap/index.php"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._handlers.add(asyncio.current_task())
+        try:
+            while await reader.readline():
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                status, content = await self._respond(body)
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: text/xml\r\nContent-Length: {len(content)}\r\n\r\n".encode()
+                    + content
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, body: bytes) -> tuple[int, bytes]:
+        envelope = ET.fromstring(body)
+        call = next(iter(envelope.find("{http://schemas.xmlsoap.org/soap/envelope/}Body")))
+        method = call.tag.rsplit("}", 1)[-1]
+        fields = {child.tag: (child.text or "").strip() for child in call.find("input")}
+        self.methods.append(method)
+        if method == "InfoDNSZone":
+            zone = self.zones.get(fields["domain"])
+            if zone is None:
+                return 200, _zone_response(error_code="2001").encode()
+            return 200, _zone_response(*((name, "A", value) for name, value in zone.items())).encode()
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            record = fields["dns"]
+            if self.fail_first.get(record, 0) > 0:
+                self.fail_first[record] -= 1
+                return 503, b"Service Unavailable"
+            zone = self.zones[fields["domain"]]
+            if zone.get(record) != fields["currentvalue"]:
+                return 200, _zone_response(error_code="3002").encode()
+            zone[record] = fields["newvalue"]
+            return 200, _zone_response().encode()
+        finally:
+            self.in_flight -= 1
+
+
+@pytest_asyncio.fixture
+async def arsys_server(monkeypatch: pytest.MonkeyPatch):
+    async def public_ip() -> str:
+        return "9.9.9.9"
+
+    monkeypatch.setattr(arsys, "get_public_ip", public_ip)
+    monkeypatch.setattr(arsys, "_http_clients", LoopLocal(arsys._new_http_client))
+    monkeypatch.setattr(arsys, "_snapshots", {})
+    monkeypatch.setattr(arsys, "RETRY_DELAY", 0)
+    fake = FakeArsysServer(
+        {
+            "a.com": {"a.com": "1.1.1.1", "www.a.com": "9.9.9.9"},
+            "b.com": {"b.com": "1.1.1.1", "api.b.com": "1.1.1.1"},
+        }
+    )
+    await fake.start()
+    yield fake
+    await arsys.close_http_client()
+    await fake.stop()
+
+
+def _multi_domain_environment(server: FakeArsysServer, **extra) -> dict:
+    return {
+        "domains": [
+            {"domain": "a.com", "records": ["a.com", "www.a.com", "ghost.a.com"]},
+            {"domain": "b.com", "records": ["b.com", "api.b.com"]},
+        ],
+        "arsys_api_login": "login",
+        "arsys_api_key": "key",
+        "arsys_api_url": server.url,
+        **extra,
+    }
+
+
+@pytest.mark.asyncio
+async def test_updates_only_outdated_records_of_every_domain(arsys_server: FakeArsysServer) -> None:
+    arsys_server.fail_first["b.com"] = 1
+    environment = _multi_domain_environment(arsys_server, max_concurrent_updates=2, retry_budget=2)
+
+    assert await arsys.check(environment=environment, payload={}) is False
+    result = await collect_stream(arsys.run(environment=environment, payload={}))
+
+    assert result["success"] is True
+    outcomes = {outcome["record"]: outcome for outcome in result["data"]["records"]}
+    assert {record: outcome["status"] for record, outcome in outcomes.items()} == {
+        "a.com": "updated",
+        "www.a.com": "unchanged",
+        "ghost.a.com": "missing",
+        "b.com": "updated",
+        "api.b.com": "updated",
+    }
+    assert outcomes["b.com"]["attempts"] == 2 and outcomes["a.com"]["attempts"] == 1
+    assert all(outcomes[record]["latency_ms"] >= 0 for record in ("a.com", "b.com", "api.b.com"))
+    assert result["data"]["retries"] == 1
+    assert arsys_server.zones["b.com"] == {"b.com": "9.9.9.9", "api.b.com": "9.9.9.9"}
+    # One InfoDNSZone per domain (fetched by check and reused by run) and only the needed modifications
+    assert arsys_server.methods.count("InfoDNSZone") == 2
+    assert arsys_server.methods.count("ModifyDNSEntry") == 4
+    assert await arsys.check(environment=environment, payload={}) is True
+
+
+@pytest.mark.asyncio
+async def test_retry_budget_is_shared_by_the_whole_run(arsys_server: FakeArsysServer) -> None:
+    arsys_server.fail_first.update({"a.com": 5, "b.com": 5, "api.b.com": 5})
+    environment = _multi_domain_environment(arsys_server, retry_budget=2)
+
+    result = await collect_stream(arsys.run(environment=environment, payload={}))
+
+    assert result["success"] is False
+    assert result["data"]["retries"] == 2
+    errors = [outcome for outcome in result["data"]["records"] if outcome["status"] == "error"]
+    assert len(errors) == 3
+    assert sum(outcome["attempts"] for outcome in errors) == 3 + 2
+
+
+@pytest.mark.asyncio
+async def test_modifications_respect_the_concurrency_cap(arsys_server: FakeArsysServer) -> None:
+    arsys_server.zones["c.com"] = {f"host{n}.c.com": "1.1.1.1" for n in range(8)}
+    arsys_server.delay = 0.05
+    environment = {
+        "domains": [{"domain": "c.com", "records": list(arsys_server.zones["c.com"])}],
+        "arsys_api_login": "login",
+        "arsys_api_key": "key",
+        "arsys_api_url": arsys_server.url,
+        "max_concurrent_updates": 3,
+    }
+
+    started = time.perf_counter()
+    result = await collect_stream(arsys.run(environment=environment, payload={}))
+
+    assert result["success"] is True
+    assert arsys_server.max_in_flight == 3
+    # 8 modifications 3 at a time take 3 rounds, not 8
+    assert time.perf_counter() - started < 8 * 0.05
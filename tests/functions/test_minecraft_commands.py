@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+
+from mob.functions.minecraft.server import commands
+from mob.functions.minecraft.server.whitelist import add_ip, remove_ip
+
+ENVIRONMENT = {"target_container": "mc"}
+
+
+@pytest.fixture
+def executed(monkeypatch: pytest.MonkeyPatch) -> list[list[str]]:
+    """Argv of every command run in the container (the container is always running)."""
+    argvs: list[list[str]] = []
+
+    async def running(container: str) -> bool:
+        return True
+
+    async def exec_command(container: str, argv: list[str]) -> str:
+        argvs.append(list(argv))
+        return "\x1b[32mDone\x1b[0m"
+
+    monkeypatch.setattr(commands, "check_container_running", running)
+    monkeypatch.setattr(commands, "exec_command_in_container", exec_command)
+    return argvs
+
+
+@pytest.mark.asyncio
+async def test_rcon_cli_runs_without_a_shell(executed: list[list[str]]) -> None:
+    assert await commands.run_server_command(ENVIRONMENT, "ipwhitelist add 203.0.113.7") == "Done"
+    assert executed == [["rcon-cli", "ipwhitelist", "add", "203.0.113.7"]]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("module", [add_ip, remove_ip])
+async def test_whitelist_orders_only_accept_ip_addresses(module, executed: list[list[str]]) -> None:
+    for ip_address in ("203.0.113.7; stop", "$(reboot)", "example.com"):
+        with pytest.raises(ValueError):
+            await module.run(environment=ENVIRONMENT, payload={"ip_address": ip_address})
+    assert executed == []
+
+    await module.run(environment=ENVIRONMENT, payload={"ip_address": " 2001:DB8::1 "})
+    assert executed[-1][-1] == "2001:db8::1"
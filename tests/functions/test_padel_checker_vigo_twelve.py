@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from mob.runtime.browser_sessions import BrowserSessionPool
+from mob.runtime.cancellation import CancellationToken
+
+pytest.importorskip("autoweb")
+
+from mob.functions.webscraping.padel import padel_checker_vigo_twelve as checker  # noqa: E402
+
+BASE_URL = "https://reservas.twelvepadelzenter.com/Web/index.php"
+ENGINE = SimpleNamespace(base_url=BASE_URL, username="user@example.com", password="secret")
+
+
+class FakeDriver:
+    def __init__(self, scraper: FakeScraper):
+        self.scraper = scraper
+
+    def find_elements(self, by: str, selector: str) -> list[str]:
+        assert by == "css selector"
+        return [selector] if selector == self.scraper.page else []
+
+
+class FakeScraper:
+    """WebScraper that shows the schedule while logged in and the login form otherwise."""
+
+    def __init__(self, *, logged_in: bool = False, queryable: bool = True):
+        self.logged_in = logged_in
+        self.page: str | None = None
+        self.logins = 0
+        self.visited: list[str] = []
+        if queryable:
+            self.driver = FakeDriver(self)
+
+    def navigate(self, url: str) -> None:
+        self.visited.append(url)
+        if url == checker.SCHEDULE_URL and self.logged_in:
+            self.page = checker.SCHEDULE_READY_SELECTOR
+        else:
+            self.page = checker.LOGIN_FORM_SELECTOR
+
+    def input_write(self, selector: str, text: str) -> None:
+        assert self.page == checker.LOGIN_FORM_SELECTOR
+
+    def click(self, selector: str) -> None:
+        self.logins += 1
+        self.logged_in = True
+
+
+def _open_schedule(pool: BrowserSessionPool, scraper: FakeScraper, *, reused: bool) -> None:
+    if reused:
+        # Leases the session once so the next lease finds it warm in the pool
+        with pool.session("twelve", lambda: scraper, close=lambda _: None):
+            pass
+    with pool.session("twelve", lambda: scraper, close=lambda _: None) as session:
+        assert session.fresh is not reused
+        checker.AWEnginePadelCheckerVigoTwelve._AWEnginePadelCheckerVigoTwelve__open_schedule(
+            ENGINE, session, CancellationToken()
+        )
+
+
+def test_a_fresh_session_logs_in() -> None:
+    pool = BrowserSessionPool()
+    scraper = FakeScraper()
+
+    _open_schedule(pool, scraper, reused=False)
+
+    assert scraper.logins == 1 and scraper.page == checker.SCHEDULE_READY_SELECTOR
+    assert pool.stats()["logins"] == 1
+    pool.close()
+
+
+def test_a_reused_session_skips_the_login() -> None:
+    pool = BrowserSessionPool()
+    scraper = FakeScraper(logged_in=True)
+
+    _open_schedule(pool, scraper, reused=True)
+
+    assert scraper.logins == 0 and scraper.visited == [checker.SCHEDULE_URL]
+    assert pool.stats()["relogins"] == 0
+    pool.close()
+
+
+def test_an_expired_session_logs_in_again() -> None:
+    pool = BrowserSessionPool()
+    scraper = FakeScraper(logged_in=False)
+
+    _open_schedule(pool, scraper, reused=True)
+
+    assert scraper.logins == 1 and scraper.page == checker.SCHEDULE_READY_SELECTOR
+    assert pool.stats()["relogins"] == 1
+    pool.close()
+
+
+def test_a_reused_session_that_cannot_be_checked_logs_in_again(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(checker, "PAGE_READY_FALLBACK_WAIT", 0.0)
+    pool = BrowserSessionPool()
+    scraper = FakeScraper(logged_in=True, queryable=False)
+
+    _open_schedule(pool, scraper, reused=True)
+
+    assert scraper.logins == 1
+    assert pool.stats()["relogins"] == 1
+    pool.close()
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from mob import functions
+from mob.functions import FUNCTION_OUTPUT_MESSAGE_MODES
+from mob.models import CompiledCallable, ConfigRepository, FunctionRegistry
+
+
+def _write_config(path: Path, actions: dict, mtime_offset: int = 0) -> None:
+    path.write_text(json.dumps(actions), encoding="utf-8")
+    if mtime_offset:
+        stat_result = path.stat()
+        os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns + mtime_offset * 1_000_000_000))
+
+
+def _wait_for_version(repo: ConfigRepository, version: int, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if repo.stats()["version"] == version:
+            return
+        time.sleep(0.02)
+    raise AssertionError(f"Snapshot version {version} was never published: {repo.stats()}")
+
+
+def test_snapshot_version_only_changes_when_file_changes(tmp_path: Path) -> None:
+    config_path = tmp_path / "api_config.json"
+    _write_config(config_path, {"a": {"function": "testing.slow_echo"}})
+    repo = ConfigRepository(config_path)
+
+    first = repo.get_snapshot()
+    assert first.version == 1
+    assert repo.get_snapshot() is first
+
+    _write_config(config_path, {"b": {"function": "testing.slow_echo"}}, mtime_offset=1)
+    second = repo.get_snapshot()
+    assert second.version == 2
+    assert list(second.actions) == ["b"]
+    with pytest.raises(TypeError):
+        second.actions["c"] = second.actions["b"]  # type: ignore[index]
+
+
+@pytest.mark.parametrize("mode", ["polling", "auto"])
+def test_watcher_publishes_new_snapshots(tmp_path: Path, mode: str) -> None:
+    config_path = tmp_path / "api_config.json"
+    _write_config(config_path, {"a": {"function": "testing.slow_echo"}})
+    repo = ConfigRepository(config_path)
+    repo.start_watching(mode=mode, poll_interval=0.05)
+    try:
+        assert repo.get_actions()["a"].function == "testing.slow_echo"
+        assert repo.stats()["watch_mode"] in ("inotify", "polling")
+
+        _write_config(config_path, {"a": {"function": "testing.docker_touch"}}, mtime_offset=1)
+        _wait_for_version(repo, 2)
+        assert repo.get_actions()["a"].function == "testing.docker_touch"
+        assert repo.stats()["reload_latency_ms"] is not None
+    finally:
+        repo.stop_watching()
+
+
+def test_watcher_keeps_last_good_snapshot_on_invalid_json(tmp_path: Path) -> None:
+    config_path = tmp_path / "api_config.json"
+    _write_config(config_path, {"a": {"function": "testing.slow_echo"}})
+    repo = ConfigRepository(config_path)
+    repo.start_watching(mode="polling", poll_interval=0.05)
+    try:
+        config_path.write_text("{not json", encoding="utf-8")
+        deadline = time.monotonic() + 5.0
+        while repo.stats()["last_error"] is None and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+        assert repo.stats()["last_error"] is not None
+        assert repo.get_snapshot().version == 1
+        assert "a" in repo.get_actions()
+    finally:
+        repo.stop_watching()
+
+
+def test_snapshot_renders_sanitized_config_once_per_version(tmp_path: Path) -> None:
+    config_path = tmp_path / "api_config.json"
+    _write_config(
+        config_path,
+        {"a": {"_passkey": "secret", "function": "testing.slow_echo", "environment": {"_token": "x", "keep": [1]}}},
+    )
+    repo = ConfigRepository(config_path)
+
+    snapshot = repo.get_snapshot()
+    assert "secret" not in snapshot.sanitized_json
+    assert "_token" not in snapshot.sanitized_json_compact
+    assert json.loads(snapshot.sanitized_json) == json.loads(snapshot.sanitized_json_compact)
+    assert json.loads(snapshot.sanitized_json) == {"a": {"function": "testing.slow_echo", "environment": {"keep": [1]}}}
+    assert repo.get_snapshot().sanitized_json is snapshot.sanitized_json
+
+
+def test_plans_are_compiled_once_per_snapshot(tmp_path: Path) -> None:
+    config_path = tmp_path / "api_config.json"
+    _write_config(config_path, {"echo": {"function": "testing.slow_echo", "timeout": 3}})
+    repo = ConfigRepository(config_path)
+    FunctionRegistry.clear()
+
+    snapshot = repo.get_snapshot()
+    plan = FunctionRegistry.get_plan("echo", snapshot, default_timeout=10.0)
+    assert plan is FunctionRegistry.get_plan("echo", snapshot, default_timeout=10.0)
+    assert plan.function.is_async
+    assert plan.timeout == 3
+    assert plan.checker is None
+    assert plan.message_mode == FUNCTION_OUTPUT_MESSAGE_MODES.EXECUTION
+
+    _write_config(config_path, {"echo": {"function": "testing.slow_echo"}}, mtime_offset=1)
+    new_plan = FunctionRegistry.get_plan("echo", repo.get_snapshot(), default_timeout=10.0)
+    assert new_plan is not plan
+    assert new_plan.timeout == 10.0
+
+
+def test_compiled_callable_adapts_kwargs_to_the_signature() -> None:
+    def only_payload(*, payload):
+        return payload
+
+    def no_keywords(**kwargs):
+        return kwargs
+
+    assert CompiledCallable.from_callable(only_payload).build_kwargs({"e": 1}, {"p": 2}) == {"payload": {"p": 2}}
+    assert CompiledCallable.from_callable(no_keywords).build_kwargs({"e": 1}, {"p": 2}) == {
+        "environment": {"e": 1},
+        "payload": {"p": 2},
+    }
+    assert not CompiledCallable.from_callable(no_keywords).is_async
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_prewarm_reports_unresolvable_actions(tmp_path: Path, max_workers: int) -> None:
+    config_path = tmp_path / "api_config.json"
+    _write_config(
+        config_path,
+        {
+            "echo": {"function": "testing.slow_echo"},
+            "missing-module": {"function": "testing.does_not_exist"},
+            "missing-checker": {"function": "testing.slow_echo", "checker_interval": 60},
+        },
+    )
+    FunctionRegistry.clear()
+    snapshot = ConfigRepository(config_path).get_snapshot()
+
+    report = FunctionRegistry.prewarm(snapshot, default_timeout=10.0, max_workers=max_workers)
+
+    assert [entry.action for entry in report.entries] == ["echo", "missing-module", "missing-checker"]
+    assert sorted(entry.action for entry in report.failures) == ["missing-checker", "missing-module"]
+    assert report.to_dict()["entries"][0]["ok"] is True
+    assert FunctionRegistry.get_plan("echo", snapshot, default_timeout=10.0).function.is_async
+
+
+def test_prewarm_reports_modules_that_raise_at_import(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    (tmp_path / "raising_at_import.py").write_text("raise ValueError('bad settings')\n", encoding="utf-8")
+    monkeypatch.setattr(functions, "__path__", [*functions.__path__, str(tmp_path)])
+    config_path = tmp_path / "api_config.json"
+    _write_config(
+        config_path,
+        {"broken": {"function": "raising_at_import"}, "echo": {"function": "testing.slow_echo"}},
+    )
+    FunctionRegistry.clear()
+    snapshot = ConfigRepository(config_path).get_snapshot()
+
+    report = FunctionRegistry.prewarm(snapshot, default_timeout=10.0)
+
+    assert [entry.action for entry in report.failures] == ["broken"]
+    assert "bad settings" in report.failures[0].error
+    with pytest.raises(RuntimeError):
+        FunctionRegistry.get_plan("broken", snapshot, default_timeout=10.0)
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from mob.runtime.admission import ActionOverloadedError, AdmissionController
+
+
+@pytest.fixture(autouse=True)
+def _clear_limiters():
+    yield
+    AdmissionController.clear()
+
+
+@pytest.mark.asyncio
+async def test_limiter_queues_then_rejects_overflow() -> None:
+    limiter = AdmissionController.get_limiter("tps", max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+    queue_times: list[float] = []
+
+    async def _hold() -> None:
+        async with limiter.admit() as queue_ms:
+            queue_times.append(queue_ms)
+            await release.wait()
+
+    first = asyncio.create_task(_hold())
+    second = asyncio.create_task(_hold())
+    await asyncio.sleep(0.05)
+    assert limiter.stats()["active"] == 1
+    assert limiter.stats()["queued"] == 1
+
+    with pytest.raises(ActionOverloadedError):
+        async with limiter.admit():
+            pass
+
+    release.set()
+    await asyncio.gather(first, second)
+    assert limiter.stats()["admitted"] == 2
+    assert limiter.stats()["rejected"] == 1
+    assert queue_times[1] >= 40
+
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_callers_waiting_longer_than_max_wait() -> None:
+    limiter = AdmissionController.get_limiter("padel", max_concurrency=1, max_queue=None)
+    async with limiter.admit():
+        with pytest.raises(ActionOverloadedError):
+            async with limiter.admit(max_wait=0.05):
+                pass
+    assert AdmissionController.stats()["padel"]["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_new_limits_replace_idle_limiters() -> None:
+    old = AdmissionController.get_limiter("tps", max_concurrency=1, max_queue=0)
+    new = AdmissionController.get_limiter("tps", max_concurrency=2, max_queue=0)
+    assert new is not old
+    assert AdmissionController.get_limiter("tps", max_concurrency=2, max_queue=0) is new
+    assert AdmissionController.stats()["tps"]["max_concurrency"] == 2
+
+
+@pytest.mark.asyncio
+async def test_limiter_rejects_simultaneous_arrivals() -> None:
+    limiter = AdmissionController.get_limiter("echo", max_concurrency=1, max_queue=1)
+
+    async def _run() -> None:
+        async with limiter.admit(max_wait=1):
+            await asyncio.sleep(0.02)
+
+    results = await asyncio.gather(*(_run() for _ in range(3)), return_exceptions=True)
+    assert sum(isinstance(result, ActionOverloadedError) for result in results) == 1
+
+
+def test_limiter_is_shared_by_every_event_loop() -> None:
+    limiter = AdmissionController.get_limiter("minecraft", max_concurrency=1, max_queue=1)
+    running: list[int] = []
+    overlaps: list[int] = []
+
+    async def _run() -> None:
+        try:
+            async with AdmissionController.get_limiter("minecraft", 1, 1).admit(max_wait=2):
+                running.append(1)
+                overlaps.append(len(running))
+                await asyncio.sleep(0.1)
+                running.pop()
+        except ActionOverloadedError:
+            overlaps.append(0)
+
+    threads = [threading.Thread(target=asyncio.run, args=(_run(),)) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # One slot and one queued caller across the three loops: never two at once, the third one rejected
+    assert sorted(overlaps) == [0, 1, 1]
+    stats = limiter.stats()
+    assert (stats["active"], stats["queued"], stats["admitted"], stats["rejected"]) == (0, 0, 2, 1)
+
+
+@pytest.mark.asyncio
+async def test_queued_time_counts_against_the_plan_timeout() -> None:
+    from mob.app_utils import execute_plan
+    from mob.models import ActionConfig, ActionPlan, CompiledCallable
+
+    async def _sleep(payload: dict) -> float:
+        await asyncio.sleep(payload["seconds"])
+        return payload["seconds"]
+
+    plan = ActionPlan(
+        name="sleepy",
+        config=ActionConfig(function="testing.slow_echo", max_concurrency=1),
+        function=CompiledCallable.from_callable(_sleep),
+        checker=None,
+        message_mode=None,
+        timeout=0.3,
+    )
+    first = asyncio.create_task(execute_plan(plan, payload={"seconds": 0.2}))
+    await asyncio.sleep(0.01)
+    started = time.perf_counter()
+    # Admitted after ~0.2 s, so only ~0.1 s of the 0.3 s timeout remain for its own 0.2 s
+    with pytest.raises(asyncio.TimeoutError):
+        await execute_plan(plan, payload={"seconds": 0.2})
+    assert time.perf_counter() - started < 0.4
+    assert (await first).value == 0.2
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import threading
+import time
+
+import pytest
+
+from mob.runtime.browser_sessions import BrowserSessionPool, BrowserSessionPoolExhaustedError
+from mob.runtime.cancellation import ActionCancelledError, CancellationToken
+
+
+class FakeBrowsers:
+    """Factory of fake browsers that records which ones were started and closed."""
+
+    def __init__(self):
+        self.started: list[int] = []
+        self.closed: list[int] = []
+
+    def create(self) -> int:
+        self.started.append(len(self.started))
+        return self.started[-1]
+
+    def close(self, browser: int) -> None:
+        self.closed.append(browser)
+
+
+def _lease(pool: BrowserSessionPool, browsers: FakeBrowsers, key: str = "alice", **kwargs):
+    return pool.session(key, browsers.create, close=browsers.close, **kwargs)
+
+
+def test_sessions_are_reused_per_key() -> None:
+    browsers = FakeBrowsers()
+    pool = BrowserSessionPool(max_sessions=2)
+
+    with _lease(pool, browsers) as session:
+        assert session.fresh
+        session.record_login()
+    with _lease(pool, browsers) as session:
+        assert not session.fresh and session.browser == 0
+    with _lease(pool, browsers, "bob") as session:
+        assert session.browser == 1
+
+    stats = pool.stats()
+    assert (stats["created"], stats["reused"], stats["logins"], stats["idle"], stats["in_use"]) == (2, 1, 1, 2, 0)
+    pool.close()
+    assert sorted(browsers.closed) == [0, 1]
+
+
+def test_failed_sessions_are_closed_instead_of_reused() -> None:
+    browsers = FakeBrowsers()
+    pool = BrowserSessionPool()
+
+    with pytest.raises(RuntimeError):
+        with _lease(pool, browsers):
+            raise RuntimeError("page crashed")
+    with _lease(pool, browsers) as session:
+        assert session.browser == 1
+        session.discard()
+
+    assert browsers.closed == [0, 1]
+    assert pool.stats()["discarded"] == 2 and pool.stats()["sessions"] == 0
+
+
+def test_a_session_closed_before_its_release_is_not_closed_again() -> None:
+    browsers = FakeBrowsers()
+    pool = BrowserSessionPool()
+
+    with _lease(pool, browsers) as session:
+        # A cancellation hook closes the browser while the lease is still held
+        session.discard()
+        session.close()
+        assert browsers.closed == [0]
+
+    assert browsers.closed == [0]
+    assert pool.stats()["sessions"] == 0
+
+
+def test_idle_sessions_expire() -> None:
+    browsers = FakeBrowsers()
+    pool = BrowserSessionPool(idle_ttl=0.05)
+    with _lease(pool, browsers):
+        pass
+
+    time.sleep(0.06)
+    assert pool.evict_idle() == 1
+    assert browsers.closed == [0]
+    with _lease(pool, browsers) as session:
+        assert session.fresh
+    assert pool.stats()["evicted_idle"] == 1
+    pool.close()
+
+
+def test_the_cap_evicts_idle_sessions_of_other_keys() -> None:
+    browsers = FakeBrowsers()
+    pool = BrowserSessionPool(max_sessions=1)
+    with _lease(pool, browsers, "alice"):
+        pass
+
+    with _lease(pool, browsers, "bob") as session:
+        assert session.browser == 1
+    assert browsers.closed == [0]
+    assert pool.stats()["evicted_cap"] == 1
+    pool.close()
+
+
+def test_callers_wait_for_a_leased_session_at_the_cap() -> None:
+    browsers = FakeBrowsers()
+    pool = BrowserSessionPool(max_sessions=1, acquire_timeout=2)
+    leased, release = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        with _lease(pool, browsers):
+            leased.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    leased.wait()
+    threading.Timer(0.1, release.set).start()
+    with _lease(pool, browsers) as session:
+        # It got the released session back instead of starting a second browser
+        assert session.browser == 0
+    holder.join()
+    assert pool.stats()["waits"] == 1
+    pool.close()
+
+
+def test_waiting_for_a_session_times_out_or_is_cancelled() -> None:
+    browsers = FakeBrowsers()
+    pool = BrowserSessionPool(max_sessions=1, acquire_timeout=0.1)
+    token = CancellationToken()
+
+    with _lease(pool, browsers):
+        with pytest.raises(BrowserSessionPoolExhaustedError):
+            with _lease(pool, browsers, "bob"):
+                pass
+        threading.Timer(0.05, token.cancel).start()
+        pool.acquire_timeout = 5
+        with pytest.raises(ActionCancelledError):
+            with _lease(pool, browsers, "bob", cancellation=token):
+                pass
+    assert browsers.started == [0]
+    pool.close()
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from typing import Any, Dict
+
+import pytest
+
+from mob.app_utils import execute_callable
+from mob.runtime.cancellation import ActionCancelledError, CancellationToken
+
+
+def test_teardown_hooks_run_once_on_cancel() -> None:
+    token = CancellationToken()
+    closed = threading.Event()
+    calls: list[str] = []
+
+    def _close() -> None:
+        calls.append("close")
+        closed.set()
+
+    token.add_callback(_close)
+    release = token.add_callback(lambda: calls.append("released"))
+    release()
+    token.cancel("timeout")
+    token.cancel("again")
+
+    assert closed.wait(1)
+    assert calls == ["close"]
+    assert token.reason == "timeout"
+    with pytest.raises(ActionCancelledError):
+        token.raise_if_cancelled()
+
+
+@pytest.mark.asyncio
+async def test_timeout_cancels_the_token_of_sync_functions() -> None:
+    stopped = threading.Event()
+
+    def _scrape(*, environment: Dict[str, Any], payload: Dict[str, Any], cancellation: CancellationToken) -> None:
+        # A cancellable sleep: returns as soon as the caller gives up
+        if cancellation.wait(10):
+            stopped.set()
+            cancellation.raise_if_cancelled()
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(execute_callable(_scrape, environment={}, payload={}, executor="io"), timeout=0.05)
+    assert await asyncio.to_thread(stopped.wait, 1)
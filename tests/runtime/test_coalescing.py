@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from mob.runtime.coalescing import RequestCoalescer, coalescing_key
+
+
+@pytest.fixture(autouse=True)
+def _clear_flights():
+    yield
+    RequestCoalescer.clear()
+
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_execution() -> None:
+    calls = 0
+
+    async def _tps() -> dict[str, str]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"message": "20.0"}
+
+    key = coalescing_key({"b": 1, "a": 2})
+    same_key = coalescing_key({"a": 2, "b": 1})
+    results = await asyncio.gather(
+        RequestCoalescer.run("tps", key, _tps),
+        RequestCoalescer.run("tps", same_key, _tps),
+        RequestCoalescer.run("tps", key, _tps),
+    )
+
+    assert calls == 1
+    assert [coalesced for _, coalesced in results] == [False, True, True]
+    assert all(value == {"message": "20.0"} for value, _ in results)
+    assert RequestCoalescer.stats()["tps"] == {"executions": 1, "hits": 2, "in_flight": 0}
+
+
+@pytest.mark.asyncio
+async def test_different_payloads_and_failures_are_not_shared() -> None:
+    async def _fail() -> None:
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        RequestCoalescer.run("version", coalescing_key({"a": 1}), _fail),
+        RequestCoalescer.run("version", coalescing_key({"a": 2}), _fail),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+    # The failed flight is gone: the next call runs again
+    with pytest.raises(RuntimeError):
+        await RequestCoalescer.run("version", coalescing_key({"a": 1}), _fail)
+    assert RequestCoalescer.stats()["version"]["executions"] == 3
+
+
+@pytest.mark.asyncio
+async def test_execution_is_cancelled_when_the_last_caller_leaves() -> None:
+    cancelled = asyncio.Event()
+
+    async def _slow() -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    key = coalescing_key({})
+    first = asyncio.create_task(RequestCoalescer.run("playing_list", key, _slow))
+    second = asyncio.create_task(RequestCoalescer.run("playing_list", key, _slow))
+    await asyncio.sleep(0.01)
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert RequestCoalescer.stats()["playing_list"]["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_callers_on_other_loops_join_the_flight() -> None:
+    started = threading.Event()
+    calls = 0
+
+    async def _is_available() -> bool:
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.1)
+        return True
+
+    key = coalescing_key({})
+    owner = asyncio.create_task(RequestCoalescer.run("is_available", key, _is_available))
+    await asyncio.to_thread(started.wait, 1)
+    # e.g. the scheduler running its own event loop in another thread
+    other_loop = await asyncio.to_thread(asyncio.run, RequestCoalescer.run("is_available", key, _is_available))
+
+    assert await owner == (True, False)
+    assert other_loop == (True, True)
+    assert calls == 1
+
+
+def test_unserializable_arguments_disable_coalescing() -> None:
+    assert coalescing_key({"callback": object()}) is None
+    assert coalescing_key({"a": 1}, {"target_container": "mc"}) == coalescing_key({"a": 1}, {"target_container": "mc"})
+
+
+def test_only_the_context_fields_of_the_action_are_ignored() -> None:
+    payload = {"verbose": True}
+    with_conversation = {"verbose": True, "conversation": [{"role": "user", "content": "hola"}]}
+
+    assert coalescing_key(with_conversation) != coalescing_key(payload)
+    assert coalescing_key(with_conversation, ignored_fields=("conversation",)) == coalescing_key(payload)
+
+
+@pytest.mark.asyncio
+async def test_discord_orders_coalesce_with_rest_orders() -> None:
+    from mob.app_utils import execute_plan
+    from mob.models import ActionConfig, ActionPlan, CompiledCallable
+
+    calls = 0
+
+    async def _version(*, environment, payload):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"message": "1.21"}
+
+    config = ActionConfig(
+        function="testing.slow_echo",
+        coalesce=True,
+        context_fields=("conversation",),
+        environment={"target_container": "mc"},
+    )
+    plan = ActionPlan(
+        name="version",
+        config=config,
+        function=CompiledCallable.from_callable(_version),
+        checker=None,
+        message_mode=None,
+        timeout=1.0,
+    )
+    rest = execute_plan(plan, payload={"verbose": True})
+    # Discord adds the AI extras to the environment and the conversation to the payload
+    discord = execute_plan(
+        plan,
+        payload={"verbose": True, "conversation": [{"role": "user", "content": "¿versión?"}]},
+        environment={**config.environment, "message": "Miro la versión", "confidence": 0.93},
+    )
+    results = await asyncio.gather(rest, discord)
+
+    assert calls == 1
+    assert [result.coalesced for result in results] == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_checkers_run_on_their_own() -> None:
+    from mob.app_utils import execute_checker
+    from mob.models import ActionConfig, ActionPlan, CompiledCallable
+
+    calls = 0
+
+    async def _check(*, environment, payload):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return True
+
+    plan = ActionPlan(
+        name="update-dns",
+        config=ActionConfig(function="testing.slow_echo", coalesce=True, checker_interval=60),
+        function=CompiledCallable.from_callable(_check),
+        checker=CompiledCallable.from_callable(_check),
+        message_mode=None,
+        timeout=1.0,
+    )
+    results = await asyncio.gather(execute_checker(plan, timeout=1.0), execute_checker(plan, timeout=1.0))
+
+    assert results == [True, True]
+    assert calls == 2
+    assert RequestCoalescer.stats() == {}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mob.runtime.container_state import ContainerStateRegistry
+from mob.utils.docker import ContainerNotFoundError
+
+
+class FakeDockerClient:
+    """Docker client double: a fixed container list, an events queue and counted inspections."""
+
+    def __init__(self):
+        self.containers = [{"Id": "c1", "Names": ["/mc"], "State": "running"}]
+        self.queue: asyncio.Queue[dict] = asyncio.Queue()
+        self.inspections = 0
+
+    async def list_containers(self, *, include_stopped: bool = True) -> list[dict]:
+        return self.containers
+
+    async def events(self, *, since: float | None = None):
+        while True:
+            yield await self.queue.get()
+
+    async def inspect_container(self, container: str) -> dict:
+        self.inspections += 1
+        if container not in ("mc", "other"):
+            raise ContainerNotFoundError(404, f"No such container: {container}")
+        return {"State": {"Running": True}}
+
+
+def _event(action: str) -> dict:
+    return {"Type": "container", "Action": action, "Actor": {"ID": "c1", "Attributes": {"name": "mc"}}}
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_state_is_seeded_and_kept_current_by_events() -> None:
+    client = FakeDockerClient()
+    registry = ContainerStateRegistry(lambda: client, ttl=60)
+    try:
+        assert await registry.is_running("mc")  # Inspected: the watcher has not seeded the view yet
+        await _settle()
+        assert await registry.is_running("mc")
+
+        await client.queue.put(_event("die"))
+        await _settle()
+        assert not await registry.is_running("mc")
+        await client.queue.put(_event("start"))
+        await _settle()
+        assert await registry.is_running("c1")
+
+        # Unknown containers are inspected once, then served from the view
+        assert not await registry.is_running("missing")
+        assert not await registry.is_running("missing")
+        stats = registry.stats()
+        assert client.inspections == 2
+        assert (stats["hits"], stats["misses"], stats["events"]) == (4, 2, 2)
+        assert stats["events_connected"] is True
+    finally:
+        registry.stop()
+        await _settle()
+
+
+@pytest.mark.asyncio
+async def test_without_events_entries_expire_after_the_ttl() -> None:
+    client = FakeDockerClient()
+    registry = ContainerStateRegistry(lambda: client, ttl=0.05, watch_events=False)
+
+    assert await registry.is_running("other")
+    assert await registry.is_running("other")
+    await asyncio.sleep(0.06)
+    assert await registry.is_running("other")
+
+    assert client.inspections == 2
+    assert registry.stats()["stale"] == 1
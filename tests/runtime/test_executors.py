@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from mob.runtime.executors import ExecutorRegistry, parse_pool_sizes
+
+
+@pytest.fixture(autouse=True)
+def _shutdown_pools():
+    yield
+    ExecutorRegistry.shutdown()
+
+
+def test_parse_pool_sizes() -> None:
+    assert parse_pool_sizes("io=16, llm=2,") == {"io": 16, "llm": 2}
+    assert parse_pool_sizes(None) == {}
+    with pytest.raises(ValueError):
+        parse_pool_sizes("io=many")
+
+
+@pytest.mark.asyncio
+async def test_saturated_pool_does_not_starve_other_classes() -> None:
+    release = threading.Event()
+    llm_pool = ExecutorRegistry.get("llm", {"llm": 1})
+    io_pool = ExecutorRegistry.get("io", {"io": 1})
+
+    blocked = [asyncio.create_task(llm_pool.run(release.wait, 5)) for _ in range(3)]
+    await asyncio.sleep(0.05)
+
+    assert await asyncio.wait_for(io_pool.run(lambda: "fast"), timeout=1) == "fast"
+    stats = llm_pool.stats()
+    assert stats["active"] == 1
+    assert stats["queued"] == 2
+
+    release.set()
+    await asyncio.gather(*blocked)
+    stats = llm_pool.stats()
+    assert stats["completed"] == 3
+    assert stats["queued"] == 0
+    assert stats["max_wait_ms"] > 0
+    assert ExecutorRegistry.get("custom").max_workers == ExecutorRegistry.get("default").max_workers
+
+
+def test_submit_from_sync_code_keeps_the_metrics() -> None:
+    release = threading.Event()
+    pool = ExecutorRegistry.get("cpu", {"cpu": 1})
+
+    running = pool.submit(release.wait, 5)
+    queued = pool.submit(lambda: "never")
+    assert queued.cancel()
+    release.set()
+
+    assert running.result(timeout=1) is True
+    stats = pool.stats()
+    assert (stats["submitted"], stats["completed"], stats["queued"]) == (2, 1, 0)
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from mob.runtime import file_store
+from mob.runtime.file_store import ResultFileStore
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> ResultFileStore:
+    return ResultFileStore(tmp_path / "store", ttl=60)
+
+
+def _write(path: Path, content: bytes) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(content)
+    return path
+
+
+def test_files_are_moved_and_deduplicated_by_content(tmp_path: Path, store: ResultFileStore) -> None:
+    first = store.put(_write(tmp_path / "a" / "shot.png", b"same"))
+    second = store.put(_write(tmp_path / "b" / "shot.png", b"same"))
+
+    assert first.file_id == second.file_id
+    assert first.file_id.endswith(".png") and first.content_type == "image/png"
+    assert first.path.read_bytes() == b"same"
+    assert not (tmp_path / "a" / "shot.png").exists() and not (tmp_path / "b" / "shot.png").exists()
+    assert store.stats()["deduplicated"] == 1
+
+    # A cached result pointing to the moved source resolves to the stored file
+    assert store.put(tmp_path / "a" / "shot.png").file_id == first.file_id
+    with pytest.raises(FileNotFoundError):
+        store.put(tmp_path / "missing.png")
+
+
+def test_expired_files_are_hidden_and_cleaned_up(tmp_path: Path, store: ResultFileStore) -> None:
+    stored = store.put(_write(tmp_path / "report.txt", b"old"))
+    expired = time.time() - 120
+    os.utime(stored.path, (expired, expired))
+
+    assert store.get(stored.file_id) is None
+    assert store.get("../../etc/passwd") is None
+    assert store.cleanup() == 1
+    assert not stored.path.exists()
+
+
+
+def test_concurrent_puts_of_a_shared_source_all_get_the_stored_file(
+    tmp_path: Path, store: ResultFileStore, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    moving = threading.Barrier(2, timeout=0.2)
+    move = file_store.shutil.move
+
+    def _move_in_step(source: Path, destination: Path) -> None:
+        # Both callers reach the move before either of them makes it (unless the first one holds the source alone)
+        try:
+            moving.wait()
+        except threading.BrokenBarrierError:
+            pass
+        move(source, destination)
+
+    monkeypatch.setattr(file_store.shutil, "move", _move_in_step)
+    source = _write(tmp_path / "shared" / "shot.png", b"shared")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        stored = list(executor.map(lambda _: store.put(source), range(2)))
+
+    assert stored[0].file_id == stored[1].file_id
+    assert not source.exists()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mob.runtime.idempotency import (
+    IdempotencyConflictError,
+    IdempotencyStore,
+    IdempotencyStoreFullError,
+    request_fingerprint,
+)
+
+
+@pytest.mark.asyncio
+async def test_retries_attach_to_the_running_execution_and_replay_its_result() -> None:
+    store = IdempotencyStore(ttl=60, max_keys=10)
+    calls = 0
+
+    async def _add_ip() -> dict[str, str]:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"message": "added"}
+
+    fingerprint = request_fingerprint("whitelist", {"ip": "1.2.3.4"})
+    results = await asyncio.gather(
+        store.run("key-1", fingerprint, _add_ip),
+        store.run("key-1", fingerprint, _add_ip),
+    )
+    replay = await store.run("key-1", fingerprint, _add_ip)
+
+    assert calls == 1
+    assert [replayed for _, replayed in results] == [False, True]
+    assert replay == ({"message": "added"}, True)
+    assert store.stats()["attached"] == 1 and store.stats()["replayed"] == 1
+
+    with pytest.raises(IdempotencyConflictError):
+        await store.run("key-1", request_fingerprint("whitelist", {"ip": "5.6.7.8"}), _add_ip)
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_stored_and_completed_keys_are_evicted() -> None:
+    store = IdempotencyStore(ttl=60, max_keys=1)
+
+    async def _fail() -> None:
+        raise RuntimeError("boom")
+
+    async def _ok() -> str:
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await store.run("key", "fp", _fail)
+    assert await store.run("key", "fp", _ok) == ("ok", False)
+
+    # The completed key makes room for a new one; a running one cannot be evicted
+    running = asyncio.ensure_future(store.run("other", "fp", lambda: asyncio.sleep(0.05)))
+    await asyncio.sleep(0)
+    with pytest.raises(IdempotencyStoreFullError):
+        await store.run("third", "fp", _ok)
+    await running
+    assert store.stats()["evicted"] == 1
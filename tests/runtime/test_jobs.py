@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from mob.models import JobInfo, OrderResponse
+from mob.runtime.jobs import JobManager, JobQueueFullError, JobStore
+
+
+class _HTTPError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def _response(action: str = "padel") -> OrderResponse:
+    return OrderResponse(action=action, status="success", result={"message": "ok"}, duration_ms=1.0)
+
+
+@pytest_asyncio.fixture
+async def manager():
+    manager = JobManager(JobStore(), workers=1, queue_size=2)
+    yield manager
+    manager.stop()
+    # Let the cancelled workers unwind before the loop closes
+    await asyncio.sleep(0.01)
+
+
+async def _wait_finished(manager: JobManager, job_id: str) -> JobInfo:
+    for _ in range(200):
+        job = manager.get(job_id)
+        if job.finished:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_store_evicts_expired_and_oldest_finished_jobs() -> None:
+    store = JobStore(retention=60, max_jobs=2)
+    now = time.time()
+    store.add(JobInfo(job_id="old", action="a", status="succeeded", created_at=now - 120, finished_at=now - 61))
+    assert store.get("old") is None
+
+    store.add(JobInfo(job_id="done", action="a", status="succeeded", created_at=now, finished_at=now))
+    store.add(JobInfo(job_id="pending", action="a", created_at=now))
+    store.add(JobInfo(job_id="new", action="a", created_at=now))
+    assert store.get("done") is None
+    assert store.get("pending") is not None
+    assert store.stats()["evicted"] == 2
+
+
+def test_sqlite_store_survives_restarts(tmp_path: Path) -> None:
+    path = tmp_path / "jobs.db"
+    store = JobStore(path=path)
+    now = time.time()
+    store.add(
+        JobInfo(job_id="done", action="a", status="succeeded", created_at=now, finished_at=now, response=_response())
+    )
+    store.add(JobInfo(job_id="running", action="a", status="running", created_at=now, started_at=now))
+    store.close()
+
+    reloaded = JobStore(path=path)
+    assert reloaded.get("done").response.result == {"message": "ok"}
+    interrupted = reloaded.get("running")
+    assert interrupted.status == "failed"
+    assert interrupted.error.status_code == 500
+    reloaded.close()
+
+
+@pytest.mark.asyncio
+async def test_manager_records_results_and_errors(manager: JobManager) -> None:
+
+    async def _ok(job: JobInfo) -> OrderResponse:
+        return _response(job.action)
+
+    async def _fail(job: JobInfo) -> OrderResponse:
+        raise _HTTPError(504, "Action 'padel' timed out after 1 seconds.")
+
+    ok = manager.submit("padel", _ok)
+    failed = manager.submit("padel", _fail)
+    assert ok.status == "queued"
+
+    assert (await _wait_finished(manager, ok.job_id)).response.action == "padel"
+    failed = await _wait_finished(manager, failed.job_id)
+    assert failed.status == "failed"
+    assert (failed.error.status_code, failed.error.detail) == (504, "Action 'padel' timed out after 1 seconds.")
+
+
+@pytest.mark.asyncio
+async def test_manager_cancels_queued_and_running_jobs(manager: JobManager) -> None:
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def _slow(job: JobInfo) -> OrderResponse:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return _response()
+
+    running = manager.submit("padel", _slow)
+    await started.wait()
+    queued = manager.submit("padel", _slow)
+    other = manager.submit("padel", _slow)
+    with pytest.raises(JobQueueFullError):
+        manager.submit("padel", _slow)
+
+    assert manager.cancel(queued.job_id).status == "cancelled"
+    assert manager.cancel(other.job_id).status == "cancelled"
+    manager.cancel(running.job_id)
+    assert (await _wait_finished(manager, running.job_id)).status == "cancelled"
+    assert cancelled.is_set()
+    assert manager.stats()["running"] == 0
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import asyncio
+import os
+
+import pytest
+
+from mob.runtime.process_pool import ProcessPool
+
+BUSY_LOOP = "mob.functions.testing.busy_loop:run"
+SLOW_ECHO = "mob.functions.testing.slow_echo:run"
+
+
+@pytest.fixture
+def pool():
+    process_pool = ProcessPool(max_workers=1, max_tasks_per_worker=2)
+    yield process_pool
+    process_pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_runs_sync_and_async_functions_in_worker_processes(pool: ProcessPool) -> None:
+    result = await pool.run(BUSY_LOOP, {}, {"seconds": 0})
+    assert result["data"]["pid"] != os.getpid()
+
+    echo = await pool.run(SLOW_ECHO, {}, {"delay": 0})
+    assert echo["message"].startswith("El echo ha vuelto")
+
+    # max_tasks_per_worker=2: the worker is recycled after the second task
+    assert pool.stats()["recycled"] == 1
+    assert (await pool.run(BUSY_LOOP, {}, {"seconds": 0}))["data"]["pid"] != result["data"]["pid"]
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_cancellation_kill_the_worker(pool: ProcessPool) -> None:
+    with pytest.raises(TimeoutError):
+        await pool.run(BUSY_LOOP, {}, {"seconds": 30}, timeout=0.2)
+
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(pool.run(BUSY_LOOP, {}, {"seconds": 30}), timeout=0.2)
+    await asyncio.sleep(0.2)
+
+    assert pool.stats()["killed"] == 2
+    assert (await pool.run(BUSY_LOOP, {}, {"seconds": 0}))["message"]
+
+
+@pytest.mark.asyncio
+async def test_function_errors_are_raised_in_the_caller(pool: ProcessPool) -> None:
+    with pytest.raises(ValueError):
+        await pool.run(BUSY_LOOP, {}, {"seconds": "not a number"})
+    assert pool.stats()["failed"] == 1
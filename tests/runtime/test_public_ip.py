@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+
+from mob.runtime.public_ip import PublicIpService, PublicIpUnavailableError, _LoopState
+from mob.utils.aio import LoopLocal
+
+FAST = "https://fast.test/"
+SLOW = "https://slow.test/?format=json"
+
+
+class FakeProviders:
+    """Answers every provider from a mutable table: an address, an exception to raise, or a delay before answering."""
+
+    def __init__(self):
+        self.addresses = {"fast.test": "1.1.1.1", "slow.test": "2.2.2.2"}
+        self.delays = {"fast.test": 0.0, "slow.test": 0.5}
+        self.down: set[str] = set()
+        self.requests: list[str] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.requests.append(host)
+        await asyncio.sleep(self.delays[host])
+        if host in self.down:
+            return httpx.Response(503)
+        if request.url.params.get("format") == "json":
+            return httpx.Response(200, json={"ip": self.addresses[host]})
+        return httpx.Response(200, text=f"{self.addresses[host]}\n")
+
+
+def _service(providers: FakeProviders, **kwargs) -> PublicIpService:
+    service = PublicIpService((FAST, SLOW), **kwargs)
+
+    def state() -> _LoopState:
+        loop_state = _LoopState(service.timeout)
+        loop_state.client = httpx.AsyncClient(transport=httpx.MockTransport(providers))
+        return loop_state
+
+    service._loops = LoopLocal(state)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_the_fastest_provider_wins_and_is_cached() -> None:
+    providers = FakeProviders()
+    service = _service(providers, ttl=60, timeout=1)
+
+    addresses = await asyncio.gather(*(service.get() for _ in range(5)))
+    assert addresses == ["1.1.1.1"] * 5
+    # Concurrent callers shared one race, and the slow provider did not delay it
+    assert providers.requests.count("fast.test") == 1
+    assert await service.get() == "1.1.1.1"
+    stats = service.stats()
+    assert (stats["resolutions"], stats["hits"], stats["wins"]) == (1, 1, {FAST: 1})
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_the_other_providers() -> None:
+    providers = FakeProviders()
+    providers.down.add("fast.test")
+    providers.delays["slow.test"] = 0.0
+    service = _service(providers, timeout=1)
+
+    assert await service.get() == "2.2.2.2"
+    assert service.stats()["wins"] == {SLOW: 1}
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_serves_the_stale_address_when_every_provider_fails() -> None:
+    providers = FakeProviders()
+    service = _service(providers, ttl=0, timeout=0.1)
+    assert await service.get() == "1.1.1.1"
+
+    providers.down.add("fast.test")
+    providers.delays["slow.test"] = 1
+    assert await service.get() == "1.1.1.1"
+    assert service.stats()["stale_served"] == 1
+    # The outage is not retried on every call
+    assert await service.get() == "1.1.1.1"
+    assert service.stats()["failures"] == 1
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_raises_when_never_resolved() -> None:
+    providers = FakeProviders()
+    providers.down.update({"fast.test", "slow.test"})
+    providers.delays["slow.test"] = 0.0
+    service = _service(providers, timeout=1)
+
+    with pytest.raises(PublicIpUnavailableError):
+        await service.get()
+    assert service.peek() is None
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_wait_for_change_reports_a_new_address() -> None:
+    providers = FakeProviders()
+    service = _service(providers, ttl=0.05, timeout=1)
+    assert await service.get() == "1.1.1.1"
+
+    assert await service.wait_for_change(0.12) is None
+    providers.addresses["fast.test"] = "3.3.3.3"
+    change = await service.wait_for_change(1)
+
+    assert (change.previous, change.current) == ("1.1.1.1", "3.3.3.3")
+    stats = service.stats()
+    assert stats["changes"] == 1 and stats["waiters"] == 0
+    assert stats["last_change"]["current"] == "3.3.3.3"
+    await service.aclose()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from mob.models import ActionConfig, CachePolicy
+from mob.runtime.result_cache import ResultCache, ResultCacheRegistry, cache_key
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    yield
+    ResultCacheRegistry.clear()
+
+
+def test_entries_expire_after_ttl() -> None:
+    cache = ResultCache("version", CachePolicy(ttl=0.05))
+    cache.put("k", {"message": "1.21"})
+
+    value, age_ms = cache.get("k")
+    assert value == {"message": "1.21"}
+    assert age_ms < 50
+
+    time.sleep(0.06)
+    assert cache.get("k") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted() -> None:
+    cache = ResultCache("padel", CachePolicy(ttl=60, max_entries=2))
+    cache.put("monday", 1)
+    cache.put("tuesday", 2)
+    cache.get("monday")
+    cache.put("wednesday", 3)
+
+    assert cache.get("tuesday") is None
+    assert cache.get("monday") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_are_evicted_to_fit_the_byte_budget() -> None:
+    cache = ResultCache("padel", CachePolicy(ttl=60, max_bytes=80))
+    cache.put("monday", {"message": "x" * 20})
+    cache.put("tuesday", {"message": "y" * 20})
+    size = cache.stats()["bytes"]
+    assert size <= 80 and cache.stats()["entries"] == 2
+
+    cache.put("wednesday", {"message": "z" * 20})
+    assert cache.get("monday") is None
+    assert cache.stats()["bytes"] == size and cache.stats()["evictions"] == 1
+
+    # A result larger than the whole budget is not cached and evicts nothing
+    cache.put("thursday", {"message": "w" * 100})
+    assert cache.get("thursday") is None
+    assert cache.stats()["entries"] == 2 and cache.stats()["oversized"] == 1
+
+    cache.invalidate("tuesday")
+    assert cache.stats()["bytes"] == size // 2
+
+
+def test_key_fields_select_the_payload_fields() -> None:
+    policy = CachePolicy(ttl=60, key_fields=["date"])
+    assert cache_key(policy, {"date": "2026-10-17", "user": "a"}) == cache_key(
+        policy, {"user": "b", "date": "2026-10-17"}
+    )
+    assert cache_key(policy, {"date": "2026-10-17"}) != cache_key(policy, {"date": "2026-10-18"})
+    assert cache_key(CachePolicy(ttl=60), {"callback": object()}) is None
+
+
+def test_the_whole_payload_key_leaves_out_only_the_given_context_fields() -> None:
+    policy = CachePolicy(ttl=60)
+    payload = {"date": "2026-10-17"}
+    with_conversation = {"date": "2026-10-17", "conversation": [{"role": "user", "content": "hola"}]}
+
+    assert cache_key(policy, with_conversation) != cache_key(policy, payload)
+    assert cache_key(policy, with_conversation, ignored_fields=("conversation",)) == cache_key(policy, payload)
+
+
+def test_policy_changes_replace_the_cache() -> None:
+    config = ActionConfig.model_validate({"function": "testing.slow_echo", "cache": {"ttl": 30}})
+    cache = ResultCacheRegistry.get("echo", config.cache)
+    cache.put("k", "v")
+    assert ResultCacheRegistry.get("echo", CachePolicy(ttl=30)) is cache
+
+    new_cache = ResultCacheRegistry.get("echo", CachePolicy(ttl=10))
+    assert new_cache is not cache
+    assert new_cache.get("k") is None
+    assert ResultCacheRegistry.invalidate("echo") == 0
+
+
+@pytest.mark.asyncio
+async def test_rest_and_discord_orders_share_cached_results() -> None:
+    from mob.app_utils import execute_plan, invalidate_cached_results
+    from mob.models import ActionPlan, CompiledCallable
+
+    calls = 0
+
+    async def _padel(*, environment, payload):
+        nonlocal calls
+        calls += 1
+        return {"message": f"Pistas libres el {payload['date']}"}
+
+    config = ActionConfig.model_validate(
+        {
+            "function": "testing.slow_echo",
+            "cache": {"ttl": 60},
+            "context_fields": ["conversation"],
+            "environment": {"username": "sam"},
+        }
+    )
+    plan = ActionPlan(
+        name="padel",
+        config=config,
+        function=CompiledCallable.from_callable(_padel),
+        checker=None,
+        message_mode=None,
+        timeout=1.0,
+    )
+    payload = {"date": "2026-10-17"}
+
+    rest = await execute_plan(plan, payload=payload)
+    # Discord adds the AI extras to the environment and the conversation to the payload
+    discord = await execute_plan(
+        plan,
+        payload={**payload, "conversation": [{"role": "user", "content": "¿Hay pista el sábado?"}]},
+        environment={**config.environment, "message": "Voy a mirarlo", "confidence": 0.87},
+    )
+
+    assert (rest.cached, discord.cached, calls) == (False, True, 1)
+    assert invalidate_cached_results(plan, payload) == 1
+    assert ResultCacheRegistry.stats()["padel"]["entries"] == 0
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from mob.models import ActionConfig, ActionPlan, CompiledCallable, ExecutionResult
+from mob.runtime.process_pool import ProcessPool
+from mob.runtime.streaming import collect_stream, partial_event, progress_event, result_event
+
+STREAM_ECHO = "mob.functions.testing.stream_echo:run"
+
+
+async def _stream(steps: int, *, with_result: bool = True):
+    yield progress_event("started")
+    for step in range(steps):
+        yield partial_event(step, message=f"step {step}")
+    if with_result:
+        yield result_event({"message": "done"})
+
+
+async def _action(*, environment, payload):
+    async for event in _stream(2):
+        yield event
+
+
+def _plan(func, timeout: float = 1.0) -> ActionPlan:
+    config = ActionConfig(function="testing.stream_echo", timeout=timeout)
+    return ActionPlan(
+        name="stream",
+        config=config,
+        function=CompiledCallable.from_callable(func),
+        checker=None,
+        message_mode=None,
+        timeout=timeout,
+    )
+
+
+@pytest.mark.asyncio
+async def test_collect_stream_returns_the_result_or_a_summary() -> None:
+    assert await collect_stream(_stream(2)) == {"message": "done"}
+    assert await collect_stream(_stream(2, with_result=False)) == {"message": "step 1", "data": [0, 1]}
+
+
+@pytest.mark.asyncio
+async def test_execute_plan_stream_yields_events_then_the_execution() -> None:
+    from mob.app_utils import execute_plan, execute_plan_stream
+
+    plan = _plan(_action)
+    assert plan.function.is_stream
+    items = [item async for item in execute_plan_stream(plan, payload={})]
+    assert [item["type"] for item in items[:-1]] == ["progress", "partial", "partial"]
+    assert isinstance(items[-1], ExecutionResult)
+    assert items[-1].value == {"message": "done"}
+
+    # Non-streaming callers only get the final result
+    assert (await execute_plan(plan, payload={})).value == {"message": "done"}
+
+
+@pytest.mark.asyncio
+async def test_execute_plan_stream_times_out_slow_streams() -> None:
+    from mob.app_utils import execute_plan_stream
+
+    closed = asyncio.Event()
+
+    async def _slow(*, environment, payload):
+        try:
+            yield progress_event("started")
+            await asyncio.sleep(5)
+            yield result_event({"message": "never"})
+        finally:
+            closed.set()
+
+    events = []
+    with pytest.raises(asyncio.TimeoutError):
+        async for item in execute_plan_stream(_plan(_slow, timeout=0.1), payload={}):
+            events.append(item)
+    assert [event["type"] for event in events] == ["progress"]
+    assert closed.is_set()
+
+
+@pytest.mark.asyncio
+async def test_process_pool_collects_streaming_functions() -> None:
+    pool = ProcessPool(max_workers=1)
+    try:
+        result = await pool.run(STREAM_ECHO, {}, {"steps": 2})
+    finally:
+        pool.shutdown()
+    assert result == {"message": "El echo ha terminado después de 2 pasos."}
@@ -5,11 +5,12 @@ from pathlib import Path
 import json
 
 from mob import app as mob_app
-from mob.app_utils import reset_runtime_state
+from mob.app_utils import get_idempotency_store, reset_runtime_state
 
 # Tests in this module:
 # - test_config_repo_uses_env_path
 # - test_config_repo_reuses_cached_instance_until_reset
+# - test_idempotency_ttl_never_outlives_jobs_or_result_files
 
 
 @pytest.fixture(autouse=True)
@@ -59,3 +60,12 @@ def test_config_repo_reuses_cached_instance_until_reset(
     refreshed_repo = mob_app._get_config_repo()
     assert refreshed_repo is not first_repo
     assert refreshed_repo.source_path == new_config_path
+
+
+def test_idempotency_ttl_never_outlives_jobs_or_result_files(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("IDEMPOTENCY_TTL", "86400")
+    monkeypatch.setenv("JOB_RETENTION", "900")
+    monkeypatch.setenv("RESULT_FILES_TTL", "600")
+    reset_runtime_state()
+
+    assert get_idempotency_store().ttl == 600
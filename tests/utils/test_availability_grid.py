@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from mob.functions.webscraping.padel.vigo_twelve_schema import CELL_TIME_LABELS, SPATIALLY_SCHEMA, get_availability_grid
+from mob.utils.availability_grid import AvailabilityGrid
+
+FIXTURES = Path(__file__).parent.parent / "fixtures" / "padel"
+WHITE, GREY, DARK = (255, 255, 255), (217, 217, 217), (51, 51, 51)
+
+
+def _schema(rows: list[int], **config) -> dict:
+    """Rows of cells 10 px apart, each row starting 10 px below the previous one."""
+    return {
+        "name": "test",
+        "config": {
+            "sample_radius": 1,
+            "tolerance": 10,
+            "coords_step": [10, 0],
+            "default_colormap": {"#FFFFFF": True, "#D9D9D9": False},
+            **config,
+        },
+        "data": [
+            {"label": f"{row}-{cell}", **({"coords": [5, 5 + row * 10]} if cell == 0 else {})}
+            for row, cells in enumerate(rows)
+            for cell in range(cells)
+        ],
+    }
+
+
+def _image(colors: list[list[tuple[int, int, int]]]) -> np.ndarray:
+    """Image of 10x10 px squares, one per cell."""
+    return np.kron(np.array(colors, dtype=np.uint8).transpose(2, 0, 1), np.ones((10, 10), dtype=np.uint8)).transpose(
+        1, 2, 0
+    )
+
+
+def test_padel_fixture_screenshots_are_classified() -> None:
+    expected = json.loads((FIXTURES / "expected.json").read_text())
+    grid = get_availability_grid()
+
+    for name, courts in expected.items():
+        analysis = grid.analyze(FIXTURES / name)
+        rows = [analysis.values[row * 30 : row * 30 + 30] for row in range(12)]
+        assert ["".join(str(int(value)) for value in row) for row in rows] == courts
+        windows = {
+            f"{court}-{CELL_TIME_LABELS[start]}"
+            for court, cells in enumerate(courts, start=1)
+            for start in range(len(cells) - 2)
+            if cells[start : start + 3] == "111"
+        }
+        assert {window["start_label"] for window in analysis.available_windows} == windows
+        assert analysis.to_dict(include_cells=True)["cells"][0]["label"] == "1-09:00-09:30"
+
+
+def test_matches_the_autoweb_analyzer_on_the_fixture_screenshots() -> None:
+    analyzers = pytest.importorskip("autoweb.spatially.analyzers.availability_window_analyzer")
+    grid = get_availability_grid()
+
+    for screenshot in sorted(FIXTURES.glob("*.png")):
+        schema = {**SPATIALLY_SCHEMA, "data": [dict(cell) for cell in SPATIALLY_SCHEMA["data"]]}
+        reference = analyzers.AvailabilityWindowAnalyzer.from_payload(schema).analyze(str(screenshot))
+        reference = reference.to_dict(include_cells=True)
+        analysis = grid.analyze(screenshot).to_dict(include_cells=True)
+        assert analysis["available_windows"] == reference["available_windows"], screenshot.name
+        assert [(cell["label"], cell["value"]) for cell in analysis["cells"]] == [
+            (cell["label"], cell["value"]) for cell in reference["cells"]
+        ], screenshot.name
+
+
+def test_majority_ignores_unmatched_pixels_and_honours_the_tolerance() -> None:
+    grid = AvailabilityGrid.from_payload(_schema([3]))
+    image = _image([[WHITE, GREY, DARK]])
+    # Text over most of the first cell, and a slightly tinted grey
+    image[4:6, 0:6] = DARK
+    image[:, 10:20] = (224, 210, 217)
+
+    assert grid.analyze(image).values == [True, False, None]
+
+
+def test_windows_do_not_span_rows() -> None:
+    grid = AvailabilityGrid.from_payload(_schema([4, 4], window_span=3))
+    analysis = grid.analyze(_image([[GREY, GREY, WHITE, WHITE], [WHITE, WHITE, WHITE, GREY]]))
+
+    assert analysis.available_windows == [{"start_index": 4, "end_index": 6, "start_label": "1-0", "end_label": "1-2"}]
+
+
+def test_cells_outside_the_image_are_clamped_or_unknown() -> None:
+    image = _image([[WHITE, GREY]])
+    schema = _schema([3])
+
+    assert AvailabilityGrid.from_payload(schema).analyze(image).values == [True, False, False]
+    assert AvailabilityGrid.from_payload({**schema, "config": {**schema["config"], "clamp_coords": False}}).analyze(
+        image
+    ).values == [True, False, None]
+
+
+@pytest.mark.parametrize("mode, expected", [("center", [True, None]), ("mean", [True, False])])
+def test_other_sample_modes(mode: str, expected: list) -> None:
+    grid = AvailabilityGrid.from_payload(_schema([2], sample_mode=mode, tolerance=20))
+    image = _image([[WHITE, GREY]])
+    image[5, 15] = DARK
+
+    assert grid.analyze(image).values == expected
+
+
+def test_unknown_sample_mode_is_rejected() -> None:
+    with pytest.raises(ValueError):
+        AvailabilityGrid.from_payload(_schema([1], sample_mode="median"))
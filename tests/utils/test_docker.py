@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import struct
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+from mob.utils import docker
+from mob.utils.docker import ContainerNotFoundError, DockerClient
+
+
+class FakeDockerEngine:
+    """Tiny HTTP/1.1 server on a unix socket answering the Docker Engine API calls used by DockerClient."""
+
+    def __init__(self, socket_path: Path):
+        self.socket_path = socket_path
+        self.connections = 0
+        self.requests: list[tuple[str, str]] = []
+        self.commands: list[list[str]] = []
+        self._server: asyncio.AbstractServer | None = None
+        self._stopping = asyncio.Event()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_unix_server(self._handle, path=str(self.socket_path))
+
+    async def stop(self) -> None:
+        self._stopping.set()
+        await asyncio.sleep(0)
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        try:
+            while request_line := await reader.readline():
+                method, path, _ = request_line.decode().split(" ", 2)
+                headers = {}
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, value = line.decode().split(":", 1)
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                self.requests.append((method, path))
+                if not await self._respond(writer, method, path, json.loads(body or b"null")):
+                    break
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter, method: str, path: str, body) -> bool:
+        if path == "/v1.41/containers/mc/json":
+            return await self._json(writer, 200, {"State": {"Running": True}})
+        if path == "/v1.41/containers/missing/json":
+            return await self._json(writer, 404, {"message": "No such container: missing"})
+        if path == "/v1.41/containers/mc/exec":
+            self.commands.append(body["Cmd"])
+            return await self._json(writer, 201, {"Id": f"exec-{len(self.commands)}"})
+        if path == "/v1.41/exec/exec-1/json":
+            return await self._json(writer, 200, {"ExitCode": 0})
+        if path == "/v1.41/exec/exec-2/json":
+            return await self._json(writer, 200, {"Running": True, "Pid": 98765})
+        if path.startswith("/v1.41/events?"):
+            assert "since=" in path
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n\r\n")
+            for action in ("die", "start"):
+                writer.write(
+                    json.dumps({"Type": "container", "Action": action, "Actor": {"ID": "c1"}}).encode() + b"\n"
+                )
+                await writer.drain()
+            return False
+        if path == "/v1.41/exec/exec-1/start":
+            # Raw multiplexed stream until the connection is closed, with frames split across writes
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/vnd.docker.raw-stream\r\n\r\n")
+            frames = _frame(1, b"4") + _frame(1, b"2\nTPS from last 1m: ") + _frame(2, b"warning") + _frame(1, b"20.0")
+            for start in range(0, len(frames), 5):
+                writer.write(frames[start : start + 5])
+                await writer.drain()
+            return False
+        if path == "/v1.41/exec/exec-2/start":
+            # A command that never ends
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/vnd.docker.raw-stream\r\n\r\n")
+            writer.write(_frame(1, b"57\n"))
+            await writer.drain()
+            await self._stopping.wait()
+            return False
+        if path in ("/v1.41/exec/exec-3/start", "/v1.41/exec/exec-4/start"):
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/vnd.docker.raw-stream\r\n\r\n")
+            return False
+        return await self._json(writer, 500, {"message": f"unexpected {method} {path}"})
+
+    @staticmethod
+    async def _json(writer: asyncio.StreamWriter, status: int, payload) -> bool:
+        content = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\nContent-Length: {len(content)}\r\n\r\n".encode()
+            + content
+        )
+        await writer.drain()
+        return True
+
+
+def _frame(stream_id: int, data: bytes) -> bytes:
+    return struct.pack(">BxxxL", stream_id, len(data)) + data
+
+
+@pytest_asyncio.fixture
+async def engine(tmp_path: Path):
+    fake = FakeDockerEngine(tmp_path / "docker.sock")
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+@pytest.mark.asyncio
+async def test_inspect_reuses_a_pooled_connection(engine: FakeDockerEngine) -> None:
+    client = DockerClient(str(engine.socket_path))
+    try:
+        assert await client.is_container_running("mc")
+        assert await client.is_container_running("mc")
+        assert not await client.is_container_running("missing")
+        with pytest.raises(ContainerNotFoundError):
+            await client.inspect_container("missing")
+    finally:
+        await client.aclose()
+    assert engine.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_exec_demultiplexes_streamed_output(engine: FakeDockerEngine) -> None:
+    client = DockerClient(str(engine.socket_path))
+    try:
+        result = await client.exec("mc", ["sh", "-c", "rcon-cli tps"])
+    finally:
+        await client.aclose()
+    assert (result.exit_code, result.stdout, result.stderr) == (0, "TPS from last 1m: 20.0", "warning")
+    assert engine.commands == [["sh", "-c", 'echo "$$" && exec "$@"', "sh", "sh", "-c", "rcon-cli tps"]]
+    assert [path for _, path in engine.requests] == [
+        "/v1.41/containers/mc/exec",
+        "/v1.41/exec/exec-1/start",
+        "/v1.41/exec/exec-1/json",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_events_are_decoded_line_by_line(engine: FakeDockerEngine) -> None:
+    client = DockerClient(str(engine.socket_path))
+    try:
+        events = [event async for event in client.events(since=0)]
+    finally:
+        await client.aclose()
+    assert [event["Action"] for event in events] == ["die", "start"]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_exec_kills_its_process_in_the_container(
+    engine: FakeDockerEngine, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(docker, "_KILL_GRACE_SECONDS", 0.05)
+    monkeypatch.setattr(docker, "_KILL_POLL_SECONDS", 0.01)
+    client = DockerClient(str(engine.socket_path))
+    try:
+        await client.exec("mc", ["true"])
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(client.exec("mc", ["sleep", "infinity"]), timeout=0.2)
+    finally:
+        await client.aclose()
+    # The process group of the PID printed by the command itself, not the host PID of /exec/{id}/json. The command of
+    # the fake engine never ends, so SIGTERM is followed by SIGKILL after the grace period
+    assert engine.commands[-2:] == [["sh", "-c", docker._KILL_SCRIPT, signal, "57"] for signal in ("TERM", "KILL")]
+    assert ("POST", "/v1.41/exec/exec-4/start") in engine.requests
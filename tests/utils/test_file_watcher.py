@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from mob.utils.file_watcher import FileWatcher, InotifyFileWatcher, PollingFileWatcher, create_file_watcher
+
+
+def _open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def test_file_watcher_is_abstract(tmp_path: Path) -> None:
+    with pytest.raises(TypeError):
+        FileWatcher(tmp_path / "api_config.json", lambda: None)
+
+
+@pytest.mark.skipif(not Path("/proc/self/fd").is_dir(), reason="needs /proc to count open descriptors")
+def test_failed_inotify_watch_closes_its_descriptor(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def _fail(self, path: Path, mask: int) -> int:
+        raise OSError(28, "inotify watch limit reached")
+
+    monkeypatch.setattr(InotifyFileWatcher, "_add_watch", _fail)
+    before = _open_fds()
+    watcher = create_file_watcher(tmp_path / "api_config.json", lambda: None)
+
+    assert isinstance(watcher, PollingFileWatcher)
+    assert _open_fds() == before
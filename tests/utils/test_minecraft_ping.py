@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from typing import Any
+
+import pytest
+import pytest_asyncio
+
+from mob.functions.minecraft.server.info import is_available
+from mob.utils import minecraft_ping
+from mob.utils.minecraft_ping import ServerListPingError, _decode_varint, _varint, server_list_ping
+
+STATUS = {
+    "version": {"name": "1.21.1", "protocol": 767},
+    "players": {"max": 20, "online": 3},
+    "description": {"text": "§aMatthews ", "extra": [{"text": "SMP"}]},
+}
+
+
+class FakeMinecraftServer:
+    """
+    Answers the Server List Ping handshake, status request and ping like a 1.7+ server (or never, if `silent`).
+    `status` replaces the status JSON and `answers_ping=False` leaves the ping unanswered.
+    """
+
+    def __init__(self, *, silent: bool = False, status: Any = STATUS, answers_ping: bool = True):
+        self.silent = silent
+        self.status = status
+        self.answers_ping = answers_ping
+        self.handshakes: list[tuple[int, str, int]] = []
+        self.port = 0
+        self._handlers: set[asyncio.Task] = set()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self._server.close()
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._handlers.add(asyncio.current_task())
+        try:
+            if self.silent:
+                await reader.read()
+                return
+            handshake = await _read_frame(reader)
+            _, offset = _decode_varint(handshake, 0)
+            protocol, offset = _decode_varint(handshake, offset)
+            length, offset = _decode_varint(handshake, offset)
+            host = handshake[offset : offset + length].decode()
+            port = int.from_bytes(handshake[offset + length : offset + length + 2], "big")
+            self.handshakes.append((protocol, host, port))
+            await _read_frame(reader)
+            body = json.dumps(self.status).encode()
+            writer.write(_frame(_varint(0) + _varint(len(body)) + body))
+            ping = await _read_frame(reader)
+            if not self.answers_ping:
+                await reader.read()
+                return
+            writer.write(_frame(ping))
+            await writer.drain()
+        except asyncio.IncompleteReadError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> bytes:
+    data = b""
+    while not data or data[-1] & 0x80:
+        data += await reader.readexactly(1)
+    length, _ = _decode_varint(data, 0)
+    return await reader.readexactly(length)
+
+
+def _frame(payload: bytes) -> bytes:
+    return _varint(len(payload)) + payload
+
+
+@pytest_asyncio.fixture
+async def server():
+    fake = FakeMinecraftServer()
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+@pytest_asyncio.fixture
+async def silent_server():
+    fake = FakeMinecraftServer(silent=True)
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+def test_varint_round_trip() -> None:
+    for value in (0, 1, 127, 128, 25565, 2**31 - 1, -1):
+        assert _decode_varint(_varint(value), 0) == (value, len(_varint(value)))
+
+
+@pytest.mark.asyncio
+async def test_server_list_ping_reads_the_status(server: FakeMinecraftServer) -> None:
+    status = await server_list_ping("127.0.0.1", server.port, timeout=2)
+    assert (status.version, status.protocol, status.players_online, status.players_max) == ("1.21.1", 767, 3, 20)
+    assert status.motd == "Matthews SMP"
+    assert status.latency_ms >= 0
+    assert server.handshakes == [(-1, "127.0.0.1", server.port)]
+
+
+@pytest.mark.asyncio
+async def test_server_list_ping_times_out(silent_server: FakeMinecraftServer) -> None:
+    with pytest.raises(asyncio.TimeoutError):
+        await server_list_ping("127.0.0.1", silent_server.port, timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_an_unanswered_ping_keeps_the_status_latency(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(minecraft_ping, "PONG_TIMEOUT_SECONDS", 0.05)
+    fake = FakeMinecraftServer(answers_ping=False)
+    await fake.start()
+    try:
+        started = time.perf_counter()
+        status = await server_list_ping("127.0.0.1", fake.port, timeout=2)
+    finally:
+        await fake.stop()
+
+    assert status.players_online == 3 and status.latency_ms >= 0
+    assert time.perf_counter() - started < 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [["not", "an", "object"], {"version": "1.21.1"}, {"players": {"online": "many"}}])
+async def test_a_malformed_status_is_a_ping_error(status: Any) -> None:
+    fake = FakeMinecraftServer(status=status)
+    await fake.start()
+    try:
+        with pytest.raises(ServerListPingError):
+            await server_list_ping("127.0.0.1", fake.port, timeout=2)
+    finally:
+        await fake.stop()
+
+
+@pytest.mark.asyncio
+async def test_is_available_reports_each_step(server: FakeMinecraftServer, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def running(container: str) -> bool:
+        return True
+
+    monkeypatch.setattr(is_available, "check_container_running", running)
+    result = await is_available.run(
+        environment={"target_container": "mc", "ip_address_server": "127.0.0.1", "port_server": server.port},
+        payload={},
+    )
+    data = result["data"]
+    assert (data["container_running"], data["server_reachable"]) == (True, True)
+    assert data["server"]["players_online"] == 3
+    assert data["steps"]["container"]["ok"] and data["steps"]["ping"]["ok"]
+    assert "public_ip" not in data["steps"]
+
+
+@pytest.mark.asyncio
+async def test_is_available_steps_have_their_own_deadline(
+    silent_server: FakeMinecraftServer, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def hanging(container: str) -> bool:
+        await asyncio.sleep(10)
+        return True
+
+    monkeypatch.setattr(is_available, "check_container_running", hanging)
+    monkeypatch.setattr(is_available, "CONTAINER_CHECK_TIMEOUT", 0.2)
+    monkeypatch.setattr(is_available, "SERVER_PING_TIMEOUT", 0.2)
+    started = time.perf_counter()
+    result = await is_available.run(
+        environment={"target_container": "mc", "ip_address_server": "127.0.0.1", "port_server": silent_server.port},
+        payload={},
+    )
+    # Both steps ran concurrently: the probe takes one deadline, not the sum
+    assert time.perf_counter() - started < 0.35
+    steps = result["data"]["steps"]
+    assert not steps["container"]["ok"] and not steps["ping"]["ok"]
+    assert result["data"]["server_reachable"] is False
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import struct
+
+import pytest
+import pytest_asyncio
+
+from mob.utils.rcon import RconAuthError, RconConnectionError, RconPool
+
+PASSWORD = "secret"
+
+
+class FakeRconServer:
+    """Minecraft-like RCON server: answers packets in order, splitting long responses in 4096-byte fragments."""
+
+    def __init__(self, responses: dict[str, str]):
+        self.responses = responses
+        self.connections = 0
+        self.logins = 0
+        self.commands: list[str] = []
+        self.port = 0
+        self._writers: list[asyncio.StreamWriter] = []
+        self._handlers: set[asyncio.Task] = set()
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        self._server.close()
+        for handler in self._handlers:
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        await self._server.wait_closed()
+
+    def drop_connections(self) -> None:
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self._writers.append(writer)
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                (size,) = struct.unpack("<i", await reader.readexactly(4))
+                data = await reader.readexactly(size)
+                request_id, packet_type = struct.unpack_from("<ii", data)
+                body = data[8:-2].decode()
+                if packet_type == 3:
+                    self.logins += 1
+                    writer.write(_packet(request_id if body == PASSWORD else -1, 2, ""))
+                elif packet_type == 2:
+                    self.commands.append(body)
+                    response = self.responses.get(body, f"Unknown command: {body}")
+                    for start in range(0, max(len(response), 1), 4096):
+                        writer.write(_packet(request_id, 0, response[start : start + 4096]))
+                else:
+                    writer.write(_packet(request_id, 0, f"Unknown request {packet_type:x}"))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def _packet(request_id: int, packet_type: int, body: str) -> bytes:
+    payload = struct.pack("<ii", request_id, packet_type) + body.encode() + b"\x00\x00"
+    return struct.pack("<i", len(payload)) + payload
+
+
+@pytest_asyncio.fixture
+async def server():
+    fake = FakeRconServer({"list": "There are 2 of a max of 20 players online: alice, bob", "long": "x" * 10000})
+    await fake.start()
+    yield fake
+    await fake.stop()
+
+
+@pytest.mark.asyncio
+async def test_commands_reuse_one_authenticated_connection(server: FakeRconServer) -> None:
+    pool = RconPool("127.0.0.1", server.port, PASSWORD, size=2)
+    try:
+        assert await pool.command("list") == "There are 2 of a max of 20 players online: alice, bob"
+        assert await pool.command("long") == "x" * 10000
+    finally:
+        await pool.aclose()
+    assert (server.connections, server.logins) == (1, 1)
+    assert pool.stats()["commands"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_commands_are_matched_by_request_id(server: FakeRconServer) -> None:
+    server.responses.update({f"echo {n}": f"reply {n}" for n in range(20)})
+    pool = RconPool("127.0.0.1", server.port, PASSWORD, size=1)
+    try:
+        replies = await asyncio.gather(*(pool.command(f"echo {n}") for n in range(20)))
+    finally:
+        await pool.aclose()
+    assert replies == [f"reply {n}" for n in range(20)]
+    assert server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_wrong_password_backs_off(server: FakeRconServer) -> None:
+    pool = RconPool("127.0.0.1", server.port, "wrong")
+    with pytest.raises(RconAuthError):
+        await pool.command("list")
+    with pytest.raises(RconConnectionError, match="next attempt"):
+        await pool.command("list")
+    assert server.logins == 1
+    assert pool.stats()["consecutive_failures"] == 1
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_the_server_drops_the_connection(server: FakeRconServer) -> None:
+    pool = RconPool("127.0.0.1", server.port, PASSWORD)
+    try:
+        await pool.command("list")
+        server.drop_connections()
+        await asyncio.sleep(0.05)
+        assert await pool.command("list") == "There are 2 of a max of 20 players online: alice, bob"
+    finally:
+        await pool.aclose()
+    assert server.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_idle_connections_are_health_checked(server: FakeRconServer) -> None:
+    pool = RconPool("127.0.0.1", server.port, PASSWORD, health_check_interval=0)
+    try:
+        await pool.command("list")
+        await pool.command("list")
+    finally:
+        await pool.aclose()
+    stats = pool.stats()
+    assert (stats["health_checks"], stats["unhealthy"], stats["connects"]) == (1, 0, 1)